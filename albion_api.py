@@ -1,19 +1,56 @@
 import aiohttp
+import asyncio
 import logging
+import time
 from config import Config
+from utils.cache import TTLCache, SingleFlight, MISSING
+from utils.resilience import CircuitBreaker, LatencyTracker, backoff_delay
+from utils.rate_limit import PriorityRateLimiter, Priority
+from utils.roster_index import RosterIndex
+from utils.metrics import ALBION_REQUEST_SECONDS, ALBION_RESPONSES
+from utils.tracing import span
 
 logger = logging.getLogger("AlbionAPI")
 
+# Status que justificam nova tentativa
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class AlbionAPIUnavailable(Exception):
+    """A API do Albion não respondeu a tempo (timeout, erros 5xx ou disjuntor aberto)."""
+
+
 class AlbionAPI:
     """Cliente para a API do Albion Online."""
-    
+
     def __init__(self):
         self.session = None
+        # Cache LRU de respostas (inclui resultados negativos) + coalescência de chamadas iguais
+        self.cache = TTLCache(maxsize=Config.ALBION_CACHE_SIZE)
+        self.inflight = SingleFlight()
+        self.breaker = CircuitBreaker(Config.ALBION_BREAKER_THRESHOLD, Config.ALBION_BREAKER_COOLDOWN)
+        self.latency = LatencyTracker()
+        self.limiter = PriorityRateLimiter(Config.ALBION_RATE_LIMIT, Config.ALBION_RATE_BURST)
+        # Rosters completos de guildas (uma chamada por guilda por intervalo)
+        self.rosters = RosterIndex(Config.ALBION_ROSTER_TTL)
+        # Índice persistente nome -> ID (opcional) e callbacks para jogadores vistos nas respostas
+        self.player_index = None
+        self.observers = []
 
     async def start(self):
         """Inicia a sessão HTTP."""
         if not self.session:
-            self.session = aiohttp.ClientSession()
+            connector = aiohttp.TCPConnector(
+                limit=Config.ALBION_HTTP_LIMIT,
+                limit_per_host=Config.ALBION_HTTP_LIMIT_PER_HOST,
+                keepalive_timeout=Config.ALBION_KEEPALIVE,
+                ttl_dns_cache=Config.ALBION_DNS_TTL,
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=Config.ALBION_TIMEOUT,
+                connect=Config.ALBION_CONNECT_TIMEOUT,
+            )
+            self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
 
     async def close(self):
         """Fecha a sessão HTTP."""
@@ -21,45 +58,227 @@ class AlbionAPI:
             await self.session.close()
             self.session = None
 
-    async def search_player(self, player_name):
-        """Busca um jogador pelo nome exato ou parcial."""
+    def add_observer(self, callback):
+        """Registra um callback chamado com a lista de jogadores de cada resposta da API."""
+        self.observers.append(callback)
+
+    def _notify(self, players):
+        for callback in self.observers:
+            try:
+                callback(players)
+            except Exception as e:
+                logger.error(f"Erro em observador da API: {e}")
+
+    def cache_stats(self):
+        """Estatísticas do cache de respostas."""
+        stats = self.cache.stats()
+        stats["coalesced"] = self.inflight.coalesced
+        return stats
+
+    def latency_stats(self):
+        """Percentis de latência por endpoint e estado do disjuntor."""
+        return {
+            "breaker": self.breaker.state,
+            "endpoints": self.latency.summary(),
+            "limiter": self.limiter.stats(),
+        }
+
+    async def _request_json(self, endpoint, url, deadline=None, priority=Priority.INTERACTIVE):
+        """GET com limite de taxa, retry/backoff, disjuntor e deadline (time.monotonic()).
+
+        Retorna (status, json). Levanta AlbionAPIUnavailable quando não há resposta útil.
+        """
         if not self.session:
             await self.start()
-        
-        url = f"{Config.ALBION_API_URL}/search?q={player_name}"
-        try:
-            async with self.session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    players = data.get("players", [])
-                    
-                    # Tentar match exato primeiro (case-insensitive)
-                    for p in players:
-                        if p['Name'].lower() == player_name.lower():
-                            return p
-                    
-                    # Se não achar exato, retorna o primeiro da lista
-                    return players[0] if players else None
-                else:
-                    logger.warning(f"API retornou status {response.status} na busca por {player_name}")
-                    return None
-        except Exception as e:
-            logger.error(f"Erro de conexão na busca de jogador: {e}")
+
+        last_error = None
+        for attempt in range(Config.ALBION_MAX_RETRIES + 1):
+            if not self.breaker.allow():
+                raise AlbionAPIUnavailable("Disjuntor aberto: API do Albion instável.")
+
+            try:
+                with span("albion.rate_limit", endpoint=endpoint):
+                    await self.limiter.acquire(priority, deadline)
+            except asyncio.TimeoutError:
+                last_error = "fila do limitador de taxa"
+                break
+
+            remaining = Config.ALBION_TIMEOUT
+            if deadline is not None:
+                remaining = min(remaining, deadline - time.monotonic())
+                if remaining <= 0:
+                    break
+
+            started = time.monotonic()
+            retry_after = None
+            try:
+                with span(f"albion {endpoint}", attempt=attempt) as attrs:
+                    async with self.session.get(url, timeout=aiohttp.ClientTimeout(total=remaining)) as response:
+                        status = attrs["status"] = response.status
+                        if status == 200:
+                            data = await response.json(content_type=None)
+                        else:
+                            data = None
+                            retry_after = response.headers.get("Retry-After")
+                elapsed = time.monotonic() - started
+                self.latency.record(endpoint, elapsed)
+                ALBION_REQUEST_SECONDS.observe(elapsed, endpoint=endpoint)
+                ALBION_RESPONSES.inc(endpoint=endpoint, status=status)
+
+                if status not in RETRY_STATUSES:
+                    self.breaker.record_success()
+                    return status, data
+
+                last_error = f"status {status}"
+                self.breaker.record_failure()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                elapsed = time.monotonic() - started
+                self.latency.record(endpoint, elapsed)
+                ALBION_REQUEST_SECONDS.observe(elapsed, endpoint=endpoint)
+                ALBION_RESPONSES.inc(endpoint=endpoint, status="timeout" if isinstance(e, asyncio.TimeoutError) else "error")
+                last_error = repr(e)
+                self.breaker.record_failure()
+
+            if attempt >= Config.ALBION_MAX_RETRIES:
+                break
+            delay = backoff_delay(attempt)
+            if retry_after and retry_after.replace(".", "", 1).isdigit():
+                delay = max(delay, float(retry_after))
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                break
+            logger.warning(f"Falha em {endpoint} ({last_error}), nova tentativa em {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+        raise AlbionAPIUnavailable(f"Sem resposta da API em {endpoint}: {last_error or 'deadline esgotado'}")
+
+    async def _cached(self, key, ttl, fetch):
+        """Retorna do cache ou executa `fetch` uma única vez para chamadas concorrentes.
+
+        `fetch` retorna (valor, cacheavel). Resultados vazios (None) usam o TTL negativo;
+        falhas transitórias (cacheavel=False) não são guardadas.
+        """
+        value = self.cache.get(key)
+        if value is not MISSING:
+            return value
+
+        async def load():
+            value, cacheable = await fetch()
+            if cacheable:
+                self.cache.set(key, value, ttl if value is not None else Config.ALBION_NEGATIVE_TTL)
+            return value
+
+        with span(f"albion.{key[0]}"):
+            return await self.inflight.do(key, load)
+
+    async def resolve_player(self, player_name, deadline=None, priority=Priority.INTERACTIVE, full=True):
+        """Resolve um nick (exato, case-insensitive) para os dados completos do jogador.
+
+        Usa, nesta ordem: rosters em memória, o índice local de nomes (sem busca)
+        e, por último, o endpoint /search. Com `full=False` basta o resultado da
+        busca (Id, nome, guilda e aliança, sem estatísticas nem AllianceTag), que
+        dispensa a chamada a /players/{id}; o índice local é pulado porque a guilda
+        guardada nele pode estar desatualizada.
+        """
+        member = self.rosters.find_by_name(player_name)
+        if member:
+            return member
+
+        entry = self.player_index.resolve(player_name) if self.player_index and full else None
+        if entry:
+            info = await self.get_player_info(entry[0], deadline, priority)
+            # O nome pode ter mudado desde que foi indexado
+            if info and info.get('Name', '').lower() == player_name.lower():
+                return info
+
+        found = await self.search_player(player_name, deadline, priority)
+        if not found:
             return None
+        if 'LifetimeStatistics' in found or not full:
+            return found
+        return await self.get_player_info(found['Id'], deadline, priority)
+
+    async def search_player(self, player_name, deadline=None, priority=Priority.INTERACTIVE):
+        """Busca um jogador pelo nome exato (case-insensitive) no endpoint /search."""
+        key = ("search", player_name.lower())
+        return await self._cached(
+            key, Config.ALBION_SEARCH_TTL, lambda: self._search_player(player_name, deadline, priority)
+        )
+
+    async def _search_player(self, player_name, deadline, priority):
+        url = f"{Config.ALBION_API_URL}/search?q={player_name}"
+        status, data = await self._request_json("search", url, deadline, priority)
+        if status != 200:
+            logger.warning(f"API retornou status {status} na busca por {player_name}")
+            return None, status == 404
 
-    async def get_player_info(self, player_id):
+        players = (data or {}).get("players", [])
+        self._notify(players)
+
+        # Apenas match exato (case-insensitive): nunca devolver outro jogador
+        for p in players:
+            if p['Name'].lower() == player_name.lower():
+                return p, True
+        return None, True
+
+    async def get_player_info(self, player_id, deadline=None, priority=Priority.INTERACTIVE):
         """Obtém detalhes completos de um jogador pelo ID."""
-        if not self.session:
-            await self.start()
+        key = ("player", player_id)
+        return await self._cached(
+            key, Config.ALBION_PLAYER_TTL, lambda: self._get_player_info(player_id, deadline, priority)
+        )
 
+    async def _get_player_info(self, player_id, deadline, priority):
         url = f"{Config.ALBION_API_URL}/players/{player_id}"
-        try:
-            async with self.session.get(url) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    logger.warning(f"API retornou status {response.status} ao buscar ID {player_id}")
-                    return None
-        except Exception as e:
-            logger.error(f"Erro de conexão ao obter detalhes do jogador: {e}")
-            return None
\ No newline at end of file
+        status, data = await self._request_json("players", url, deadline, priority)
+        if status != 200:
+            logger.warning(f"API retornou status {status} ao buscar ID {player_id}")
+            return None, status == 404
+        if data:
+            self._notify([data])
+        return data, True
+
+    async def get_guild_info(self, guild_id, deadline=None, priority=Priority.INTERACTIVE):
+        """Obtém os dados de uma guilda (nome, aliança, contagem de membros)."""
+        key = ("guild", guild_id)
+        return await self._cached(
+            key, Config.ALBION_ROSTER_TTL, lambda: self._get_entity("guilds", guild_id, deadline, priority)
+        )
+
+    async def get_alliance_info(self, alliance_id, deadline=None, priority=Priority.INTERACTIVE):
+        """Obtém os dados de uma aliança, incluindo a lista de guildas (`Guilds`)."""
+        key = ("alliance", alliance_id)
+        return await self._cached(
+            key, Config.ALBION_ROSTER_TTL, lambda: self._get_entity("alliances", alliance_id, deadline, priority)
+        )
+
+    async def get_alliance_guilds(self, alliance_id, deadline=None, priority=Priority.INTERACTIVE):
+        """Lista as guildas ({Id, Name}) de uma aliança."""
+        info = await self.get_alliance_info(alliance_id, deadline, priority)
+        return (info or {}).get("Guilds", [])
+
+    async def _get_entity(self, endpoint, entity_id, deadline, priority):
+        url = f"{Config.ALBION_API_URL}/{endpoint}/{entity_id}"
+        status, data = await self._request_json(endpoint, url, deadline, priority)
+        if status != 200:
+            logger.warning(f"API retornou status {status} ao buscar {endpoint}/{entity_id}")
+            return None, status == 404
+        return data, True
+
+    async def get_guild_members(self, guild_id, deadline=None, priority=Priority.INTERACTIVE):
+        """Retorna o roster indexado de uma guilda, baixando-o no máximo uma vez por intervalo."""
+        roster = self.rosters.get(guild_id)
+        if roster:
+            return roster
+        return await self.inflight.do(
+            ("guild_members", guild_id), lambda: self._fetch_roster(guild_id, deadline, priority)
+        )
+
+    async def _fetch_roster(self, guild_id, deadline, priority):
+        url = f"{Config.ALBION_API_URL}/guilds/{guild_id}/members"
+        status, data = await self._request_json("guild_members", url, deadline, priority)
+        if status != 200:
+            logger.warning(f"API retornou status {status} ao buscar membros da guilda {guild_id}")
+            # Guilda inexistente: roster vazio (cacheado pelo intervalo normal)
+            return self.rosters.update(guild_id, []) if status == 404 else None
+        self._notify(data or [])
+        return self.rosters.update(guild_id, data or [])
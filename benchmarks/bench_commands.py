@@ -0,0 +1,172 @@
+"""Benchmark dos handlers reais de /registrar, /aplicar_alianca e do botão Aprovar.
+
+Roda os cogs contra um Discord falso, um servidor gameinfo local (latência e erros
+configuráveis) e o Postgres de DATABASE_URL, em concorrência crescente, e grava
+comandos/s e p50/p99 em JSON para comparar execuções.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_commands --requests 200 --concurrency 1 10 50
+    python -m benchmarks.bench_commands --compare benchmarks/results/anterior.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+from config import Config
+from benchmarks.harness import BenchEnvironment, percentile
+
+_names = itertools.count()
+
+
+async def registration(env, reuse_names):
+    nickname = "BenchReuse" if reuse_names else f"Bench{next(_names)}"
+    interaction = env.interaction()
+    cog = env.recrutamento
+    await cog.registrar.callback(cog, interaction, nickname)
+    return interaction.succeeded
+
+
+async def alliance(env, reuse_names):
+    nickname = "BenchReuse" if reuse_names else f"Ally{next(_names)}"
+    interaction = env.interaction()
+    cog = env.alianca
+    await cog.aplicar_alianca.callback(cog, interaction, nickname)
+    return interaction.succeeded
+
+
+async def approval(env, reuse_names, prepared):
+    application_id, message = prepared.pop()
+    interaction = env.interaction(member=env.officer, message=message)
+    await env.recrutamento.approve_application(interaction, application_id)
+    return interaction.succeeded
+
+
+SCENARIOS = {
+    "registro": registration,
+    "alianca": alliance,
+    "aprovacao": approval,
+}
+
+
+async def run_level(env, name, concurrency, requests, reuse_names):
+    scenario = SCENARIOS[name]
+    args = (env, reuse_names)
+    if name == "aprovacao":
+        # Os pedidos pendentes são criados antes e não entram na medição
+        prepared = [await env.pending_application(f"Approve{next(_names)}") for _ in range(requests)]
+        args += (prepared,)
+
+    latencies, failures = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                ok = await scenario(*args)
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            failures += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    return {
+        "scenario": name,
+        "concurrency": concurrency,
+        "requests": requests,
+        "failures": failures,
+        "seconds": round(elapsed, 3),
+        "per_second": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "max_ms": round(max(latencies) * 1000, 1),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["scenario"], r["concurrency"]): r for r in json.load(f)["results"]}
+    print(f"\nComparação com {baseline_path}:")
+    for r in results:
+        old = baseline.get((r["scenario"], r["concurrency"]))
+        if not old:
+            continue
+        rate = (r["per_second"] / old["per_second"] - 1) * 100 if old["per_second"] else 0
+        p99 = (r["p99_ms"] / old["p99_ms"] - 1) * 100 if old["p99_ms"] else 0
+        print(f"{r['scenario']:<10} c={r['concurrency']:<4} cmd/s {rate:+6.1f}%  p99 {p99:+6.1f}%")
+
+
+async def main(args):
+    results = []
+    async with BenchEnvironment(
+        albion_latency=args.albion_latency, albion_error_rate=args.albion_errors,
+        discord_latency=args.discord_latency, albion_rate=args.albion_rate,
+        member_edit_delay=args.member_edit_delay, trace=args.trace
+    ) as env:
+        print(f"{'cenário':<10} {'conc':>5} {'cmd/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'falhas':>7}")
+        for name in args.scenarios:
+            for concurrency in args.concurrency:
+                r = await run_level(env, name, concurrency, args.requests, args.reuse_names)
+                results.append(r)
+                print(f"{name:<10} {concurrency:>5} {r['per_second']:>9.1f} {r['p50_ms']:>9.1f} "
+                      f"{r['p99_ms']:>9.1f} {r['failures']:>7}")
+        albion_requests = env.albion_server.requests
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "albion_latency": args.albion_latency,
+            "albion_error_rate": args.albion_errors,
+            "discord_latency": args.discord_latency,
+            "albion_rate": args.albion_rate,
+            "member_edit_delay": Config.MEMBER_EDIT_DELAY,
+            "reuse_names": args.reuse_names,
+            "albion_requests": albion_requests,
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"commands-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados gravados em {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dos handlers de comandos.")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 5, 10, 25, 50])
+    parser.add_argument("--requests", type=int, default=200, help="comandos por nível de concorrência")
+    parser.add_argument("--albion-latency", type=float, default=0.05, help="latência do gameinfo falso (s)")
+    parser.add_argument("--albion-errors", type=float, default=0.0, help="fração de respostas 503")
+    parser.add_argument("--discord-latency", type=float, default=0.05, help="latência das chamadas ao Discord (s)")
+    parser.add_argument("--albion-rate", type=float, default=1000.0, help="limite de req/s do AlbionAPI")
+    parser.add_argument("--member-edit-delay", type=float,
+                        help="pausa entre edições de membros por servidor (padrão: MEMBER_EDIT_DELAY)")
+    parser.add_argument("--trace", action="store_true", help="mantém o log de interações lentas")
+    parser.add_argument("--reuse-names", action="store_true", help="repete o mesmo nick (mede o caminho com cache)")
+    parser.add_argument("--output", help="arquivo JSON de saída")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para comparar")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,102 @@
+"""Micro-benchmark dos caminhos de escrita em lote do DatabaseManager.
+
+Uso (a partir da raiz do projeto, com DATABASE_URL apontando para um Postgres local):
+    python -m benchmarks.bench_db_bulk --rows 5000
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timezone
+from config import Config
+from database import DatabaseManager
+
+TABLE = "bench_bulk_writes"
+
+
+def make_rows(n):
+    now = datetime.now(timezone.utc)
+    return [(i, 1000 + i % 7, 5000 + i, f"Player{i}", "APPROVED", now) for i in range(n)]
+
+
+async def reset(db):
+    await db.execute_query(f"DROP TABLE IF EXISTS {TABLE}")
+    await db.execute_query(f"""
+        CREATE TABLE {TABLE} (
+            id INT, guild_id BIGINT, user_id BIGINT, albion_nick TEXT, status TEXT, created_at TIMESTAMPTZ
+        )
+    """)
+
+
+INSERT = f"INSERT INTO {TABLE} VALUES ($1, $2, $3, $4, $5, $6)"
+
+
+async def single_statements(db, rows):
+    for row in rows:
+        await db.execute_query(INSERT, *row)
+
+
+async def executemany(db, rows):
+    await db.executemany(INSERT, rows)
+
+
+async def unnest(db, rows):
+    columns = list(zip(*rows))
+    await db.execute_query(
+        f"""INSERT INTO {TABLE}
+        SELECT * FROM unnest($1::int[], $2::bigint[], $3::bigint[], $4::text[], $5::text[], $6::timestamptz[])""",
+        *[list(c) for c in columns]
+    )
+
+
+async def copy(db, rows):
+    await db.copy_records_to_table(TABLE, rows)
+
+
+async def transaction(db, rows):
+    # Vários comandos relacionados numa única conexão/transação
+    async with db.transaction() as conn:
+        await conn.copy_records_to_table(TABLE, records=rows)
+        await conn.execute(f"UPDATE {TABLE} SET status = 'CHECKED' WHERE guild_id = $1", 1000)
+        await conn.execute(f"DELETE FROM {TABLE} WHERE status = 'CHECKED'")
+
+
+CASES = [
+    ("execute_query (1 por linha)", single_statements),
+    ("executemany", executemany),
+    ("INSERT ... unnest", unnest),
+    ("copy_records_to_table", copy),
+    ("transaction (COPY + UPDATE + DELETE)", transaction),
+]
+
+
+async def main(n_rows, repeat):
+    if not Config.validate():
+        raise SystemExit("Configure DATABASE_URL (e DISCORD_TOKEN) para rodar o benchmark.")
+
+    db = DatabaseManager()
+    await db.connect()
+    rows = make_rows(n_rows)
+    try:
+        print(f"{'caso':<40} {'linhas/s':>12} {'ms':>10}")
+        for name, case in CASES:
+            # O caminho linha a linha é lento: usa uma amostra menor e extrapola a taxa
+            sample = rows[: min(len(rows), 1000)] if case is single_statements else rows
+            best = None
+            for _ in range(repeat):
+                await reset(db)
+                started = time.perf_counter()
+                await case(db, sample)
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            print(f"{name:<40} {len(sample) / best:>12,.0f} {best * 1000:>10.1f}")
+    finally:
+        await db.execute_query(f"DROP TABLE IF EXISTS {TABLE}")
+        await db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
@@ -0,0 +1,199 @@
+"""Memória (RSS) do cache de membros em cada MEMBER_CACHE_MODE.
+
+Cada modo roda num subprocesso limpo com um ConnectionState real do discord.py.
+Um gateway simulado responde aos pedidos de membros (o chunk completo no modo
+full, lotes de ids no relevant) e uma fração dos membros gera eventos de
+entrada/atualização, como aconteceria com o bot rodando.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_member_cache --members 100000 --relevant-share 0.05
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import subprocess
+import sys
+import discord
+from discord.state import ConnectionState
+from utils.member_cache import MODES, FULL, RELEVANT, MemberCache, client_options
+
+GUILD_ID = 900_000_000_000_000_000
+BASE_USER_ID = 100_000_000_000_000_000
+CHUNK_SIZE = 1000  # membros por GUILD_MEMBERS_CHUNK, como o Discord envia
+
+
+def rss_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def member_payload(user_id, rng):
+    return {
+        "user": {
+            "id": str(user_id),
+            "username": f"player{user_id % 10_000_000}",
+            "discriminator": "0",
+            "global_name": f"Player {user_id % 10_000_000}",
+            "avatar": "%032x" % rng.getrandbits(128) if rng.random() < 0.7 else None,
+        },
+        "nick": f"[TAG] Nick{user_id % 100000}" if rng.random() < 0.3 else None,
+        "roles": [str(GUILD_ID + 1 + r) for r in rng.sample(range(20), rng.randint(0, 4))],
+        "joined_at": "2024-05-01T12:00:00.000000+00:00",
+        "deaf": False,
+        "mute": False,
+        "flags": 0,
+    }
+
+
+def guild_payload(members):
+    return {
+        "id": str(GUILD_ID),
+        "name": "Servidor de Teste",
+        "owner_id": str(BASE_USER_ID),
+        "member_count": members,
+        "large": True,
+        "roles": [
+            {"id": str(GUILD_ID + r), "name": f"cargo{r}", "permissions": "0", "position": r,
+             "color": 0, "hoist": False, "managed": False, "mentionable": False}
+            for r in range(21)
+        ],
+        "channels": [],
+        "members": [],
+        "features": [],
+        "emojis": [],
+        "stickers": [],
+    }
+
+
+class FakeWebSocket:
+    """Responde a REQUEST_GUILD_MEMBERS como o gateway: em chunks com o nonce do pedido."""
+
+    def __init__(self, state, user_ids, rng):
+        self.state = state
+        self.user_ids = set(user_ids)
+        self.rng = rng
+        self.requests = 0
+
+    async def request_chunks(self, guild_id, query=None, *, limit, user_ids=None, presences=False, nonce=None):
+        # A resposta chega depois, pelo "gateway", como na conexão real
+        self.requests += 1
+        asyncio.create_task(self._respond(guild_id, user_ids, nonce))
+
+    async def _respond(self, guild_id, user_ids, nonce):
+        await asyncio.sleep(0)
+        wanted = [u for u in user_ids if u in self.user_ids] if user_ids else sorted(self.user_ids)
+        chunks = [wanted[i:i + CHUNK_SIZE] for i in range(0, len(wanted), CHUNK_SIZE)] or [[]]
+        for index, chunk in enumerate(chunks):
+            self.state.parse_guild_members_chunk({
+                "guild_id": str(guild_id),
+                "members": [member_payload(u, self.rng) for u in chunk],
+                "chunk_index": index,
+                "chunk_count": len(chunks),
+                "nonce": nonce,
+            })
+            await asyncio.sleep(0)
+
+
+class _Bot:
+    """O mínimo que o MemberCache usa do bot."""
+
+    def __init__(self, state):
+        self._state = state
+
+    @property
+    def guilds(self):
+        return list(self._state.guilds)
+
+    def get_guild(self, guild_id):
+        return self._state._get_guild(guild_id)
+
+
+def make_state(mode):
+    intents = discord.Intents.default()
+    intents.message_content = True
+    intents.members = True
+    state = ConnectionState(dispatch=lambda *a, **k: None, handlers={}, hooks={}, http=None,
+                            intents=intents, **client_options(mode))
+    state.loop = asyncio.get_running_loop()
+    return state
+
+
+async def run_mode(args):
+    rng = random.Random(args.seed)
+    user_ids = [BASE_USER_ID + i for i in range(args.members)]
+    relevant = rng.sample(user_ids, int(args.members * args.relevant_share))
+    active = rng.sample(user_ids, int(args.members * args.active_share))
+
+    state = make_state(args.mode)
+    ws = FakeWebSocket(state, user_ids, rng)
+    state._get_websocket = lambda guild_id=None, *, shard_id=None: ws
+    guild = discord.Guild(data=guild_payload(args.members), state=state)
+    state._add_guild(guild)
+
+    gc.collect()
+    before = rss_bytes()
+
+    cache = MemberCache(_Bot(state), mode=args.mode)
+    if args.mode == FULL:
+        await state.chunk_guild(guild)
+    elif args.mode == RELEVANT:
+        await cache.warm(guild, relevant)
+
+    # Atividade do servidor: entradas e atualizações de membros fora do conjunto relevante
+    for user_id in active:
+        state.parse_guild_member_update({"guild_id": str(guild.id), **member_payload(user_id, rng)})
+
+    # Resolução sob demanda de quem não está no cache (aprovação de um pedido novo)
+    for user_id in rng.sample(user_ids, args.lookups):
+        await cache.resolve(guild, user_id)
+
+    gc.collect()
+    after = rss_bytes()
+    cached = len(guild.members)
+    return {
+        "mode": args.mode,
+        "members": args.members,
+        "cached": cached,
+        "rss_delta_mb": round((after - before) / 2**20, 2),
+        "mb_per_10k_members": round((after - before) / 2**20 / args.members * 10_000, 2),
+        "kb_per_cached_member": round((after - before) / 1024 / cached, 2) if cached else 0,
+        "gateway_requests": ws.requests,
+    }
+
+
+def spawn(args, mode):
+    cmd = [sys.executable, "-m", "benchmarks.bench_member_cache", "--child", "--mode", mode,
+           "--members", str(args.members), "--relevant-share", str(args.relevant_share),
+           "--active-share", str(args.active_share), "--lookups", str(args.lookups), "--seed", str(args.seed)]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main(args):
+    if args.child:
+        print(json.dumps(asyncio.run(run_mode(args))))
+        return
+
+    print(f"{args.members} membros | relevantes {args.relevant_share:.0%} | "
+          f"ativos {args.active_share:.0%} | {args.lookups} buscas sob demanda\n")
+    print(f"{'modo':<10} {'em cache':>10} {'RSS (MB)':>10} {'MB/10k membros':>16} {'KB/membro':>10} {'pedidos':>8}")
+    for mode in args.modes:
+        r = spawn(args, mode)
+        print(f"{r['mode']:<10} {r['cached']:>10} {r['rss_delta_mb']:>10.1f} {r['mb_per_10k_members']:>16.2f} "
+              f"{r['kb_per_cached_member']:>10.2f} {r['gateway_requests']:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara a memória do cache de membros por modo.")
+    parser.add_argument("--members", type=int, default=100_000, help="membros no servidor")
+    parser.add_argument("--relevant-share", type=float, default=0.05, help="fração registrada/pendente")
+    parser.add_argument("--active-share", type=float, default=0.02, help="fração que gera eventos de membro")
+    parser.add_argument("--lookups", type=int, default=50, help="buscas sob demanda de membros fora do cache")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    main(parser.parse_args())
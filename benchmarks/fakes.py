@@ -0,0 +1,298 @@
+"""Substitutos locais do Discord e da API do Albion para os benchmarks.
+
+Os objetos implementam só o que os cogs usam; as chamadas "REST" do Discord
+dormem `latency` segundos para simular a ida e volta.
+"""
+import asyncio
+import itertools
+import random
+import time
+from collections import deque
+from datetime import datetime, timezone
+from aiohttp import web
+import discord
+
+_ids = itertools.count(10_000_000)
+
+
+class FakeRole:
+    def __init__(self, role_id, name, default=False):
+        self.id = role_id
+        self.name = name
+        self.mention = f"<@&{role_id}>"
+        self._default = default
+
+    def is_default(self):
+        return self._default
+
+    def __eq__(self, other):
+        return getattr(other, "id", None) == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+class FakeMember:
+    def __init__(self, guild, user_id, latency):
+        self.guild = guild
+        self.id = user_id
+        self.name = f"user{user_id}"
+        self.display_name = self.name
+        self.mention = f"<@{user_id}>"
+        self.nick = None
+        self.roles = [guild.default_role]
+        self.latency = latency
+        self.edits = 0
+
+    async def edit(self, *, roles=discord.utils.MISSING, nick=discord.utils.MISSING, reason=None):
+        await asyncio.sleep(self.latency)
+        self.edits += 1
+        if roles is not discord.utils.MISSING:
+            self.roles = [self.guild.default_role] + [self.guild.get_role(r.id) or r for r in roles]
+        if nick is not discord.utils.MISSING:
+            self.nick = nick
+
+    async def add_roles(self, *roles, reason=None):
+        await self.edit(roles=[r for r in self.roles if not r.is_default()] + list(roles), reason=reason)
+
+    async def remove_roles(self, *roles, reason=None):
+        await self.edit(roles=[r for r in self.roles if not r.is_default() and r not in roles], reason=reason)
+
+    def __str__(self):
+        return self.name
+
+
+class FakeMessage:
+    def __init__(self, channel, embed=None, view=None, latency=0.0):
+        self.id = next(_ids)
+        self.channel = channel
+        self.embeds = [embed] if embed else []
+        self.view = view
+        self.latency = latency
+
+    async def edit(self, *, embed=None, view=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        if embed is not None:
+            self.embeds = [embed]
+        if view is not None:
+            self.view = view
+
+
+class FakeChannel:
+    """Canal de texto. `rate=(n, segundos)` imita o limite por canal do Discord
+    (o discord.py espera o bucket liberar em vez de falhar)."""
+
+    def __init__(self, channel_id, name, latency, rate=None):
+        self.id = channel_id
+        self.name = name
+        self.mention = f"<#{channel_id}>"
+        self.latency = latency
+        self.rate = rate
+        self.sent = []
+        self.rate_waits = []
+        self._window = deque()
+
+    async def _respect_rate(self):
+        limit, per = self.rate
+        started = time.monotonic()
+        while True:
+            now = time.monotonic()
+            while self._window and now - self._window[0] >= per:
+                self._window.popleft()
+            if len(self._window) < limit:
+                self._window.append(now)
+                break
+            await asyncio.sleep(per - (now - self._window[0]))
+        self.rate_waits.append(time.monotonic() - started)
+
+    async def send(self, content=None, *, embed=None, view=None, **kwargs):
+        if self.rate:
+            await self._respect_rate()
+        await asyncio.sleep(self.latency)
+        message = FakeMessage(self, embed, view, self.latency)
+        self.sent.append(message)
+        return message
+
+
+class FakeGuild:
+    """Servidor com os canais e cargos que o /auto_setup criaria."""
+
+    def __init__(self, guild_id, latency=0.05, channel_rate=None):
+        self.id = guild_id
+        self.name = f"Bench {guild_id}"
+        self.latency = latency
+        self.default_role = FakeRole(guild_id, "@everyone", default=True)
+        self.recruitment_channel = FakeChannel(next(_ids), "registros", latency, channel_rate)
+        self.approval_channel = FakeChannel(next(_ids), "aprovacoes", latency, channel_rate)
+        self.member_role = FakeRole(next(_ids), "Membro")
+        self.recruit_role = FakeRole(next(_ids), "Recruta")
+        self.ally_role = FakeRole(next(_ids), "Aliado")
+        self._roles = {r.id: r for r in (self.default_role, self.member_role, self.recruit_role, self.ally_role)}
+        self._channels = {c.id: c for c in (self.recruitment_channel, self.approval_channel)}
+        self._members = {}
+
+    def get_role(self, role_id):
+        return self._roles.get(role_id)
+
+    def get_channel(self, channel_id):
+        return self._channels.get(channel_id)
+
+    def get_member(self, user_id):
+        return self._members.get(user_id)
+
+    def add_member(self, user_id=None):
+        member = FakeMember(self, user_id or next(_ids), self.latency)
+        member.roles.append(self.recruit_role)
+        self._members[member.id] = member
+        return member
+
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def defer(self, *, ephemeral=False, thinking=False):
+        await asyncio.sleep(self._interaction.latency)
+        self._done = True
+
+    async def send_message(self, content=None, **kwargs):
+        await asyncio.sleep(self._interaction.latency)
+        self._done = True
+        self._interaction.replies.append(content)
+
+    async def edit_message(self, *, embed=None, view=None, **kwargs):
+        await asyncio.sleep(self._interaction.latency)
+        self._done = True
+        if self._interaction.message:
+            await self._interaction.message.edit(embed=embed, view=view)
+
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self._interaction = interaction
+
+    async def send(self, content=None, **kwargs):
+        await asyncio.sleep(self._interaction.latency)
+        self._interaction.replies.append(content)
+
+
+class FakeInteraction:
+    """O suficiente de discord.Interaction para chamar os handlers dos cogs diretamente."""
+
+    def __init__(self, client, guild, user, message=None):
+        self.client = client
+        self.guild = guild
+        self.guild_id = guild.id
+        self.user = user
+        self.message = message
+        self.latency = guild.latency
+        self.created_at = datetime.now(timezone.utc)
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+        self.replies = []
+
+    @property
+    def succeeded(self):
+        return any(isinstance(r, str) and r.startswith("✅") for r in self.replies)
+
+
+class FakeAlbionServer:
+    """Servidor aiohttp que imita /search, /players/{id} e /guilds/{id} do gameinfo.
+
+    Todo nick existe; o jogador pertence à aliança `alliance_tag`. `latency` atrasa
+    cada resposta e `error_rate` devolve 503 aleatoriamente (semente fixa).
+    """
+
+    def __init__(self, latency=0.05, error_rate=0.0, alliance_tag="ALLY", seed=42):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.alliance_tag = alliance_tag
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.inflight = 0
+        self.max_inflight = 0
+        self.url = None
+        self._runner = None
+
+    def player(self, name, full=False):
+        data = {
+            "Id": f"id-{name.lower()}",
+            "Name": name,
+            "GuildId": "bench-guild",
+            "GuildName": "Bench Guild",
+            "AllianceId": "bench-alliance",
+            "AllianceName": "Bench Alliance",
+            "KillFame": 1_000_000,
+            "DeathFame": 10_000,
+        }
+        # Como na API real, a busca não traz AllianceTag; /players/{id} traz
+        if full:
+            data["AllianceTag"] = self.alliance_tag
+            data["LifetimeStatistics"] = {
+                "PvE": {"Total": 5_000_000},
+                "Gathering": {"All": {"Total": 100_000}},
+                "Crafting": {"Total": 50_000},
+            }
+        return data
+
+    async def _delay_or_fail(self):
+        self.requests += 1
+        self.inflight += 1
+        self.max_inflight = max(self.max_inflight, self.inflight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.inflight -= 1
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.errors += 1
+            return web.json_response({"error": "unavailable"}, status=503)
+        return None
+
+    async def search(self, request):
+        failure = await self._delay_or_fail()
+        if failure:
+            return failure
+        name = request.query.get("q", "")
+        return web.json_response({"guilds": [], "players": [self.player(name)]})
+
+    async def get_player(self, request):
+        failure = await self._delay_or_fail()
+        if failure:
+            return failure
+        name = request.match_info["player_id"].removeprefix("id-")
+        return web.json_response(self.player(name, full=True))
+
+    async def get_guild(self, request):
+        failure = await self._delay_or_fail()
+        if failure:
+            return failure
+        return web.json_response({
+            "Id": request.match_info["guild_id"],
+            "Name": "Bench Guild",
+            "AllianceId": "bench-alliance",
+            "AllianceName": "Bench Alliance",
+            "AllianceTag": self.alliance_tag,
+            "MemberCount": 300,
+        })
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/search", self.search)
+        app.router.add_get("/players/{player_id}", self.get_player)
+        app.router.add_get("/guilds/{guild_id}", self.get_guild)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self.url
+
+    async def close(self):
+        if self._runner:
+            await self._runner.cleanup()
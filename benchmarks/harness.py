@@ -0,0 +1,140 @@
+"""Monta o bot real (cogs, banco, AlbionAPI) contra os substitutos de benchmarks.fakes.
+
+Uso:
+    async with BenchEnvironment(albion_latency=0.05) as env:
+        interaction = env.interaction()
+        await env.recrutamento.registrar.callback(env.recrutamento, interaction, "Nick")
+"""
+from config import Config
+from migrations import MigrationRunner
+from benchmarks.fakes import FakeAlbionServer, FakeGuild, FakeInteraction, FakeMessage
+
+BENCH_GUILD_ID = 900_000_000_000_000_001
+
+CONFIG_QUERY = """
+INSERT INTO server_config (
+    guild_id, recruitment_channel_id, approval_channel_id,
+    member_role_id, recruit_role_id, ally_role_id,
+    guild_tag, alliance_tag, server_type
+) VALUES ($1, $2, $3, $4, $5, $6, 'BENCH', $7, 'HYBRID')
+ON CONFLICT (guild_id) DO UPDATE SET
+    recruitment_channel_id = $2, approval_channel_id = $3,
+    member_role_id = $4, recruit_role_id = $5, ally_role_id = $6,
+    guild_tag = 'BENCH', alliance_tag = $7, server_type = 'HYBRID'
+RETURNING *;
+"""
+
+CLEANUP_QUERIES = [
+    "DELETE FROM support_tickets WHERE guild_id = ANY($1::bigint[])",
+    "DELETE FROM applications WHERE guild_id = ANY($1::bigint[])",
+    "DELETE FROM guild_members WHERE guild_id = ANY($1::bigint[])",
+    "DELETE FROM recruitment_log WHERE guild_id = ANY($1::bigint[])",
+    "DELETE FROM server_config WHERE guild_id = ANY($1::bigint[])",
+]
+
+
+class BenchEnvironment:
+    def __init__(self, albion_latency=0.05, albion_error_rate=0.0, discord_latency=0.05,
+                 albion_rate=1000.0, member_edit_delay=None, alliance_tag="ALLY", trace=False,
+                 guilds=1, channel_rate=None):
+        self.albion_server = FakeAlbionServer(albion_latency, albion_error_rate, alliance_tag)
+        self.discord_latency = discord_latency
+        self.guild_count = guilds
+        self.channel_rate = channel_rate
+        self.albion_rate = albion_rate
+        self.member_edit_delay = member_edit_delay
+        self.trace = trace
+        self.alliance_tag = alliance_tag
+        self.bot = None
+        self.guilds = []
+        self.guild = None
+        self.officer = None
+
+    async def __aenter__(self):
+        if not Config.validate():
+            raise SystemExit("Configure DATABASE_URL (e DISCORD_TOKEN) para rodar os benchmarks.")
+
+        Config.ALBION_API_URL = await self.albion_server.start()
+        # O limitador de produção (4 req/s) mediria a fila, não os handlers;
+        # albion_rate=None mantém os valores de Config (testes de carga)
+        if self.albion_rate is not None:
+            Config.ALBION_RATE_LIMIT = self.albion_rate
+            Config.ALBION_RATE_BURST = max(1, int(self.albion_rate))
+        if self.member_edit_delay is not None:
+            Config.MEMBER_EDIT_DELAY = self.member_edit_delay
+        Config.METRICS_ENABLED = False
+        # Com milhares de comandos, cada rastro lento viraria uma linha de log
+        Config.TRACE_ENABLED = self.trace
+
+        from bot import OVigiaBot  # depois dos ajustes de Config, que o construtor lê
+
+        self.bot = bot = OVigiaBot()
+        self.guilds = [
+            FakeGuild(BENCH_GUILD_ID + i, self.discord_latency, self.channel_rate)
+            for i in range(self.guild_count)
+        ]
+        self.guild = self.guilds[0]
+        self.officer = self.guild.add_member()
+        by_id = {guild.id: guild for guild in self.guilds}
+        # Substitui o cache de servidores do gateway (não há login)
+        bot.get_guild = by_id.get
+
+        await bot.db.connect()
+        await MigrationRunner(bot.db).upgrade()
+        await bot.albion.start()
+        await bot.load_extension("cogs.recrutamento_cog")
+        await bot.load_extension("cogs.alianca_cog")
+        await bot.log_writer.start()
+
+        await self.cleanup()
+        for guild in self.guilds:
+            await bot.config_cache.save(
+                CONFIG_QUERY, guild.id, guild.recruitment_channel.id, guild.approval_channel.id,
+                guild.member_role.id, guild.recruit_role.id, guild.ally_role.id, self.alliance_tag
+            )
+        return self
+
+    async def __aexit__(self, *exc):
+        try:
+            await self.bot.approval_digest.close()
+            await self.bot.log_writer.close()
+            await self.cleanup()
+        finally:
+            await self.bot.member_mutations.close()
+            await self.bot.albion.close()
+            await self.bot.db.close()
+            await self.albion_server.close()
+
+    async def cleanup(self):
+        async with self.bot.db.transaction() as conn:
+            for query in CLEANUP_QUERIES:
+                await conn.execute(query, [guild.id for guild in self.guilds])
+
+    @property
+    def recrutamento(self):
+        return self.bot.get_cog("RecrutamentoCog")
+
+    @property
+    def alianca(self):
+        return self.bot.get_cog("AliancaCog")
+
+    def interaction(self, member=None, message=None, guild=None):
+        """Interação nova de um membro (criado na hora se não for informado)."""
+        guild = guild or self.guild
+        return FakeInteraction(self.bot, guild, member or guild.add_member(), message)
+
+    async def pending_application(self, nickname):
+        """Cria um pedido pendente com card no canal de aprovação (fora da medição)."""
+        from utils.applications import create_application
+        member = self.guild.add_member()
+        player = self.albion_server.player(nickname)
+        application_id = await create_application(self.bot.db, self.guild.id, member.id, player)
+        message = FakeMessage(self.guild.approval_channel, latency=self.discord_latency)
+        return application_id, message
+
+
+def percentile(samples, point):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(point / 100 * (len(ordered) - 1))))]
@@ -0,0 +1,327 @@
+"""Teste de carga: tempestade de /registrar e /aplicar_alianca após um anúncio.
+
+Diferente de bench_commands (concorrência fechada), aqui as chegadas seguem uma
+distribuição no tempo e não esperam as anteriores terminarem, como usuários reais.
+Os comandos se espalham por vários servidores simulados e usam por padrão os
+limites de produção (Config) do AlbionAPI. Durante a execução um amostrador
+registra o uso do pool do banco, a fila do limitador e a fila de edições de membros.
+
+Distribuições (`--distribution`):
+    poisson  chegadas aleatórias independentes (taxa constante)
+    uniform  intervalos iguais
+    burst    `--burst-share` das chegadas no primeiro décimo da janela
+    ramp     taxa crescendo linearmente até o fim da janela
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.load_storm --users 300 --duration 60 --guilds 20
+    python -m benchmarks.load_storm --users 300 --duration 30 --distribution burst --channel-rate 5/5
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from config import Config
+from utils.metrics import registry, ALBION_REQUEST_SECONDS, ALBION_RESPONSES, DB_POOL_WAIT_SECONDS, DB_QUERY_SECONDS
+from benchmarks.bench_commands import git_revision
+from benchmarks.harness import BenchEnvironment, percentile
+
+_names = itertools.count()
+
+API_UNAVAILABLE = "⚠️ API do Albion indisponível"
+DB_BUSY = "⚠️ Banco de dados sobrecarregado"
+
+
+def arrival_times(distribution, users, duration, burst_share, rng):
+    """Instantes de chegada (segundos desde o início), em ordem."""
+    if distribution == "uniform":
+        return [i * duration / users for i in range(users)]
+    if distribution == "burst":
+        head = int(users * burst_share)
+        times = [rng.uniform(0, duration / 10) for _ in range(head)]
+        times += [rng.uniform(duration / 10, duration) for _ in range(users - head)]
+        return sorted(times)
+    if distribution == "ramp":
+        # Densidade proporcional a t: inversa da CDF t²/d²
+        return sorted(duration * math.sqrt(rng.random()) for _ in range(users))
+    # Dado o total de chegadas, um processo de Poisson tem instantes uniformes
+    return sorted(rng.uniform(0, duration) for _ in range(users))
+
+
+def classify(interaction):
+    """Resultado de uma interação pela resposta enviada ao usuário."""
+    if interaction.succeeded:
+        return "ok"
+    if any(isinstance(r, str) and r.startswith(API_UNAVAILABLE) for r in interaction.replies):
+        return "api_unavailable"
+    if any(isinstance(r, str) and r.startswith(DB_BUSY) for r in interaction.replies):
+        return "db_busy"
+    if not interaction.replies:
+        return "no_reply"
+    return "rejected"
+
+
+class Sampler:
+    """Lê o estado dos recursos compartilhados a cada `interval` segundos."""
+
+    def __init__(self, env, interval):
+        self.env = env
+        self.interval = interval
+        self.samples = defaultdict(list)
+        self.inflight = 0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self):
+        bot = self.env.bot
+        pool = bot.db.pool
+        while True:
+            self.samples["pool_in_use"].append(pool.get_size() - pool.get_idle_size())
+            self.samples["limiter_queued"].append(bot.albion.limiter.stats()["queued"])
+            self.samples["albion_inflight"].append(self.env.albion_server.inflight)
+            self.samples["member_queue"].append(bot.member_mutations.stats()["queued"])
+            self.samples["interactions_inflight"].append(self.inflight)
+            await asyncio.sleep(self.interval)
+
+    def summary(self, name):
+        values = self.samples.get(name) or [0]
+        return {"avg": round(sum(values) / len(values), 2), "max": max(values)}
+
+
+async def storm(env, args):
+    rng = random.Random(args.seed)
+    times = arrival_times(args.distribution, args.users, args.duration, args.burst_share, rng)
+    sampler = Sampler(env, args.sample_interval)
+    outcomes = defaultdict(Counter)
+    latencies = defaultdict(list)
+
+    async def one(kind, guild):
+        interaction = env.interaction(guild=guild)
+        sampler.inflight += 1
+        started = time.perf_counter()
+        try:
+            if kind == "alianca":
+                await env.alianca.aplicar_alianca.callback(env.alianca, interaction, f"Storm{next(_names)}")
+            else:
+                await env.recrutamento.registrar.callback(env.recrutamento, interaction, f"Storm{next(_names)}")
+            outcome = classify(interaction)
+        except Exception:
+            outcome = "error"
+        finally:
+            sampler.inflight -= 1
+        latencies[kind].append(time.perf_counter() - started)
+        outcomes[kind][outcome] += 1
+
+    registry.reset()
+    sampler.start()
+    tasks = []
+    started = time.perf_counter()
+    for at in times:
+        delay = at - (time.perf_counter() - started)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        kind = "alianca" if rng.random() < args.alliance_share else "registro"
+        tasks.append(asyncio.create_task(one(kind, rng.choice(env.guilds))))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    await sampler.stop()
+    return elapsed, outcomes, latencies, sampler
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1) if math.isfinite(seconds) else None
+
+
+def _histogram(histogram):
+    return {
+        " ".join(key) or "total": {
+            "count": s["count"], "avg_ms": _ms(s["avg"]), "p50_ms": _ms(s["p50"]), "p99_ms": _ms(s["p99"])
+        }
+        for key, s in histogram.summary().items()
+    }
+
+
+def build_report(env, args, elapsed, outcomes, latencies, sampler):
+    bot = env.bot
+    commands = {}
+    for kind, counts in sorted(outcomes.items()):
+        total = sum(counts.values())
+        samples = latencies[kind]
+        commands[kind] = {
+            "arrivals": total,
+            "outcomes": dict(counts),
+            "failure_rate": round(1 - counts["ok"] / total, 4) if total else 0.0,
+            "p50_ms": _ms(percentile(samples, 50)),
+            "p95_ms": _ms(percentile(samples, 95)),
+            "p99_ms": _ms(percentile(samples, 99)),
+            "max_ms": _ms(max(samples)),
+            "over_budget": sum(1 for s in samples if s > Config.INTERACTION_BUDGET),
+        }
+
+    pool_max = bot.db.pool.get_max_size()
+    in_use = sampler.samples["pool_in_use"] or [0]
+    channel_waits = [w for guild in env.guilds for w in guild.approval_channel.rate_waits]
+    cards = [len(guild.approval_channel.sent) for guild in env.guilds]
+    limiter = bot.albion.limiter.stats()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "distribution": args.distribution,
+            "users": args.users,
+            "duration": args.duration,
+            "guilds": args.guilds,
+            "alliance_share": args.alliance_share,
+            "albion_latency": args.albion_latency,
+            "albion_error_rate": args.albion_errors,
+            "discord_latency": args.discord_latency,
+            "channel_rate": args.channel_rate,
+            "albion_rate": Config.ALBION_RATE_LIMIT,
+            "albion_burst": Config.ALBION_RATE_BURST,
+            "albion_http_limit_per_host": Config.ALBION_HTTP_LIMIT_PER_HOST,
+            "interaction_budget": Config.INTERACTION_BUDGET,
+            "member_edit_delay": Config.MEMBER_EDIT_DELAY,
+            "approval_digest": Config.APPROVAL_DIGEST,
+            "elapsed": round(elapsed, 3),
+        },
+        "commands": commands,
+        "db_pool": {
+            "max_size": pool_max,
+            "in_use": sampler.summary("pool_in_use"),
+            "utilization_avg": round(sum(in_use) / len(in_use) / pool_max, 3),
+            "saturated_fraction": round(sum(1 for n in in_use if n >= pool_max) / len(in_use), 3),
+            "acquire_wait": _histogram(DB_POOL_WAIT_SECONDS).get("total", {}),
+            "timeouts": bot.db.stats()["timeouts"],
+            "queries": _histogram(DB_QUERY_SECONDS),
+        },
+        "albion": {
+            "breaker": bot.albion.breaker.state,
+            "limiter_queued": sampler.summary("limiter_queued"),
+            "limiter_wait_ms": {
+                priority: {k: _ms(v) if k != "count" else v for k, v in s.items()}
+                for priority, s in limiter["wait"].items()
+            },
+            "http_inflight": sampler.summary("albion_inflight"),
+            "server_max_inflight": env.albion_server.max_inflight,
+            "server_requests": env.albion_server.requests,
+            "responses": {" ".join(key): n for key, n in ALBION_RESPONSES.items().items()},
+            "requests": _histogram(ALBION_REQUEST_SECONDS),
+        },
+        "approval_channel": {
+            "cards": sum(cards),
+            "cards_per_guild_max": max(cards),
+            "rate_wait_p50_ms": _ms(percentile(channel_waits, 50)),
+            "rate_wait_p99_ms": _ms(percentile(channel_waits, 99)),
+            "rate_wait_max_ms": _ms(max(channel_waits, default=0.0)),
+            "digest": bot.approval_digest.stats(),
+        },
+        "member_mutations": {**bot.member_mutations.stats(), "depth": sampler.summary("member_queue")},
+        "interactions_inflight": sampler.summary("interactions_inflight"),
+    }
+
+
+def print_report(report):
+    print(f"{'comando':<10} {'chegadas':>8} {'ok':>6} {'falha %':>8} {'p50 ms':>9} {'p99 ms':>9} {'>budget':>8}")
+    for kind, r in report["commands"].items():
+        print(f"{kind:<10} {r['arrivals']:>8} {r['outcomes'].get('ok', 0):>6} {r['failure_rate'] * 100:>8.1f} "
+              f"{r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['over_budget']:>8}")
+        print(f"{'':<10} resultados: {r['outcomes']}")
+
+    db = report["db_pool"]
+    wait = db["acquire_wait"]
+    print(f"\nPool do banco: max={db['max_size']} em uso médio={db['in_use']['avg']} pico={db['in_use']['max']} "
+          f"saturado {db['saturated_fraction'] * 100:.1f}% do tempo")
+    print(f"  timeouts de aquisição (DB_ACQUIRE_TIMEOUT={Config.DB_ACQUIRE_TIMEOUT:g}s): {db['timeouts']}")
+    if wait:
+        print(f"  espera por conexão: n={wait['count']} média={wait['avg_ms']} ms p99≤{wait['p99_ms']} ms")
+
+    albion = report["albion"]
+    print(f"\nAlbionAPI: disjuntor={albion['breaker']} fila do limitador média={albion['limiter_queued']['avg']} "
+          f"pico={albion['limiter_queued']['max']} HTTP simultâneas pico={albion['server_max_inflight']}")
+    for priority, s in albion["limiter_wait_ms"].items():
+        print(f"  espera no limitador ({priority}): n={s['count']} p50={s.get('p50')} ms p99={s.get('p99')} ms")
+    print(f"  respostas: {albion['responses']}")
+
+    channel = report["approval_channel"]
+    print(f"\nCanal de aprovação: {channel['cards']} cards (máx. {channel['cards_per_guild_max']} num servidor), "
+          f"espera do limite p50={channel['rate_wait_p50_ms']} ms p99={channel['rate_wait_p99_ms']} ms")
+    if report["meta"]["approval_digest"]:
+        digest = channel["digest"]
+        print(f"  resumos: {digest['batches']} com {digest['sent']} pedidos, {digest['buffered']} ainda no buffer")
+    mutations = report["member_mutations"]
+    print(f"Fila de membros: pico={mutations['depth']['max']} aplicadas={mutations['applied']} "
+          f"falhas={mutations['failed']}")
+
+
+def parse_rate(value):
+    """'5/5' -> (5, 5.0): n mensagens a cada s segundos."""
+    count, _, per = value.partition("/")
+    return int(count), float(per or 1)
+
+
+async def main(args):
+    if args.approval_digest:
+        Config.APPROVAL_DIGEST = True
+        Config.APPROVAL_DIGEST_WINDOW = args.digest_window
+    async with BenchEnvironment(
+        albion_latency=args.albion_latency, albion_error_rate=args.albion_errors,
+        discord_latency=args.discord_latency, albion_rate=args.albion_rate,
+        member_edit_delay=args.member_edit_delay, guilds=args.guilds,
+        channel_rate=parse_rate(args.channel_rate) if args.channel_rate else None
+    ) as env:
+        print(f"{args.users} chegadas ({args.distribution}) em {args.duration:g}s por {args.guilds} servidores; "
+              f"AlbionAPI {Config.ALBION_RATE_LIMIT:g} req/s (rajada {Config.ALBION_RATE_BURST})\n")
+        elapsed, outcomes, latencies, sampler = await storm(env, args)
+        report = build_report(env, args, elapsed, outcomes, latencies, sampler)
+
+    print_report(report)
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"storm-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados gravados em {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Teste de carga de registros concorrentes.")
+    parser.add_argument("--users", type=int, default=300, help="total de comandos na janela")
+    parser.add_argument("--duration", type=float, default=60.0, help="janela de chegadas (s)")
+    parser.add_argument("--distribution", choices=["poisson", "uniform", "burst", "ramp"], default="poisson")
+    parser.add_argument("--burst-share", type=float, default=0.8, help="fração das chegadas no pico (burst)")
+    parser.add_argument("--guilds", type=int, default=10, help="servidores simulados")
+    parser.add_argument("--alliance-share", type=float, default=0.3, help="fração de /aplicar_alianca")
+    parser.add_argument("--albion-latency", type=float, default=0.15, help="latência do gameinfo falso (s)")
+    parser.add_argument("--albion-errors", type=float, default=0.0, help="fração de respostas 503")
+    parser.add_argument("--discord-latency", type=float, default=0.1, help="latência das chamadas ao Discord (s)")
+    parser.add_argument("--albion-rate", type=float,
+                        help="limite de req/s do AlbionAPI (padrão: ALBION_RATE_LIMIT/BURST de produção)")
+    parser.add_argument("--channel-rate", default="5/5",
+                        help="limite de mensagens por canal, n/segundos ('' desativa)")
+    parser.add_argument("--member-edit-delay", type=float,
+                        help="pausa entre edições de membros por servidor (padrão: MEMBER_EDIT_DELAY)")
+    parser.add_argument("--approval-digest", action="store_true", help="pedidos em resumos (APPROVAL_DIGEST)")
+    parser.add_argument("--digest-window", type=float, default=Config.APPROVAL_DIGEST_WINDOW,
+                        help="janela do resumo de pedidos (s)")
+    parser.add_argument("--sample-interval", type=float, default=0.1, help="intervalo do amostrador (s)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="arquivo JSON de saída")
+    asyncio.run(main(parser.parse_args()))
@@ -4,85 +4,225 @@ import logging
 import asyncio
 from config import Config
 from database import DatabaseManager
+from migrations import MigrationRunner
 from albion_api import AlbionAPI
+from utils.config_cache import ConfigCache
+from utils.player_index import PlayerIndex
+from utils.guild_metadata import GuildMetadataCache
+from utils.snapshots import SnapshotStore
+from utils.log_writer import RecruitmentLogWriter
+from utils.command_sync import CommandSyncManager
+from utils.member_mutations import MemberMutationQueue
+from utils.member_cache import MemberCache, client_options
+from utils.support_queue import SupportQueue
+from utils.approval_digest import ApprovalDigest
+from utils.leader import LeaderElection
+from utils.startup import StartupPipeline
+from utils.metrics import registry, MetricsServer, monitor_loop_lag, DB_POOL_CONNECTIONS, QUEUE_DEPTH, MEMBER_CACHE_SIZE
 
 # Configurar logger principal
 logger = logging.getLogger("Bot")
 
-class OVigiaBot(commands.Bot):
+class OVigiaBot(commands.AutoShardedBot):
+    initial_extensions = [
+        'cogs.admin_cog',
+        'cogs.recrutamento_cog',
+        'cogs.alianca_cog',
+        'cogs.suporte_cog',
+        'cogs.sync_cog'
+    ]
+
     def __init__(self):
         intents = discord.Intents.default()
         intents.message_content = True
+        # Continua ligado em todos os modos: mantém atualizados os membros em cache
         intents.members = True
         
+        # Sem SHARD_IDS/SHARD_COUNT, o discord.py conecta todos os shards recomendados aqui
         super().__init__(
             command_prefix="!",
             intents=intents,
-            help_command=None
+            help_command=None,
+            shard_count=Config.SHARD_COUNT,
+            shard_ids=Config.SHARD_IDS,
+            **client_options(Config.MEMBER_CACHE_MODE)
         )
         
         self.db = DatabaseManager()
         self.albion = AlbionAPI()
+        self.config_cache = ConfigCache(self.db)
+        self.player_index = PlayerIndex(self.db)
+        self.albion.player_index = self.player_index
+        self.albion.add_observer(self.player_index.observe)
+        self.snapshots = SnapshotStore(self.db)
+        self.albion.add_observer(self.snapshots.observe)
+        self.log_writer = RecruitmentLogWriter(self.db)
+        self.command_sync = CommandSyncManager(self)
+        self.member_mutations = MemberMutationQueue(self)
+        self.member_cache = MemberCache(self)
+        self.support_queue = SupportQueue(self.db)
+        self.approval_digest = ApprovalDigest()
+        self.leader = LeaderElection(self.db)
+        self.guild_metadata = GuildMetadataCache(self.db, self.albion, self.leader)
+        self.albion.add_observer(self.guild_metadata.observe)
+        self.metrics_server = MetricsServer(Config.METRICS_HOST, Config.METRICS_PORT) if Config.METRICS_ENABLED else None
+        self._loop_lag_task = None
+        self._background = set()  # tarefas de inicialização em andamento
+        registry.add_collector(self._collect_metrics)
 
     async def setup_hook(self):
-        """Inicialização de recursos assíncronos."""
+        """Inicialização de recursos assíncronos.
+
+        Etapas independentes (pool do banco, sessão HTTP, cogs) rodam em paralelo;
+        o esquema só é migrado quando a versão mudou. Se o banco não responder a
+        tempo, o bot sobe degradado e tenta reconectar em segundo plano.
+        """
         logger.info("--- Iniciando Setup do Bot ---")
-        
-        # 1. Conectar ao Banco de Dados
-        await self.db.connect()
-        
-        # 2. Iniciar API
-        await self.albion.start()
-        
-        # 3. Carregar Cogs
-        cogs = [
-            'cogs.admin_cog',
-            'cogs.recrutamento_cog',
-            'cogs.alianca_cog'
+        startup = StartupPipeline()
+
+        # 1. Banco, API, cogs e métricas em paralelo
+        steps = [
+            ("db", self.db.connect(), Config.STARTUP_DB_TIMEOUT),
+            ("http", self.albion.start()),
+            ("cogs", self._load_extensions()),
         ]
-        
-        for cog in cogs:
+        if self.metrics_server:
+            steps.append(("metrics", self.metrics_server.start()))
+        await startup.run(*steps)
+        self._loop_lag_task = asyncio.create_task(monitor_loop_lag())
+
+        # 2. Migrações (dependem do banco) e tarefas de fundo
+        if startup.ok("db"):
+            await startup.run(("schema", self._ensure_schema()))
+            self._spawn(self._warm_up(), "aquecimento")
+        else:
+            self._spawn(self._reconnect_database(), "reconexão do banco")
+
+        startup.log_summary()
+        logger.info("--- Setup Concluído ---")
+
+    def _spawn(self, coro, name):
+        """Roda `coro` em segundo plano guardando a referência e registrando a falha, se houver."""
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+
+        def done(task):
+            self._background.discard(task)
+            if not task.cancelled() and task.exception():
+                logger.error(f"Tarefa de fundo '{name}' falhou: {task.exception()!r}")
+
+        task.add_done_callback(done)
+        return task
+
+    async def _load_extensions(self):
+        async def load(cog):
             try:
                 await self.load_extension(cog)
                 logger.info(f"Cog carregado: {cog}")
             except Exception as e:
                 logger.error(f"Falha ao carregar cog {cog}: {e}")
-                
-        # 4. Criar tabelas se necessário (via AdminCog)
-        admin_cog = self.get_cog('AdminCog')
-        if admin_cog:
-            await admin_cog.create_tables()
-            
-        logger.info("--- Setup Concluído ---")
 
-    async def on_ready(self):
-        logger.info(f"Bot Online: {self.user} (ID: {self.user.id})")
-        logger.info(f"Conectado a {len(self.guilds)} servidores.")
-        
-        # FORÇAR SINCRONIZAÇÃO DE COMANDOS
-        logger.info("Iniciando sincronização automática de comandos...")
+        await asyncio.gather(*(load(cog) for cog in self.initial_extensions))
+
+    async def _ensure_schema(self):
+        await MigrationRunner(self.db).upgrade()
+
+    async def _warm_up(self):
+        """Carrega caches e inicia gravações em lote sem bloquear o setup.
+
+        Cada etapa é independente: uma falha é registrada e não impede as seguintes
+        (sem a eleição de líder, por exemplo, o processo nunca faria a verificação).
+        """
+        steps = []
+        if Config.CONFIG_CACHE_LISTEN:
+            steps.append(("LISTEN da configuração", self.config_cache.start_listener))
+        steps += [
+            ("índice de jogadores", self.player_index.start),
+            ("snapshots", self.snapshots.start),
+            ("log de recrutamento", self.log_writer.start),
+            ("fila de suporte", lambda: self.support_queue.start(self.owns_guild)),
+        ]
+        if Config.APPROVAL_DIGEST:
+            steps.append(("resumo de pedidos", lambda: self.approval_digest.start(self.db, self.owns_guild)))
+        steps += [
+            ("eleição de líder", self.leader.start),
+            ("metadados de guildas", self.guild_metadata.start),
+        ]
+        for name, start in steps:
+            try:
+                await start()
+            except Exception as e:
+                logger.error(f"Falha ao iniciar {name}: {e!r}")
+
+    def owns_guild(self, guild_id):
+        """True se o servidor pertence a um dos shards deste processo."""
+        if not self.shard_ids:
+            return True
+        return (guild_id >> 22) % self.shard_count in self.shard_ids
+
+    def _collect_metrics(self):
+        """Atualiza os gauges de estado antes de cada coleta de métricas."""
+        if self.db.pool:
+            DB_POOL_CONNECTIONS.set(self.db.pool.get_size(), state="open")
+            DB_POOL_CONNECTIONS.set(self.db.pool.get_idle_size(), state="idle")
+            DB_POOL_CONNECTIONS.set(self.db.pool.get_max_size(), state="max")
+        DB_POOL_CONNECTIONS.set(self.db.stats()['waiting'], state="waiting")
+        QUEUE_DEPTH.set(self.member_mutations.stats()['queued'], queue="member_mutations")
+        QUEUE_DEPTH.set(self.log_writer.stats()['queued'], queue="recruitment_log")
+        QUEUE_DEPTH.set(self.albion.limiter.stats()['queued'], queue="albion_limiter")
+        QUEUE_DEPTH.set(self.support_queue.stats()['open'], queue="support")
+        QUEUE_DEPTH.set(self.approval_digest.stats()['buffered'], queue="approval_digest")
+        MEMBER_CACHE_SIZE.set(self.member_cache.cached())
+
+    async def _reconnect_database(self):
+        delay = 2
+        while not self.db.pool:
+            await asyncio.sleep(delay)
+            try:
+                await self.db.connect()
+            except Exception:
+                delay = min(delay * 2, 60)
+        logger.info("Banco de dados disponível; concluindo inicialização.")
         try:
-            # Sincronizar globalmente (pode demorar)
-            # await self.tree.sync() 
-            
-            # Sincronizar para cada guilda (imediato)
-            for guild in self.guilds:
-                logger.info(f"Sincronizando para guilda: {guild.name} ({guild.id})")
-                try:
-                    self.tree.copy_global_to(guild=guild)
-                    synced = await self.tree.sync(guild=guild)
-                    logger.info(f"✅ Sincronizado {len(synced)} comandos para {guild.name}")
-                except Exception as e:
-                    logger.error(f"❌ Falha ao sincronizar para {guild.name}: {e}")
-                    
-            logger.info("Sincronização automática concluída!")
-            
+            await self._ensure_schema()
         except Exception as e:
-            logger.error(f"Erro fatal na sincronização: {e}")
+            logger.error(f"Falha ao migrar o esquema após reconectar: {e!r}")
+        await self._warm_up()
+
+    async def on_ready(self):
+        logger.info(f"Bot Online: {self.user} (ID: {self.user.id})")
+        logger.info(
+            f"Conectado a {len(self.guilds)} servidores "
+            f"(shards {self.shard_ids or list(self.shards)} de {self.shard_count})."
+        )
+
+        # Sincroniza comandos só nos servidores cuja árvore mudou (uma vez por processo).
+        # Cada processo só enxerga os servidores dos próprios shards, então não há duplicação
+        self._spawn(self.command_sync.run_once(), "sincronização de comandos")
+
+    async def on_guild_available(self, guild):
+        self.member_cache.schedule_warm(guild)
+
+    async def on_guild_join(self, guild):
+        logger.info(f"Entrou no servidor {guild.name} ({guild.id}), sincronizando comandos.")
+        await self.command_sync.sync_guild(guild)
 
     async def close(self):
         """Limpeza ao desligar."""
         logger.info("Desligando bot...")
+        for task in list(self._background):
+            task.cancel()
+        await self.player_index.close()
+        await self.snapshots.close()
+        await self.log_writer.close()
+        await self.approval_digest.close()
+        await self.member_mutations.close()
+        await self.leader.close()
+        await self.guild_metadata.close()
+        if self._loop_lag_task:
+            self._loop_lag_task.cancel()
+        if self.metrics_server:
+            await self.metrics_server.close()
         await self.db.close()
         await self.albion.close()
         await super().close()
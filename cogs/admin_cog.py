@@ -1,7 +1,12 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+import io
 import logging
+from config import Config
+from albion_api import AlbionAPIUnavailable
+from utils.metrics import registry, timed_command, COMMAND_SECONDS, DB_QUERY_SECONDS, LOOP_LAG_MAX
+from utils.tracing import profile_for
 
 logger = logging.getLogger("AdminCog")
 
@@ -9,85 +14,6 @@ class AdminCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
-    async def create_tables(self):
-        """Cria as tabelas necessárias no banco de dados."""
-        # DROP TABLE para garantir que a tabela seja recriada com o esquema correto
-        # Isso é necessário pois o log indicou que a coluna guild_id não existia, o que é impossível se a tabela foi criada com o script atual.
-        # Provavelmente a tabela existia de uma versão muito antiga ou foi criada manualmente errada.
-        
-        logger.warning("Recriando tabela server_config para corrigir esquema...")
-        try:
-            # Tenta criar se não existir primeiro
-            await self.bot.db.execute_query("""
-                CREATE TABLE IF NOT EXISTS server_config (
-                    guild_id BIGINT PRIMARY KEY,
-                    recruitment_channel_id BIGINT,
-                    approval_channel_id BIGINT,
-                    member_role_id BIGINT,
-                    recruit_role_id BIGINT,
-                    ally_role_id BIGINT,
-                    alliance_tag TEXT,
-                    guild_tag TEXT,
-                    min_fame_pve BIGINT DEFAULT 0,
-                    min_fame_pvp BIGINT DEFAULT 0,
-                    server_type TEXT DEFAULT 'GUILD',
-                    created_at TIMESTAMPTZ DEFAULT NOW()
-                );
-            """)
-            
-            # Verifica se a coluna existe, se não, faz o drop e recria (Brute Force Fix)
-            # Nota: Em produção real, faríamos ALTER TABLE, mas aqui precisamos garantir que funcione rápido.
-            # Como o usuário disse que "não conseguimos ir para lugar algum", assumo que não há dados críticos a perder na config.
-            
-            # Mas para ser seguro, vamos tentar adicionar a coluna se ela faltar, em vez de dropar tudo.
-            # O erro diz: column "guild_id" ... does not exist. Isso é bizarro pois é a Primary Key.
-            # Isso sugere que a tabela pode ter sido criada com aspas ou case sensitive errado em algum momento.
-            
-        except Exception as e:
-            logger.error(f"Erro na verificação inicial: {e}")
-
-        queries = [
-            """
-            CREATE TABLE IF NOT EXISTS server_config (
-                guild_id BIGINT PRIMARY KEY,
-                recruitment_channel_id BIGINT,
-                approval_channel_id BIGINT,
-                member_role_id BIGINT,
-                recruit_role_id BIGINT,
-                ally_role_id BIGINT,
-                alliance_tag TEXT,
-                guild_tag TEXT,
-                min_fame_pve BIGINT DEFAULT 0,
-                min_fame_pvp BIGINT DEFAULT 0,
-                server_type TEXT DEFAULT 'GUILD',
-                created_at TIMESTAMPTZ DEFAULT NOW()
-            );
-            """,
-            """
-            CREATE TABLE IF NOT EXISTS recruitment_log (
-                id SERIAL PRIMARY KEY,
-                user_id BIGINT,
-                guild_id BIGINT,
-                albion_nick TEXT,
-                status TEXT,
-                reviewed_by BIGINT,
-                created_at TIMESTAMPTZ DEFAULT NOW()
-            );
-            """
-        ]
-        
-        logger.info("Verificando tabelas do banco de dados...")
-        for query in queries:
-            try:
-                await self.bot.db.execute_query(query)
-            except Exception as e:
-                logger.error(f"Erro ao criar tabela: {e}")
-
-        # Migrações de segurança
-        try:
-            await self.bot.db.execute_query("ALTER TABLE server_config ADD COLUMN IF NOT EXISTS server_type TEXT DEFAULT 'GUILD';")
-        except Exception: pass
-
     @app_commands.command(name="auto_setup", description="🚀 Configuração Automática (Cria canais e cargos)")
     @app_commands.describe(
         mode="Modo de operação do bot",
@@ -100,6 +26,7 @@ class AdminCog(commands.Cog):
         app_commands.Choice(name="Híbrido (Ambos)", value="HYBRID")
     ])
     @app_commands.default_permissions(administrator=True)
+    @timed_command("auto_setup")
     async def auto_setup(self, interaction: discord.Interaction, mode: app_commands.Choice[str], guild_tag: str = None, alliance_tag: str = None):
         await interaction.response.defer()
         guild = interaction.guild
@@ -147,29 +74,15 @@ class AdminCog(commands.Cog):
             ally_role_id = $6,
             guild_tag = COALESCE($7, server_config.guild_tag),
             alliance_tag = COALESCE($8, server_config.alliance_tag),
-            server_type = $9;
+            server_type = $9
+        RETURNING *;
         """
         
-        try:
-            await self.bot.db.execute_query(query, 
-                guild.id, rec_channel.id, app_channel.id, 
-                member_role.id, recruit_role.id, ally_role.id, 
-                guild_tag, alliance_tag, mode.value
-            )
-        except Exception as e:
-            # Se der erro de coluna, tenta dropar e recriar a tabela (último recurso)
-            if "column" in str(e) and "does not exist" in str(e):
-                logger.warning("Detectado esquema de banco corrompido. Recriando tabela...")
-                await self.bot.db.execute_query("DROP TABLE IF EXISTS server_config;")
-                await self.create_tables()
-                # Tenta inserir de novo
-                await self.bot.db.execute_query(query, 
-                    guild.id, rec_channel.id, app_channel.id, 
-                    member_role.id, recruit_role.id, ally_role.id, 
-                    guild_tag, alliance_tag, mode.value
-                )
-            else:
-                raise e
+        await self.bot.config_cache.save(query, 
+            guild.id, rec_channel.id, app_channel.id, 
+            member_role.id, recruit_role.id, ally_role.id, 
+            guild_tag, alliance_tag, mode.value
+        )
         
         msg = f"""
 ✅ **Configuração Automática Concluída!**
@@ -195,7 +108,8 @@ O bot está pronto para uso!
         recruit_role="Cargo de Recruta (Modo Guilda)",
         ally_role="Cargo de Aliado (Modo Aliança)",
         guild_tag="Tag da Guilda",
-        alliance_tag="Tag da Aliança"
+        alliance_tag="Tag da Aliança",
+        albion_guild_id="ID da guilda no Albion (a verificação periódica compara os membros com ela)"
     )
     @app_commands.choices(mode=[
         app_commands.Choice(name="Guilda (Recrutamento)", value="GUILD"),
@@ -211,9 +125,21 @@ O bot está pronto para uso!
                           recruit_role: discord.Role = None,
                           ally_role: discord.Role = None,
                           guild_tag: str = None,
-                          alliance_tag: str = None):
+                          alliance_tag: str = None,
+                          albion_guild_id: str = None):
         
         await interaction.response.defer(ephemeral=True)
+
+        albion_guild = None
+        if albion_guild_id:
+            try:
+                albion_guild = await self.bot.albion.get_guild_info(albion_guild_id.strip())
+            except AlbionAPIUnavailable:
+                await interaction.followup.send("⚠️ API do Albion indisponível no momento. Tente novamente em instantes.")
+                return
+            if not albion_guild:
+                await interaction.followup.send(f"❌ Guilda `{albion_guild_id}` não encontrada no Albion.")
+                return
         
         rec_id = recruitment_channel.id if recruitment_channel else None
         app_id = approval_channel.id if approval_channel else None
@@ -225,8 +151,8 @@ O bot está pronto para uso!
         INSERT INTO server_config (
             guild_id, recruitment_channel_id, approval_channel_id, 
             member_role_id, recruit_role_id, ally_role_id, 
-            guild_tag, alliance_tag, server_type
-        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+            guild_tag, alliance_tag, server_type, albion_guild_id
+        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
         ON CONFLICT (guild_id) DO UPDATE SET
             recruitment_channel_id = COALESCE($2, server_config.recruitment_channel_id),
             approval_channel_id = COALESCE($3, server_config.approval_channel_id),
@@ -235,27 +161,149 @@ O bot está pronto para uso!
             ally_role_id = COALESCE($6, server_config.ally_role_id),
             guild_tag = COALESCE($7, server_config.guild_tag),
             alliance_tag = COALESCE($8, server_config.alliance_tag),
-            server_type = $9;
+            server_type = $9,
+            albion_guild_id = COALESCE($10, server_config.albion_guild_id)
+        RETURNING *;
         """
         
         try:
-            await self.bot.db.execute_query(query, 
+            await self.bot.config_cache.save(query, 
                 interaction.guild_id, rec_id, app_id, mem_id, rec_role_id, ally_id, 
-                guild_tag, alliance_tag, mode.value
+                guild_tag, alliance_tag, mode.value, albion_guild['Id'] if albion_guild else None
             )
             
             msg = f"✅ **Configuração Manual Salva!**\nModo: `{mode.name}`"
+            if albion_guild:
+                msg += f"\nGuilda do Albion: `{albion_guild['Name']}`"
             await interaction.followup.send(msg)
             
         except Exception as e:
             logger.error(f"Erro ao salvar config: {e}")
-            # Tenta correção automática
-            if "column" in str(e) and "does not exist" in str(e):
-                 await interaction.followup.send("⚠️ Erro de banco de dados detectado. Tentando corrigir... Tente novamente em 5 segundos.")
-                 await self.bot.db.execute_query("DROP TABLE IF EXISTS server_config;")
-                 await self.create_tables()
-            else:
-                await interaction.followup.send("❌ Erro ao salvar configuração no banco de dados.")
+            await interaction.followup.send("❌ Erro ao salvar configuração no banco de dados.")
+
+    @app_commands.command(name="status_bot", description="📊 Estatísticas internas (caches)")
+    @app_commands.default_permissions(administrator=True)
+    async def status_bot(self, interaction: discord.Interaction):
+        cfg = self.bot.config_cache.stats()
+        api = self.bot.albion.cache_stats()
+        rosters = self.bot.albion.rosters.stats()
+
+        embed = discord.Embed(title="📊 Status do Bot", color=discord.Color.blurple())
+        embed.add_field(
+            name="Cache de Configuração",
+            value=(f"Entradas: {cfg['entries']}\nHits: {cfg['hits']} | Misses: {cfg['misses']}\n"
+                   f"Taxa de acerto: {cfg['hit_ratio']:.1%}\nLISTEN: {'sim' if cfg['listening'] else 'não'}"),
+            inline=False
+        )
+        embed.add_field(
+            name="Cache da API Albion",
+            value=(f"Entradas: {api['entries']}/{api['maxsize']}\nHits: {api['hits']} | Misses: {api['misses']}\n"
+                   f"Evicções: {api['evictions']} | Coalescidas: {api['coalesced']}\n"
+                   f"Taxa de acerto: {api['hit_ratio']:.1%}\n"
+                   f"Rosters: {rosters['fresh']}/{rosters['guilds']} guildas, {rosters['players']} jogadores"),
+            inline=False
+        )
+        lat = self.bot.albion.latency_stats()
+        lines = [
+            f"`{name}`: p50 {v.get('p50', 0) * 1000:.0f}ms | p99 {v.get('p99', 0) * 1000:.0f}ms ({v['count']} amostras)"
+            for name, v in lat['endpoints'].items()
+        ]
+        embed.add_field(
+            name="Latência da API Albion",
+            value="\n".join(lines or ["Sem amostras"]) + f"\nDisjuntor: `{lat['breaker']}`"
+                  + f"\nLimitador: {lat['limiter']['rate']:g} req/s, {lat['limiter']['queued']} na fila",
+            inline=False
+        )
+        embed.add_field(
+            name="Processo",
+            value=(f"Shards: {self.bot.shard_ids or list(self.bot.shards)} de {self.bot.shard_count} | "
+                   f"Líder: {'sim' if self.bot.leader.is_leader else 'não'}"),
+            inline=False
+        )
+        pool = self.bot.db.stats()
+        embed.add_field(
+            name="Pool do Banco",
+            value=(f"Em uso: {pool['in_use']}/{pool['max']} ({pool['utilization']:.0%}) | "
+                   f"Pico: {pool['peak_in_use']} | Aguardando: {pool['waiting']}\n"
+                   f"Espera p50 {pool['wait'].get('p50', 0) * 1000:.0f}ms | "
+                   f"p99 {pool['wait'].get('p99', 0) * 1000:.0f}ms | Timeouts: {pool['timeouts']}\n"
+                   f"Health check: {pool['health_failures']} falhas, {pool['recycled']} reciclagens"),
+            inline=False
+        )
+        members = self.bot.member_cache.stats()
+        embed.add_field(
+            name="Cache de Membros",
+            value=(f"Modo: `{members['mode']}` | Em cache: {members['cached']} | "
+                   f"Servidores carregados: {members['warmed']}\n"
+                   f"Acertos: {members['hits']} | Gateway: {members['queried']} | REST: {members['fetched']}"),
+            inline=False
+        )
+        guilds = self.bot.guild_metadata.stats()
+        embed.add_field(
+            name="Metadados de Guildas",
+            value=(f"Guildas: {guilds['guilds']} | A atualizar: {guilds['stale']}\n"
+                   f"Acertos: {guilds['hits']} | Buscas: {guilds['fetched']} | "
+                   f"Atualizadas em segundo plano: {guilds['refreshed']}"),
+            inline=False
+        )
+        edits = self.bot.member_mutations.stats()
+        embed.add_field(
+            name="Fila de Alterações de Membros",
+            value=(f"Na fila: {edits['queued']} ({edits['guilds']} servidores)\n"
+                   f"Aplicadas: {edits['applied']} | Mescladas: {edits['merged']} | "
+                   f"Sem mudança: {edits['skipped']} | Falhas: {edits['failed']}\n"
+                   f"Espera p50 {edits['drain'].get('p50', 0) * 1000:.0f}ms | "
+                   f"p99 {edits['drain'].get('p99', 0) * 1000:.0f}ms"),
+            inline=False
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="metricas", description="⏱️ Latência de comandos, banco e event loop")
+    @app_commands.default_permissions(administrator=True)
+    async def metricas(self, interaction: discord.Interaction):
+        # Gera o texto completo primeiro: os coletores atualizam os gauges
+        text = registry.render()
+
+        def fmt(entry):
+            return f"média {entry['avg'] * 1000:.0f}ms | p99 ≤{entry['p99'] * 1000:.0f}ms ({entry['count']}x)"
+
+        commands_ = COMMAND_SECONDS.summary()
+        queries = sorted(DB_QUERY_SECONDS.summary().items(), key=lambda kv: kv[1]['avg'], reverse=True)[:5]
+
+        embed = discord.Embed(title="⏱️ Métricas", color=discord.Color.blurple())
+        embed.add_field(
+            name="Comandos",
+            value="\n".join(f"`{cmd}` ({outcome}): {fmt(v)}" for (cmd, outcome), v in commands_.items())[:1024] or "Sem amostras",
+            inline=False
+        )
+        embed.add_field(
+            name="Queries mais lentas (média)",
+            value="\n".join(f"`{stmt}`: {fmt(v)}" for (stmt,), v in queries) or "Sem amostras",
+            inline=False
+        )
+        embed.add_field(name="Event loop", value=f"Maior atraso recente: {LOOP_LAG_MAX.get() * 1000:.1f}ms", inline=False)
+        await interaction.response.send_message(
+            embed=embed, file=discord.File(io.BytesIO(text.encode()), filename="metrics.txt"), ephemeral=True
+        )
+
+    @app_commands.command(name="perfil", description="🔬 Perfila o bot por alguns segundos (cProfile)")
+    @app_commands.describe(segundos="Duração da amostragem")
+    @app_commands.default_permissions(administrator=True)
+    async def perfil(self, interaction: discord.Interaction, segundos: app_commands.Range[int, 1, 300] = 30):
+        segundos = min(segundos, Config.PROFILE_MAX_SECONDS)
+        await interaction.response.send_message(f"🔬 Perfilando por {segundos}s...", ephemeral=True)
+        try:
+            path, summary = await profile_for(segundos)
+        except RuntimeError as e:
+            await interaction.followup.send(f"⚠️ {e}", ephemeral=True)
+            return
+
+        logger.info(f"Perfil gravado em {path} (solicitado por {interaction.user}).")
+        await interaction.followup.send(
+            f"✅ Perfil gravado em `{path}`. Resumo (tempo acumulado) em anexo.",
+            file=discord.File(io.BytesIO(summary.encode()), filename="perfil.txt"),
+            ephemeral=True
+        )
 
 async def setup(bot):
     await bot.add_cog(AdminCog(bot))
\ No newline at end of file
@@ -2,6 +2,14 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import logging
+from config import Config
+from albion_api import AlbionAPIUnavailable
+from database import DatabaseBusy
+from utils.resilience import interaction_deadline
+from utils.guild_members import register_member, ALLY
+from utils.player_index import nickname_choices
+from utils.guild_metadata import derive_tag
+from utils.metrics import timed_command
 
 logger = logging.getLogger("AliancaCog")
 
@@ -10,61 +18,94 @@ class AliancaCog(commands.Cog):
         self.bot = bot
 
     @app_commands.command(name="aplicar_alianca", description="Receber cargo de aliado")
+    @timed_command("aplicar_alianca")
     async def aplicar_alianca(self, interaction: discord.Interaction, nickname: str):
         await interaction.response.defer(ephemeral=True)
         
         # 1. Verificar Config
-        config = await self.bot.db.fetchrow_query(
-            "SELECT * FROM server_config WHERE guild_id = $1", interaction.guild_id
-        )
+        try:
+            config = await self.bot.config_cache.get(interaction.guild_id)
+        except DatabaseBusy:
+            await interaction.followup.send("⚠️ Banco de dados sobrecarregado no momento. Tente novamente em instantes.")
+            return
         
         if not config:
             await interaction.followup.send("❌ Bot não configurado.")
             return
             
-        if config['server_type'] not in ['ALLIANCE', 'HYBRID']:
+        if config.server_type not in ['ALLIANCE', 'HYBRID']:
             await interaction.followup.send("⚠️ Comando desativado neste modo de servidor.")
             return
 
-        if not config['alliance_tag'] or not config['ally_role_id']:
+        if not config.alliance_tag or not config.ally_role_id:
             await interaction.followup.send("❌ Configuração de aliança incompleta.")
             return
 
-        # 2. Buscar API
-        player = await self.bot.albion.search_player(nickname)
+        # 2. Buscar API: a busca basta; guilda e aliança vêm dos metadados locais
+        deadline = interaction_deadline(interaction, Config.INTERACTION_BUDGET)
+        try:
+            player = await self.bot.albion.resolve_player(nickname, deadline=deadline, full=False)
+            guild_meta = None
+            if player and player.get('GuildId'):
+                guild_meta = await self.bot.guild_metadata.get(
+                    player['GuildId'], deadline, alliance_id=player.get('AllianceId') or None
+                )
+            player_ally = await self._alliance_tag(player, guild_meta, deadline) if player else ''
+        except AlbionAPIUnavailable:
+            await interaction.followup.send("⚠️ API do Albion indisponível no momento. Tente novamente em instantes.")
+            return
+
         if not player:
             await interaction.followup.send("❌ Jogador não encontrado.")
             return
-            
-        full_player = await self.bot.albion.get_player_info(player['Id'])
-        player_ally = full_player.get('AllianceTag', '')
-        server_ally = config['alliance_tag']
+
+        server_ally = config.alliance_tag
         
         # 3. Verificar Aliança
         if player_ally == server_ally:
             try:
-                ally_role = interaction.guild.get_role(config['ally_role_id'])
-                recruit_role = interaction.guild.get_role(config['recruit_role_id']) if config['recruit_role_id'] else None
-                
-                if ally_role: await interaction.user.add_roles(ally_role)
-                if recruit_role: await interaction.user.remove_roles(recruit_role)
-                
-                # Atualizar Nick: [GuildName] Nickname (Padrão para aliança)
-                guild_name = full_player.get('GuildName', 'Guild')
-                # Tentar pegar abreviação se possível (não fornecido pela API diretamente, usando nome completo ou truncado)
-                # Para aliança, o usuário pediu [TAG] mas a API só dá o nome completo. 
-                # Vou usar o nome da guilda como "TAG" por enquanto, ou abreviar se for muito longo.
-                tag = guild_name
+                guild = interaction.guild
+                # Atualizar Nick: [TAG] Nickname, com a tag derivada do nome da guilda
+                tag = guild_meta.tag if guild_meta else derive_tag(player.get('GuildName'))
                 
                 new_nick = f"[{tag}] {player['Name']}"
-                await interaction.user.edit(nick=new_nick[:32])
+                # Cargos e nick numa única edição do membro
+                await self.bot.member_mutations.submit(
+                    guild, interaction.user,
+                    add=[guild.get_role(config.ally_role_id)],
+                    remove=[guild.get_role(config.recruit_role_id) if config.recruit_role_id else None],
+                    nick=new_nick[:32], reason="O Vigia: aliado verificado", urgent=True
+                )
+                await register_member(
+                    self.bot.db, interaction.guild_id, interaction.user.id, player['Name'], ALLY,
+                    {**player, 'AllianceTag': player_ally}
+                )
                 
                 await interaction.followup.send(f"✅ Verificado! Bem-vindo à aliança **{server_ally}**. Nick alterado para `{new_nick}`.")
                 
             except discord.Forbidden:
                 await interaction.followup.send("⚠️ Verificado, mas sem permissão para alterar cargos/nick.")
+            except DatabaseBusy:
+                await interaction.followup.send("⚠️ Banco de dados sobrecarregado no momento. Tente novamente em instantes.")
         else:
             await interaction.followup.send(f"❌ Sua guilda não está na aliança **{server_ally}**.")
 
+    async def _alliance_tag(self, player, guild_meta, deadline):
+        """AllianceTag do jogador; só chama /players/{id} se os metadados da guilda não bastarem."""
+        if 'AllianceTag' in player:
+            return player['AllianceTag'] or ''
+        alliance_id = player.get('AllianceId') or None
+        if not alliance_id:
+            return ''
+        if guild_meta and guild_meta.alliance_id == alliance_id:
+            return guild_meta.alliance_tag or ''
+        # Os metadados ainda não refletem a troca de aliança da guilda: confirma no jogador
+        info = await self.bot.albion.get_player_info(player['Id'], deadline)
+        return (info or {}).get('AllianceTag') or ''
+
+    @aplicar_alianca.autocomplete('nickname')
+    async def nickname_autocomplete(self, interaction: discord.Interaction, current: str):
+        return nickname_choices(self.bot, current)
+
 async def setup(bot):
     await bot.add_cog(AliancaCog(bot))
\ No newline at end of file
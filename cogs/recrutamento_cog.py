@@ -1,11 +1,204 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+import asyncio
 import logging
+from config import Config
+from albion_api import AlbionAPIUnavailable
+from database import DatabaseBusy
+from utils.resilience import interaction_deadline
+from utils.guild_members import register_member, MEMBER
+from utils.player_index import nickname_choices
+from utils.metrics import timed_command
+from utils.support_queue import APPLICATION as APPLICATION_ITEM
+from utils.applications import (
+    PENDING, APPROVED, REJECTED, create_application, attach_message, attach_digest, get_digest,
+    decide, reopen, withdraw, get_application, as_player
+)
 
 logger = logging.getLogger("RecrutamentoCog")
 
+class ApplicationButton(discord.ui.DynamicItem[discord.ui.Button], template=r'app:(?P<action>approve|reject):(?P<id>[0-9]+)'):
+    """Botão de aprovação/rejeição com o id do pedido no custom_id.
+
+    Sobrevive a reinícios sem precisar ler o embed: o clique vira uma busca pela chave primária.
+    """
+
+    def __init__(self, action, application_id, disabled=False):
+        approve = action == 'approve'
+        super().__init__(discord.ui.Button(
+            label="Aprovar" if approve else "Rejeitar",
+            style=discord.ButtonStyle.green if approve else discord.ButtonStyle.red,
+            custom_id=f"app:{action}:{application_id}",
+            disabled=disabled
+        ))
+        self.action = action
+        self.application_id = application_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match['action'], int(match['id']))
+
+    async def callback(self, interaction: discord.Interaction):
+        cog = interaction.client.get_cog('RecrutamentoCog')
+        if self.action == 'approve':
+            await cog.approve_application(interaction, self.application_id)
+        else:
+            await cog.reject_application(interaction, self.application_id)
+
+
+def application_view(application_id, disabled=False):
+    view = discord.ui.View(timeout=None)
+    view.add_item(ApplicationButton('approve', application_id, disabled))
+    view.add_item(ApplicationButton('reject', application_id, disabled))
+    return view
+
+
+# Dois itens por pedido no menu (aprovar/rejeitar) e no máximo 25 opções por menu
+DIGEST_PAGE_SIZE = max(1, min(Config.APPROVAL_DIGEST_PAGE_SIZE, 12))
+
+DIGEST_STATUS = {APPROVED: "✅ Aprovado", REJECTED: "❌ Rejeitado"}
+
+
+class DigestPageButton(discord.ui.DynamicItem[discord.ui.Button], template=r'digest:page:(?P<page>[0-9]+):(?P<label>prev|next)'):
+    """Navegação entre as páginas de um resumo de pedidos (a página alvo vai no custom_id)."""
+
+    def __init__(self, page, label, disabled=False):
+        super().__init__(discord.ui.Button(
+            label="◀" if label == 'prev' else "▶",
+            style=discord.ButtonStyle.grey,
+            custom_id=f"digest:page:{page}:{label}",
+            disabled=disabled
+        ))
+        self.page = page
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(int(match['page']), match['label'])
+
+    async def callback(self, interaction: discord.Interaction):
+        await interaction.client.get_cog('RecrutamentoCog').show_digest_page(interaction, self.page)
+
+
+class DigestBulkButton(discord.ui.DynamicItem[discord.ui.Button], template=r'digest:(?P<action>approve|reject):(?P<page>[0-9]+)'):
+    """Aprova ou rejeita de uma vez os pedidos pendentes da página."""
+
+    def __init__(self, action, page, disabled=False):
+        approve = action == 'approve'
+        super().__init__(discord.ui.Button(
+            label="Aprovar página" if approve else "Rejeitar página",
+            style=discord.ButtonStyle.green if approve else discord.ButtonStyle.red,
+            custom_id=f"digest:{action}:{page}",
+            disabled=disabled
+        ))
+        self.action = action
+        self.page = page
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match['action'], int(match['page']))
+
+    async def callback(self, interaction: discord.Interaction):
+        cog = interaction.client.get_cog('RecrutamentoCog')
+        await cog.decide_digest(interaction, self.page, bulk=self.action)
+
+
+class DigestPicker(discord.ui.DynamicItem[discord.ui.Select], template=r'digest:pick:(?P<page>[0-9]+)'):
+    """Menu com decisões individuais (`approve:<id>` / `reject:<id>`) para a página."""
+
+    def __init__(self, page, rows=()):
+        options = []
+        for row in rows:
+            options.append(discord.SelectOption(label=f"Aprovar {row['albion_nick']}"[:100], value=f"approve:{row['id']}", emoji="✅"))
+            options.append(discord.SelectOption(label=f"Rejeitar {row['albion_nick']}"[:100], value=f"reject:{row['id']}", emoji="❌"))
+        super().__init__(discord.ui.Select(
+            custom_id=f"digest:pick:{page}",
+            placeholder="Decidir pedidos individualmente",
+            min_values=1,
+            max_values=max(1, len(options)),
+            options=options or [discord.SelectOption(label="-", value="none")],
+            disabled=not options
+        ))
+        self.page = page
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(int(match['page']))
+
+    async def callback(self, interaction: discord.Interaction):
+        decisions = {}
+        for value in self.item.values:
+            action, _, application_id = value.partition(":")
+            # Aprovar e rejeitar o mesmo pedido na mesma escolha: vale a primeira opção
+            decisions.setdefault(int(application_id), action)
+        cog = interaction.client.get_cog('RecrutamentoCog')
+        await cog.decide_digest(interaction, self.page, decisions=decisions)
+
+
+def digest_page(rows, page):
+    """Página válida mais próxima de `page` e os pedidos dela."""
+    pages = max(1, -(-len(rows) // DIGEST_PAGE_SIZE))
+    page = min(page, pages - 1)
+    return page, pages, rows[page * DIGEST_PAGE_SIZE:(page + 1) * DIGEST_PAGE_SIZE]
+
+
+def digest_embed(rows, page, config=None):
+    page, pages, items = digest_page(rows, page)
+    pending = sum(1 for row in rows if row['status'] == PENDING)
+    embed = discord.Embed(
+        title="Solicitações de Registro",
+        description=f"{len(rows)} pedidos, {pending} aguardando decisão.",
+        color=discord.Color.blue() if pending else discord.Color.green()
+    )
+    min_pve = (config.min_fame_pve if config else 0) or 0
+    min_pvp = (config.min_fame_pvp if config else 0) or 0
+    for row in items:
+        pve, pvp = row['pve_fame'] or 0, row['kill_fame'] or 0
+        if row['status'] == PENDING:
+            status = "✅ Atende" if (pve >= min_pve and pvp >= min_pvp) else "⚠️ Não atende (Análise Manual)"
+        else:
+            status = f"{DIGEST_STATUS.get(row['status'], row['status'])} por <@{row['reviewed_by']}>"
+        embed.add_field(
+            name=f"#{row['id']} {row['albion_nick']}",
+            value=(f"<@{row['user_id']}> | Guilda: {row['albion_guild_name'] or 'Nenhuma'}\n"
+                   f"PvE: {pve:,} | PvP: {pvp:,}\n{status}"),
+            inline=False
+        )
+    embed.set_footer(text=f"Página {page + 1}/{pages}")
+    return embed
+
+
+def digest_view(rows, page):
+    page, pages, items = digest_page(rows, page)
+    pending = [row for row in items if row['status'] == PENDING]
+    view = discord.ui.View(timeout=None)
+    view.add_item(DigestPicker(page, pending))
+    view.add_item(DigestPageButton(max(page - 1, 0), 'prev', disabled=page == 0))
+    view.add_item(DigestBulkButton('approve', page, disabled=not pending))
+    view.add_item(DigestBulkButton('reject', page, disabled=not pending))
+    view.add_item(DigestPageButton(min(page + 1, pages - 1), 'next', disabled=page >= pages - 1))
+    return view
+
+
+def _fame(value):
+    return f"{value:,}" if value is not None else "?"
+
+
+class ApprovalError(Exception):
+    """A aprovação não pôde ser aplicada no Discord; o pedido voltou a PENDING."""
+
+
+def decided_embed(message, approved, officer):
+    """Copia o embed do card marcando a decisão tomada."""
+    embed = message.embeds[0].copy() if message.embeds else discord.Embed(title="Solicitação de Registro")
+    embed.color = discord.Color.green() if approved else discord.Color.red()
+    embed.add_field(name="Decisão", value=f"{'✅ Aprovado' if approved else '❌ Rejeitado'} por {officer.mention}", inline=False)
+    return embed
+
+
 class ApprovalView(discord.ui.View):
+    """View dos cards antigos (anteriores à tabela applications), que só têm os dados no embed."""
+
     def __init__(self, bot):
         super().__init__(timeout=None)
         self.bot = bot
@@ -21,31 +214,22 @@ class ApprovalView(discord.ui.View):
             albion_nick = embed.fields[0].value
             
             # Buscar config
-            config = await self.bot.db.fetchrow_query(
-                "SELECT * FROM server_config WHERE guild_id = $1", interaction.guild_id
-            )
+            config = await self.bot.config_cache.get(interaction.guild_id)
             
             if not config:
                 await interaction.followup.send("❌ Configuração perdida.", ephemeral=True)
                 return
 
-            member = interaction.guild.get_member(user_id)
+            member = await self.bot.member_cache.resolve(interaction.guild, user_id)
             if not member:
                 await interaction.followup.send("❌ Usuário saiu do servidor.", ephemeral=True)
                 return
 
             # Atualizar Cargos
             try:
-                recruit_role = interaction.guild.get_role(config['recruit_role_id'])
-                member_role = interaction.guild.get_role(config['member_role_id'])
-                
-                if recruit_role: await member.remove_roles(recruit_role)
-                if member_role: await member.add_roles(member_role)
-                
-                # Atualizar Nick: [TAG] Nickname
-                tag = config['guild_tag'] or "GUILD"
-                new_nick = f"[{tag}] {albion_nick}"
-                await member.edit(nick=new_nick[:32])
+                new_nick = await self.bot.get_cog('RecrutamentoCog').promote(interaction.guild, member, albion_nick, config)
+                await register_member(self.bot.db, interaction.guild_id, member.id, albion_nick, MEMBER)
+                self.bot.log_writer.log(interaction.guild_id, member.id, albion_nick, "APPROVED", interaction.user.id)
                 
                 await interaction.followup.send(f"✅ {member.mention} aprovado com sucesso! Nick alterado para `{new_nick}`.")
                 
@@ -63,37 +247,264 @@ class ApprovalView(discord.ui.View):
     @discord.ui.button(label="Rejeitar", style=discord.ButtonStyle.red, custom_id="approval:reject")
     async def reject(self, interaction: discord.Interaction, button: discord.ui.Button):
         await interaction.response.send_message("❌ Rejeitado.", ephemeral=True)
-        # Futuro: Implementar log de rejeição
+        try:
+            embed = interaction.message.embeds[0]
+            user_id = int(embed.footer.text.split("ID: ")[1])
+            self.bot.log_writer.log(interaction.guild_id, user_id, embed.fields[0].value, "REJECTED", interaction.user.id)
+        except (IndexError, ValueError, AttributeError) as e:
+            logger.warning(f"Não foi possível registrar a rejeição: {e}")
 
 class RecrutamentoCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        # Registrar view persistente no startup
+        # Botões dos pedidos (id no custom_id) e a view legada dos cards antigos
+        self.bot.add_dynamic_items(ApplicationButton, DigestPageButton, DigestBulkButton, DigestPicker)
         self.bot.add_view(ApprovalView(bot))
+        self.bot.approval_digest.sender = self.send_digest
+
+    async def cog_unload(self):
+        self.bot.remove_dynamic_items(ApplicationButton, DigestPageButton, DigestBulkButton, DigestPicker)
+        if self.bot.approval_digest.sender == self.send_digest:
+            self.bot.approval_digest.sender = None
+
+    async def promote(self, guild, member, albion_nick, config):
+        """Troca Recruta por Membro e aplica o nick `[TAG] Nick`. Retorna o novo nick.
+
+        Cargos e nick vão juntos numa única edição, pela fila de alterações de membros.
+        """
+        # Atualizar Nick: [TAG] Nickname
+        tag = config.guild_tag or "GUILD"
+        new_nick = f"[{tag}] {albion_nick}"
+        await self.bot.member_mutations.submit(
+            guild, member,
+            add=[guild.get_role(config.member_role_id)],
+            remove=[guild.get_role(config.recruit_role_id)],
+            nick=new_nick[:32], reason="O Vigia: recrutamento aprovado", urgent=True
+        )
+        return new_nick
+
+    async def _already_decided(self, interaction, application_id):
+        row = await get_application(self.bot.db, application_id)
+        if not row:
+            msg = "❌ Pedido não encontrado."
+        else:
+            msg = f"ℹ️ Este pedido já foi {'aprovado' if row['status'] == APPROVED else 'rejeitado'} por <@{row['reviewed_by']}>."
+        if interaction.response.is_done():
+            await interaction.followup.send(msg, ephemeral=True)
+        else:
+            await interaction.response.send_message(msg, ephemeral=True)
+
+    async def _approve(self, guild, application_id, officer, config):
+        """Aprova um pedido pendente e aplica cargos/nick.
+
+        Devolve (membro, novo nick), ou None se o pedido já tinha sido decidido. Se não
+        der para aplicar no Discord (por qualquer motivo), o pedido volta a PENDING e
+        sobe ApprovalError.
+        """
+        # O UPDATE condicional garante que só um oficial aprova
+        row = await decide(self.bot.db, application_id, APPROVED, officer.id)
+        if not row:
+            return None
+
+        albion_nick = row['albion_nick']
+        try:
+            member = await self.bot.member_cache.resolve(guild, row['user_id'])
+            if not member:
+                raise ApprovalError("❌ Usuário saiu do servidor.")
+            new_nick = await self.promote(guild, member, albion_nick, config)
+        except ApprovalError:
+            await reopen(self.bot.db, application_id, APPROVED)
+            raise
+        except discord.Forbidden:
+            await reopen(self.bot.db, application_id, APPROVED)
+            raise ApprovalError("❌ Sem permissão para alterar cargos/nick. Verifique a hierarquia de cargos.")
+        except Exception as e:
+            logger.error(f"Erro ao aplicar a aprovação do pedido {application_id}: {e}")
+            await reopen(self.bot.db, application_id, APPROVED)
+            raise ApprovalError("⚠️ Não foi possível alterar cargos/nick agora; o pedido voltou a pendente. Tente novamente.")
+
+        # Cargos e nick já aplicados: a aprovação vale, mesmo que o registro abaixo falhe
+        try:
+            await register_member(self.bot.db, guild.id, member.id, albion_nick, MEMBER, as_player(row))
+            self.bot.log_writer.log(guild.id, member.id, albion_nick, APPROVED, officer.id)
+            await self.bot.support_queue.close_application(application_id, officer.id)
+        except Exception as e:
+            logger.error(f"Erro ao registrar a aprovação do pedido {application_id}: {e}")
+        return member, new_nick
+
+    async def _reject(self, guild_id, application_id, officer):
+        """Rejeita um pedido pendente. Devolve a linha, ou None se já tinha sido decidido."""
+        row = await decide(self.bot.db, application_id, REJECTED, officer.id)
+        if row:
+            self.bot.log_writer.log(guild_id, row['user_id'], row['albion_nick'], REJECTED, officer.id)
+            await self.bot.support_queue.close_application(application_id, officer.id)
+        return row
+
+    @timed_command("botao_aprovar")
+    async def approve_application(self, interaction: discord.Interaction, application_id):
+        await interaction.response.defer()
+
+        try:
+            config = await self.bot.config_cache.get(interaction.guild_id)
+            if not config:
+                await interaction.followup.send("❌ Configuração perdida.", ephemeral=True)
+                return
+
+            try:
+                result = await self._approve(interaction.guild, application_id, interaction.user, config)
+            except ApprovalError as e:
+                await interaction.followup.send(str(e), ephemeral=True)
+                return
+            if not result:
+                await self._already_decided(interaction, application_id)
+                return
+
+            member, new_nick = result
+            await interaction.followup.send(f"✅ {member.mention} aprovado com sucesso! Nick alterado para `{new_nick}`.")
+            await interaction.message.edit(
+                embed=decided_embed(interaction.message, True, interaction.user),
+                view=application_view(application_id, disabled=True)
+            )
+
+        except DatabaseBusy:
+            await interaction.followup.send("⚠️ Banco de dados sobrecarregado no momento. Tente novamente em instantes.", ephemeral=True)
+        except Exception as e:
+            logger.error(f"Erro na aprovação do pedido {application_id}: {e}")
+            await interaction.followup.send("❌ Erro interno.", ephemeral=True)
+
+    @timed_command("botao_rejeitar")
+    async def reject_application(self, interaction: discord.Interaction, application_id):
+        try:
+            row = await self._reject(interaction.guild_id, application_id, interaction.user)
+        except DatabaseBusy:
+            await interaction.response.send_message("⚠️ Banco de dados sobrecarregado no momento. Tente novamente em instantes.", ephemeral=True)
+            return
+        except Exception as e:
+            logger.error(f"Erro ao rejeitar pedido {application_id}: {e}")
+            await interaction.response.send_message("❌ Erro interno.", ephemeral=True)
+            return
+        if not row:
+            await self._already_decided(interaction, application_id)
+            return
+
+        # Atualiza o card na própria resposta ao clique (uma chamada só)
+        await interaction.response.edit_message(
+            embed=decided_embed(interaction.message, False, interaction.user),
+            view=application_view(application_id, disabled=True)
+        )
+
+    # --- Resumo de pedidos (APPROVAL_DIGEST) ---
+
+    async def send_digest(self, guild_id, application_ids):
+        """Envia um lote do buffer como uma única mensagem paginada. True se enviou."""
+        guild = self.bot.get_guild(guild_id)
+        config = await self.bot.config_cache.get(guild_id)
+        channel = guild.get_channel(config.approval_channel_id) if guild and config and config.approval_channel_id else None
+        if not channel:
+            logger.warning(f"Canal de aprovação inacessível no servidor {guild_id}; resumo adiado.")
+            return False
+
+        # Pedidos renovados (registrar de novo) que já estão num resumo continuam nele
+        rows = await self.bot.db.fetch_query(
+            "SELECT * FROM applications WHERE id = ANY($1::bigint[]) AND status = 'PENDING' "
+            "AND message_id IS NULL ORDER BY id",
+            application_ids
+        )
+        if not rows:
+            return True
+        message = await channel.send(embed=digest_embed(rows, 0, config), view=digest_view(rows, 0))
+        await attach_digest(self.bot.db, [row['id'] for row in rows], channel.id, message.id)
+        return True
+
+    @timed_command("resumo_pagina")
+    async def show_digest_page(self, interaction: discord.Interaction, page):
+        try:
+            rows = await get_digest(self.bot.db, interaction.message.id)
+            config = await self.bot.config_cache.get(interaction.guild_id)
+        except DatabaseBusy:
+            await interaction.response.send_message("⚠️ Banco de dados sobrecarregado no momento. Tente novamente em instantes.", ephemeral=True)
+            return
+        await interaction.response.edit_message(embed=digest_embed(rows, page, config), view=digest_view(rows, page))
+
+    @timed_command("resumo_decisao")
+    async def decide_digest(self, interaction: discord.Interaction, page, bulk=None, decisions=None):
+        """Aplica as decisões escolhidas (ou `bulk` para os pendentes da página) e redesenha a página."""
+        await interaction.response.defer()
+
+        try:
+            config = await self.bot.config_cache.get(interaction.guild_id)
+            if not config:
+                await interaction.followup.send("❌ Configuração perdida.", ephemeral=True)
+                return
+
+            rows = await get_digest(self.bot.db, interaction.message.id)
+            if bulk:
+                _, _, items = digest_page(rows, page)
+                decisions = {row['id']: bulk for row in items if row['status'] == PENDING}
+            listed = {row['id']: row for row in rows}
+            decisions = {app_id: action for app_id, action in (decisions or {}).items() if app_id in listed}
+
+            async def apply(application_id, action):
+                nick = listed[application_id]['albion_nick']
+                try:
+                    if action == 'approve':
+                        result = await self._approve(interaction.guild, application_id, interaction.user, config)
+                        return f"✅ `{nick}` aprovado ({result[1]})." if result else f"ℹ️ `{nick}` já tinha sido decidido."
+                    row = await self._reject(interaction.guild_id, application_id, interaction.user)
+                    return f"❌ `{nick}` rejeitado." if row else f"ℹ️ `{nick}` já tinha sido decidido."
+                except ApprovalError as e:
+                    return f"`{nick}`: {e}"
+                except DatabaseBusy:
+                    return f"`{nick}`: ⚠️ banco de dados sobrecarregado; tente de novo."
+                except Exception as e:
+                    # Uma falha não derruba as outras decisões nem o redesenho da página
+                    logger.error(f"Erro ao decidir o pedido {application_id} do resumo: {e}")
+                    return f"`{nick}`: ❌ erro interno."
+
+            # Cada decisão é um UPDATE condicional; as edições de membros passam pela fila por servidor
+            lines = await asyncio.gather(*(apply(app_id, action) for app_id, action in decisions.items()))
+
+            rows = await get_digest(self.bot.db, interaction.message.id)
+            await interaction.message.edit(embed=digest_embed(rows, page, config), view=digest_view(rows, page))
+            await interaction.followup.send("\n".join(lines) or "ℹ️ Nada pendente nesta página.", ephemeral=True)
+
+        except DatabaseBusy:
+            await interaction.followup.send("⚠️ Banco de dados sobrecarregado no momento. Tente novamente em instantes.", ephemeral=True)
+        except Exception as e:
+            logger.error(f"Erro ao decidir pedidos do resumo {interaction.message.id}: {e}")
+            await interaction.followup.send("❌ Erro interno.", ephemeral=True)
 
     @app_commands.command(name="registrar", description="Registrar-se na guilda")
+    @timed_command("registrar")
     async def registrar(self, interaction: discord.Interaction, nickname: str):
         await interaction.response.defer(ephemeral=True)
         
         # 1. Verificar Config e Modo
-        config = await self.bot.db.fetchrow_query(
-            "SELECT * FROM server_config WHERE guild_id = $1", interaction.guild_id
-        )
+        try:
+            config = await self.bot.config_cache.get(interaction.guild_id)
+        except DatabaseBusy:
+            await interaction.followup.send("⚠️ Banco de dados sobrecarregado no momento. Tente novamente em instantes.")
+            return
         
         if not config:
             await interaction.followup.send("❌ Bot não configurado. Use `/auto_setup`.")
             return
             
-        if config['server_type'] not in ['GUILD', 'HYBRID']:
+        if config.server_type not in ['GUILD', 'HYBRID']:
             await interaction.followup.send("⚠️ Comando desativado neste modo de servidor.")
             return
 
-        if not config['approval_channel_id']:
+        if not config.approval_channel_id:
             await interaction.followup.send("❌ Canal de aprovação não configurado.")
             return
 
         # 2. Buscar na API
-        player = await self.bot.albion.search_player(nickname)
+        deadline = interaction_deadline(interaction, Config.INTERACTION_BUDGET)
+        try:
+            player = await self.bot.albion.resolve_player(nickname, deadline=deadline)
+        except AlbionAPIUnavailable:
+            await interaction.followup.send("⚠️ API do Albion indisponível no momento. Tente novamente em instantes.")
+            return
         if not player:
             await interaction.followup.send(f"❌ Jogador `{nickname}` não encontrado no Albion.")
             return
@@ -101,13 +512,13 @@ class RecrutamentoCog(commands.Cog):
         # 3. Verificar Requisitos
         pve = player.get('LifetimeStatistics', {}).get('PvE', {}).get('Total', 0)
         pvp = player.get('KillFame', 0)
-        min_pve = config['min_fame_pve'] or 0
-        min_pvp = config['min_fame_pvp'] or 0
+        min_pve = config.min_fame_pve or 0
+        min_pvp = config.min_fame_pvp or 0
         
         status = "✅ Atende" if (pve >= min_pve and pvp >= min_pvp) else "⚠️ Não atende (Análise Manual)"
         
         # 4. Enviar para Aprovação
-        channel = interaction.guild.get_channel(config['approval_channel_id'])
+        channel = interaction.guild.get_channel(config.approval_channel_id)
         if channel:
             embed = discord.Embed(title="Solicitação de Registro", color=discord.Color.blue())
             embed.add_field(name="Nick", value=player['Name'])
@@ -116,10 +527,93 @@ class RecrutamentoCog(commands.Cog):
             embed.add_field(name="Status", value=status)
             embed.set_footer(text=f"ID: {interaction.user.id}")
             
-            await channel.send(embed=embed, view=ApprovalView(self.bot))
+            try:
+                application_id = await create_application(self.bot.db, interaction.guild_id, interaction.user.id, player)
+            except DatabaseBusy:
+                await interaction.followup.send("⚠️ Banco de dados sobrecarregado no momento. Tente novamente em instantes.")
+                return
+
+            if Config.APPROVAL_DIGEST:
+                # Vai para o resumo do servidor: uma mensagem por lote em vez de uma por pedido
+                self.bot.approval_digest.add(interaction.guild_id, application_id)
+            else:
+                try:
+                    message = await channel.send(embed=embed, view=application_view(application_id))
+                except discord.HTTPException as e:
+                    logger.error(f"Erro ao enviar o pedido {application_id} ao canal de aprovação: {e}")
+                    await withdraw(self.bot.db, application_id)
+                    await interaction.followup.send("❌ Não foi possível enviar o pedido ao canal de aprovação. Avise a staff.")
+                    return
+                await attach_message(self.bot.db, application_id, channel.id, message.id)
+
+            # O pedido já está com a staff: falhar aqui só deixa a fila de suporte sem o item
+            try:
+                await self.bot.support_queue.add(
+                    interaction.guild_id, interaction.user.id, f"Registro de {player['Name']}",
+                    kind=APPLICATION_ITEM, application_id=application_id
+                )
+            except Exception as e:
+                logger.error(f"Erro ao colocar o pedido {application_id} na fila de suporte: {e}")
+            self.bot.log_writer.log(interaction.guild_id, interaction.user.id, player['Name'], PENDING)
             await interaction.followup.send("✅ Solicitação enviada para aprovação!")
         else:
             await interaction.followup.send("❌ Canal de aprovação inacessível.")
 
+    @registrar.autocomplete('nickname')
+    async def nickname_autocomplete(self, interaction: discord.Interaction, current: str):
+        return nickname_choices(self.bot, current)
+
+    @app_commands.command(name="historico_fama", description="📈 Histórico de fama de um jogador")
+    @app_commands.default_permissions(manage_guild=True)
+    async def historico_fama(self, interaction: discord.Interaction, nickname: str):
+        await interaction.response.defer(ephemeral=True)
+
+        # Resolve pelo índice local; só vai à API se o nick for desconhecido
+        entry = self.bot.player_index.resolve(nickname)
+        if entry:
+            player_id, name = entry[0], entry[1]
+        else:
+            try:
+                player = await self.bot.albion.resolve_player(
+                    nickname, deadline=interaction_deadline(interaction, Config.INTERACTION_BUDGET)
+                )
+            except AlbionAPIUnavailable:
+                await interaction.followup.send("⚠️ API do Albion indisponível no momento. Tente novamente em instantes.")
+                return
+            if not player:
+                await interaction.followup.send(f"❌ Jogador `{nickname}` não encontrado no Albion.")
+                return
+            player_id, name = player['Id'], player['Name']
+
+        # Grava só o snapshot pendente deste jogador (se houver), não o lote inteiro
+        await self.bot.snapshots.flush(player_id)
+        try:
+            rows = await self.bot.snapshots.history(player_id, limit=10)
+        except DatabaseBusy:
+            await interaction.followup.send("⚠️ Banco de dados sobrecarregado no momento. Tente novamente em instantes.")
+            return
+        if not rows:
+            await interaction.followup.send(f"ℹ️ Ainda não há histórico para `{name}`.")
+            return
+
+        embed = discord.Embed(title=f"📈 Histórico de Fama: {name}", color=discord.Color.blue())
+        lines = []
+        for row, older in zip(rows, list(rows[1:]) + [None]):
+            delta = ""
+            if older:
+                # Colunas de fama podem ser NULL: sem os dois valores não há diferença a mostrar
+                deltas = [
+                    f"+{row[column] - older[column]:,} {label}"
+                    for column, label in (('pve_fame', 'PvE'), ('kill_fame', 'PvP'))
+                    if row[column] is not None and older[column] is not None
+                ]
+                delta = f" ({', '.join(deltas)})" if deltas else ""
+            lines.append(
+                f"{discord.utils.format_dt(row['captured_at'], 'd')} PvE: {_fame(row['pve_fame'])} | "
+                f"PvP: {_fame(row['kill_fame'])}{delta}"
+            )
+        embed.description = "\n".join(lines)
+        await interaction.followup.send(embed=embed)
+
 async def setup(bot):
     await bot.add_cog(RecrutamentoCog(bot))
\ No newline at end of file
@@ -1,9 +1,221 @@
 import discord
 from discord.ext import commands
+from discord import app_commands
+import asyncio
+import logging
+from config import Config
+from database import DatabaseBusy
+from utils.metrics import timed_command
+from utils.support_queue import TICKET, APPLICATION, NORMAL, PRIORITY_NAMES
+
+logger = logging.getLogger("SuporteCog")
+
+PRIORITY_CHOICES = [
+    app_commands.Choice(name=name, value=value) for value, name in PRIORITY_NAMES.items()
+]
+
+
+def _is_staff(interaction):
+    return interaction.user.guild_permissions.manage_guild
+
 
 class SuporteCog(commands.Cog):
+    """Fila de suporte (/suporte) e painel fixado com o estado da fila."""
+
+    suporte = app_commands.Group(name="suporte", description="Fila de suporte e pedidos", guild_only=True)
+
     def __init__(self, bot):
         self.bot = bot
+        self.queue = bot.support_queue
+        self._panels = {}  # guild_id -> (channel_id, message_id)
+        self._pending_edits = {}  # guild_id -> Task da edição agendada
+
+    async def cog_load(self):
+        self.queue.add_observer(self.schedule_panel_update)
+        try:
+            rows = await self.bot.db.fetch_query("SELECT guild_id, channel_id, message_id FROM support_panels")
+            self._panels = {row['guild_id']: (row['channel_id'], row['message_id']) for row in rows}
+        except Exception as e:
+            logger.error(f"Erro ao carregar painéis da fila: {e}")
+
+    async def cog_unload(self):
+        if self.schedule_panel_update in self.queue.observers:
+            self.queue.observers.remove(self.schedule_panel_update)
+        for task in self._pending_edits.values():
+            task.cancel()
+
+    # --- Painel ---
+
+    def schedule_panel_update(self, guild_id):
+        """Agenda uma edição do painel; mudanças dentro da janela viram uma edição só."""
+        if guild_id not in self._panels or guild_id in self._pending_edits:
+            return
+        self._pending_edits[guild_id] = asyncio.create_task(self._update_panel_later(guild_id))
+
+    async def _update_panel_later(self, guild_id):
+        try:
+            await asyncio.sleep(Config.SUPPORT_PANEL_DEBOUNCE)
+        finally:
+            self._pending_edits.pop(guild_id, None)
+        await self._update_panel(guild_id)
+
+    async def _update_panel(self, guild_id):
+        panel = self._panels.get(guild_id)
+        guild = self.bot.get_guild(guild_id)
+        if not panel or not guild:
+            return
+        channel = guild.get_channel(panel[0])
+        if not channel:
+            return
+        try:
+            # Mensagem parcial: edita sem buscar a mensagem antes
+            await channel.get_partial_message(panel[1]).edit(embed=self.panel_embed(guild_id))
+        except discord.NotFound:
+            logger.warning(f"Painel da fila apagado no servidor {guild_id}; removendo.")
+            self._panels.pop(guild_id, None)
+            await self.bot.db.execute_query("DELETE FROM support_panels WHERE guild_id = $1", guild_id)
+        except discord.HTTPException as e:
+            logger.error(f"Erro ao atualizar painel da fila ({guild_id}): {e}")
+
+    def panel_embed(self, guild_id):
+        total = self.queue.size(guild_id)
+        embed = discord.Embed(title="🎫 Fila de Suporte", color=discord.Color.blurple())
+        items = self.queue.peek(guild_id, Config.SUPPORT_PANEL_ITEMS)
+        lines = [
+            f"**{i}.** `#{t.id}` {'📝' if t.kind == APPLICATION else '💬'} <@{t.user_id}> — {t.subject[:60]}"
+            f"{' ⚠️ ' + PRIORITY_NAMES[t.priority] if t.priority > NORMAL else ''} "
+            f"({discord.utils.format_dt(t.created_at, 'R')})"
+            for i, t in enumerate(items, 1)
+        ]
+        if total > len(items):
+            lines.append(f"… e mais {total - len(items)}.")
+        embed.description = "\n".join(lines) or "Fila vazia. ✅"
+        embed.set_footer(text=f"{total} na fila")
+        embed.timestamp = discord.utils.utcnow()
+        return embed
+
+    # --- Comandos ---
+
+    @suporte.command(name="abrir", description="Abrir um ticket de suporte")
+    @timed_command("suporte_abrir")
+    async def abrir(self, interaction: discord.Interaction, assunto: app_commands.Range[str, 1, 200]):
+        try:
+            row = await self.queue.add(interaction.guild_id, interaction.user.id, assunto)
+        except DatabaseBusy:
+            await interaction.response.send_message("⚠️ Banco de dados sobrecarregado no momento. Tente novamente em instantes.", ephemeral=True)
+            return
+        position = self.queue.position(interaction.guild_id, interaction.user.id)
+        if position is None:
+            await interaction.response.send_message(f"ℹ️ Seu ticket `#{row['id']}` já está em atendimento.", ephemeral=True)
+            return
+        await interaction.response.send_message(
+            f"✅ Ticket `#{row['id']}` na fila. Posição: **{position}** de {self.queue.size(interaction.guild_id)}.",
+            ephemeral=True
+        )
+
+    @suporte.command(name="posicao", description="Ver sua posição na fila")
+    async def posicao(self, interaction: discord.Interaction):
+        lines = []
+        for kind, label in ((TICKET, "Ticket"), (APPLICATION, "Pedido de registro")):
+            position = self.queue.position(interaction.guild_id, interaction.user.id, kind)
+            if position is not None:
+                lines.append(f"{label}: posição **{position}** de {self.queue.size(interaction.guild_id)}")
+        await interaction.response.send_message("\n".join(lines) or "ℹ️ Você não tem itens na fila.", ephemeral=True)
+
+    @suporte.command(name="proximo", description="Assumir o próximo item da fila (staff)")
+    @timed_command("suporte_proximo")
+    async def proximo(self, interaction: discord.Interaction):
+        if not _is_staff(interaction):
+            await interaction.response.send_message("❌ Apenas a staff pode atender a fila.", ephemeral=True)
+            return
+        try:
+            row = await self.queue.claim(interaction.guild_id, interaction.user.id)
+        except DatabaseBusy:
+            await interaction.response.send_message("⚠️ Banco de dados sobrecarregado no momento. Tente novamente em instantes.", ephemeral=True)
+            return
+        if not row:
+            await interaction.response.send_message("✅ Fila vazia.", ephemeral=True)
+            return
+
+        embed = discord.Embed(title=f"🎫 Item #{row['id']}", color=discord.Color.green())
+        embed.add_field(name="Usuário", value=f"<@{row['user_id']}>")
+        embed.add_field(name="Tipo", value="Pedido de registro" if row['kind'] == APPLICATION else "Ticket")
+        embed.add_field(name="Prioridade", value=PRIORITY_NAMES.get(row['priority'], row['priority']))
+        embed.add_field(name="Assunto", value=row['subject'], inline=False)
+        embed.add_field(name="Na fila desde", value=discord.utils.format_dt(row['created_at'], 'R'))
+        embed.set_footer(text=f"Use /suporte fechar {row['id']} ao concluir.")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @suporte.command(name="fechar", description="Fechar um item da fila (staff)")
+    async def fechar(self, interaction: discord.Interaction, item: int):
+        if not _is_staff(interaction):
+            await interaction.response.send_message("❌ Apenas a staff pode fechar itens.", ephemeral=True)
+            return
+        try:
+            row = await self.queue.close(interaction.guild_id, item, interaction.user.id)
+        except DatabaseBusy:
+            await interaction.response.send_message("⚠️ Banco de dados sobrecarregado no momento. Tente novamente em instantes.", ephemeral=True)
+            return
+        msg = f"✅ Item `#{item}` fechado." if row else f"❌ Item `#{item}` não encontrado ou já fechado."
+        await interaction.response.send_message(msg, ephemeral=True)
+
+    @suporte.command(name="prioridade", description="Alterar a prioridade de um item (staff)")
+    @app_commands.choices(nivel=PRIORITY_CHOICES)
+    async def prioridade(self, interaction: discord.Interaction, item: int, nivel: app_commands.Choice[int]):
+        if not _is_staff(interaction):
+            await interaction.response.send_message("❌ Apenas a staff pode alterar prioridades.", ephemeral=True)
+            return
+        try:
+            row = await self.queue.set_priority(interaction.guild_id, item, nivel.value)
+        except DatabaseBusy:
+            await interaction.response.send_message("⚠️ Banco de dados sobrecarregado no momento. Tente novamente em instantes.", ephemeral=True)
+            return
+        if not row:
+            await interaction.response.send_message(f"❌ Item `#{item}` não está aberto na fila.", ephemeral=True)
+            return
+        position = self.queue.position(interaction.guild_id, row['user_id'], row['kind'])
+        await interaction.response.send_message(
+            f"✅ Item `#{item}` agora com prioridade **{nivel.name}** (posição {position}).", ephemeral=True
+        )
+
+    @suporte.command(name="painel", description="Fixar neste canal o painel da fila (admin)")
+    async def painel(self, interaction: discord.Interaction):
+        if not interaction.user.guild_permissions.administrator:
+            await interaction.response.send_message("❌ Apenas administradores.", ephemeral=True)
+            return
+        await interaction.response.defer(ephemeral=True)
+
+        message = await interaction.channel.send(embed=self.panel_embed(interaction.guild_id))
+        try:
+            await message.pin(reason="O Vigia: painel da fila de suporte")
+        except discord.HTTPException:
+            logger.warning(f"Sem permissão para fixar o painel no servidor {interaction.guild_id}.")
+
+        old = self._panels.get(interaction.guild_id)
+        try:
+            await self.bot.db.execute_query(
+                "INSERT INTO support_panels (guild_id, channel_id, message_id) VALUES ($1, $2, $3) "
+                "ON CONFLICT (guild_id) DO UPDATE SET channel_id = $2, message_id = $3, updated_at = NOW()",
+                interaction.guild_id, message.channel.id, message.id
+            )
+        except DatabaseBusy:
+            # Sem registro o painel não seria atualizado: tira a mensagem recém-criada
+            try:
+                await message.delete()
+            except discord.HTTPException:
+                pass
+            await interaction.followup.send("⚠️ Banco de dados sobrecarregado no momento. Tente novamente em instantes.")
+            return
+        self._panels[interaction.guild_id] = (message.channel.id, message.id)
+        if old:
+            old_channel = interaction.guild.get_channel(old[0])
+            if old_channel:
+                try:
+                    await old_channel.get_partial_message(old[1]).delete()
+                except discord.HTTPException:
+                    pass
+        await interaction.followup.send("✅ Painel da fila criado. Ele é atualizado automaticamente.")
+
 
 async def setup(bot):
-    await bot.add_cog(SuporteCog(bot))
\ No newline at end of file
+    await bot.add_cog(SuporteCog(bot))
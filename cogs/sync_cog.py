@@ -1,9 +1,259 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
+from discord import app_commands
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from config import Config
+from albion_api import AlbionAPIUnavailable
+from utils.rate_limit import Priority
+from utils.guild_members import ALLY
+
+logger = logging.getLogger("SyncCog")
+
+# Membros ativos cuja última verificação é mais antiga que N segundos.
+# A ordem por last_checked_at torna o processo retomável: cada lote gravado sai da fila.
+STALE_QUERY = """
+SELECT guild_id, user_id, albion_player_id, albion_nick, albion_guild_id,
+       albion_guild_name, albion_alliance_tag, membership
+FROM guild_members
+WHERE status = 'ACTIVE'
+  AND (last_checked_at IS NULL OR last_checked_at < NOW() - make_interval(secs => $1))
+ORDER BY last_checked_at NULLS FIRST
+LIMIT $2;
+"""
+
+UPDATE_QUERY = """
+UPDATE guild_members AS gm SET
+    albion_player_id = COALESCE(v.player_id, gm.albion_player_id),
+    albion_guild_id = CASE WHEN v.found THEN v.albion_guild_id ELSE gm.albion_guild_id END,
+    albion_guild_name = CASE WHEN v.found THEN v.albion_guild_name ELSE gm.albion_guild_name END,
+    albion_alliance_tag = CASE WHEN v.found THEN v.albion_alliance_tag ELSE gm.albion_alliance_tag END,
+    status = v.status,
+    last_checked_at = NOW()
+FROM unnest($1::bigint[], $2::bigint[], $3::boolean[], $4::text[], $5::text[], $6::text[], $7::text[], $8::text[])
+    AS v(guild_id, user_id, found, player_id, albion_guild_id, albion_guild_name, albion_alliance_tag, status)
+WHERE gm.guild_id = v.guild_id AND gm.user_id = v.user_id;
+"""
+
 
 class SyncCog(commands.Cog):
+    """Verificação periódica do roster registrado contra a API do Albion."""
+
     def __init__(self, bot):
         self.bot = bot
+        self._lock = asyncio.Lock()
+        self.last_report = None
+
+    async def cog_load(self):
+        if Config.SYNC_ENABLED:
+            self.sync_loop.start()
+
+    async def cog_unload(self):
+        self.sync_loop.cancel()
+
+    @tasks.loop(minutes=Config.SYNC_INTERVAL_MINUTES)
+    async def sync_loop(self):
+        # Com vários processos, só o líder verifica o roster (a API do Albion limita por IP)
+        if not self.bot.leader.is_leader:
+            return
+        try:
+            await self.run_sync()
+        except Exception as e:
+            logger.error(f"Erro no ciclo de sincronização: {e}")
+
+    @sync_loop.before_loop
+    async def before_sync_loop(self):
+        await self.bot.wait_until_ready()
+
+    async def run_sync(self):
+        """Verifica, em lotes, os membros com verificação vencida."""
+        if self._lock.locked():
+            logger.info("Sincronização já em andamento, ignorando.")
+            return self.last_report
+
+        async with self._lock:
+            started = time.monotonic()
+            checked = left = 0
+            aborted = False
+
+            while checked < Config.SYNC_MAX_PER_RUN:
+                rows = await self.bot.db.fetch_query(
+                    STALE_QUERY, Config.SYNC_STALE_HOURS * 3600, Config.SYNC_CHUNK_SIZE
+                )
+                if not rows:
+                    break
+
+                try:
+                    results = await self._verify_chunk(rows)
+                except AlbionAPIUnavailable as e:
+                    # Nada do lote é marcado: será retomado no próximo ciclo
+                    logger.warning(f"Sincronização interrompida, API indisponível: {e}")
+                    aborted = True
+                    break
+
+                removals = await self._persist(results)
+                await self._apply_removals(removals)
+
+                checked += len(results)
+                left += sum(len(items) for items in removals.values())
+
+            elapsed = time.monotonic() - started
+            self.last_report = {
+                "checked": checked,
+                "left": left,
+                "seconds": elapsed,
+                "per_minute": (checked / elapsed * 60) if elapsed > 0 else 0.0,
+                "aborted": aborted,
+                "finished_at": discord.utils.utcnow(),
+            }
+            if checked:
+                logger.info(
+                    f"Sincronização: {checked} membros verificados, {left} removidos "
+                    f"em {elapsed:.1f}s ({self.last_report['per_minute']:.0f} membros/min)"
+                )
+            return self.last_report
+
+    async def _verify_chunk(self, rows):
+        """Busca os jogadores do lote com paralelismo limitado e compara com o estado salvo.
+
+        Baixa primeiro o roster de cada guilda conhecida do lote (uma chamada por guilda);
+        só quem não aparece no roster da guilda registrada é consultado individualmente.
+        """
+        semaphore = asyncio.Semaphore(Config.SYNC_CONCURRENCY)
+        rosters = {}
+
+        async def load_roster(albion_guild_id):
+            async with semaphore:
+                rosters[albion_guild_id] = await self.bot.albion.get_guild_members(
+                    albion_guild_id, priority=Priority.BACKGROUND
+                )
+
+        guild_ids = {row['albion_guild_id'] for row in rows if row['albion_guild_id']}
+        await asyncio.gather(*(load_roster(guild_id) for guild_id in guild_ids))
+
+        async def verify(row):
+            info = self._from_roster(row, rosters.get(row['albion_guild_id']))
+            if info is None:
+                async with semaphore:
+                    info = await self._fetch_player(row)
+            config = await self.bot.config_cache.get(row['guild_id'])
+            return row, info, self._still_valid(row, info, config), config
+
+        return await asyncio.gather(*(verify(row) for row in rows))
+
+    @staticmethod
+    def _from_roster(row, roster):
+        if not roster:
+            return None
+        if row['albion_player_id']:
+            return roster.by_id.get(row['albion_player_id'])
+        if row['albion_nick']:
+            return roster.by_name.get(row['albion_nick'].lower())
+        return None
+
+    async def _fetch_player(self, row):
+        player_id = row['albion_player_id']
+        if player_id:
+            return await self.bot.albion.get_player_info(player_id, priority=Priority.BACKGROUND)
+        if row['albion_nick']:
+            return await self.bot.albion.resolve_player(row['albion_nick'], priority=Priority.BACKGROUND)
+        return None
+
+    @staticmethod
+    def _still_valid(row, info, config):
+        """Compara a guilda/aliança atual do jogador com o estado registrado."""
+        if info is None or config is None:
+            # Sem dados suficientes para decidir: mantém o membro
+            return True
+        if row['membership'] == ALLY:
+            return not config.alliance_tag or info.get('AllianceTag') == config.alliance_tag
+        # Modo guilda: compara com a guilda do Albion configurada no servidor
+        return not config.albion_guild_id or info.get('GuildId') == config.albion_guild_id
+
+    async def _persist(self, results):
+        """Grava o resultado do lote num único UPDATE e devolve as remoções de cargo por servidor."""
+        columns = [[] for _ in range(8)]
+        removals = defaultdict(list)
+
+        for row, info, valid, config in results:
+            values = (
+                row['guild_id'], row['user_id'], info is not None,
+                (info or {}).get('Id'),
+                (info or {}).get('GuildId') or None,
+                (info or {}).get('GuildName') or None,
+                (info or {}).get('AllianceTag') or None,
+                'ACTIVE' if valid else 'LEFT',
+            )
+            for column, value in zip(columns, values):
+                column.append(value)
+
+            if not valid:
+                role_id = config.ally_role_id if row['membership'] == ALLY else config.member_role_id
+                removals[row['guild_id']].append((row['user_id'], role_id))
+
+        await self.bot.db.execute_query(UPDATE_QUERY, *columns)
+        return removals
+
+    async def _apply_removals(self, removals):
+        """Remove os cargos de quem saiu pela fila de alterações (drenada por servidor).
+
+        Servidores de shards de outros processos não estão no cache deste: o líder
+        remove os cargos direto pela API REST, em série por servidor.
+        """
+        pending = []
+        remote = []
+        for guild_id, items in removals.items():
+            guild = self.bot.get_guild(guild_id)
+            if not guild:
+                if not self.bot.owns_guild(guild_id):
+                    remote.append(self._remove_remote(guild_id, items))
+                continue
+            # Quem não está no cache (modo relevant) vem do gateway em lotes de 100
+            members = await self.bot.member_cache.fetch(guild, [user_id for user_id, _ in items])
+            for user_id, role_id in items:
+                member = members.get(user_id)
+                role = guild.get_role(role_id) if role_id else None
+                if not member or not role or role not in member.roles:
+                    continue
+                pending.append((guild, user_id, self.bot.member_mutations.submit(
+                    guild, member, remove=[role], reason="O Vigia: verificação automática"
+                )))
+
+        results = await asyncio.gather(*(future for _, _, future in pending), *remote, return_exceptions=True)
+        for (guild, user_id, _), result in zip(pending, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Falha ao remover cargo de {user_id} em {guild.name}: {result}")
+
+    async def _remove_remote(self, guild_id, items):
+        for user_id, role_id in items:
+            if not role_id:
+                continue
+            try:
+                await self.bot.http.remove_role(guild_id, user_id, role_id, reason="O Vigia: verificação automática")
+            except discord.NotFound:
+                pass
+            except discord.HTTPException as e:
+                logger.warning(f"Falha ao remover cargo de {user_id} no servidor {guild_id}: {e}")
+            await asyncio.sleep(Config.MEMBER_EDIT_DELAY)
+
+    @app_commands.command(name="sync_status", description="🔄 Estado da verificação automática do roster")
+    @app_commands.default_permissions(administrator=True)
+    async def sync_status(self, interaction: discord.Interaction):
+        report = self.last_report
+        if not report:
+            await interaction.response.send_message("ℹ️ Nenhuma sincronização concluída ainda.", ephemeral=True)
+            return
+
+        msg = (
+            f"🔄 **Última sincronização** ({discord.utils.format_dt(report['finished_at'], 'R')})\n"
+            f"Verificados: `{report['checked']}` | Removidos: `{report['left']}`\n"
+            f"Duração: `{report['seconds']:.1f}s` | Vazão: `{report['per_minute']:.0f} membros/min`"
+        )
+        if report['aborted']:
+            msg += "\n⚠️ Interrompida por indisponibilidade da API (será retomada)."
+        await interaction.response.send_message(msg, ephemeral=True)
 
 async def setup(bot):
-    await bot.add_cog(SyncCog(bot))
\ No newline at end of file
+    await bot.add_cog(SyncCog(bot))
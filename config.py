@@ -16,6 +16,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger("Config")
 
+
+def _parse_shard_ids(value):
+    """'0-3' ou '0,2,5' -> lista de ids; vazio -> None (todos os shards neste processo)."""
+    ids = []
+    for part in filter(None, (p.strip() for p in value.split(","))):
+        start, _, end = part.partition("-")
+        ids.extend(range(int(start), int(end or start) + 1))
+    return sorted(set(ids)) or None
+
+
 class Config:
     """Centraliza e valida as configurações do bot."""
     
@@ -30,6 +40,129 @@ class Config:
     DB_PORT = None
     DB_NAME = None
 
+    # Porta para conexões diretas/de sessão (LISTEN/NOTIFY não funciona no Transaction Pooler)
+    DB_DIRECT_PORT = os.getenv("DB_DIRECT_PORT")
+
+    # Sharding: SHARD_COUNT é o total e SHARD_IDS os shards deste processo ("0-3" ou "0,2").
+    # Sem SHARD_IDS, um único processo conecta todos os shards (quantidade escolhida pelo Discord)
+    SHARD_COUNT = int(os.getenv("SHARD_COUNT")) if os.getenv("SHARD_COUNT") else None
+    SHARD_IDS = _parse_shard_ids(os.getenv("SHARD_IDS", ""))
+
+    # Eleição de líder (advisory lock numa conexão direta): só o líder roda tarefas únicas,
+    # como a verificação do roster. Ligada por padrão quando há vários processos
+    LEADER_ELECTION = os.getenv("LEADER_ELECTION", "true" if os.getenv("SHARD_IDS") else "false").lower() == "true"
+    LEADER_CHECK_SECONDS = float(os.getenv("LEADER_CHECK_SECONDS", "10"))
+
+    # Pool de conexões (o Transaction Pooler do Supabase limita conexões por projeto)
+    DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+    DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    DB_CONNECT_TIMEOUT = float(os.getenv("DB_CONNECT_TIMEOUT", "30"))
+    DB_COMMAND_TIMEOUT = float(os.getenv("DB_COMMAND_TIMEOUT", "30"))
+    # Espera máxima por uma conexão livre antes de falhar com DatabaseBusy
+    DB_ACQUIRE_TIMEOUT = float(os.getenv("DB_ACQUIRE_TIMEOUT", "3"))
+    # Reciclagem: conexões ociosas por mais que isso são fechadas; cada conexão atende no máximo N queries
+    DB_MAX_IDLE_SECONDS = float(os.getenv("DB_MAX_IDLE_SECONDS", "300"))
+    DB_MAX_QUERIES = int(os.getenv("DB_MAX_QUERIES", "50000"))
+    DB_HEALTH_CHECK_SECONDS = float(os.getenv("DB_HEALTH_CHECK_SECONDS", "30"))
+
+    # Cache de configuração por servidor
+    CONFIG_CACHE_TTL = int(os.getenv("CONFIG_CACHE_TTL", "300"))
+    # Com vários processos (SHARD_IDS), o NOTIFY mantém os caches coerentes entre eles
+    CONFIG_CACHE_LISTEN = os.getenv("CONFIG_CACHE_LISTEN", "true" if os.getenv("SHARD_IDS") else "false").lower() == "true"
+
+    # Cache de respostas da API do Albion (TTLs em segundos)
+    ALBION_CACHE_SIZE = int(os.getenv("ALBION_CACHE_SIZE", "5000"))
+    ALBION_SEARCH_TTL = int(os.getenv("ALBION_SEARCH_TTL", "300"))
+    ALBION_PLAYER_TTL = int(os.getenv("ALBION_PLAYER_TTL", "120"))
+    ALBION_NEGATIVE_TTL = int(os.getenv("ALBION_NEGATIVE_TTL", "60"))
+    ALBION_ROSTER_TTL = int(os.getenv("ALBION_ROSTER_TTL", "900"))
+    PLAYER_INDEX_FLUSH_SECONDS = float(os.getenv("PLAYER_INDEX_FLUSH_SECONDS", "30"))
+    # Nomes mantidos em memória (os vistos mais recentemente); o resto fica só no banco
+    PLAYER_INDEX_MAX_SIZE = int(os.getenv("PLAYER_INDEX_MAX_SIZE", "50000"))
+
+    # Histórico de fama (player_snapshots)
+    SNAPSHOT_FLUSH_SECONDS = float(os.getenv("SNAPSHOT_FLUSH_SECONDS", "60"))
+    SNAPSHOT_MEMORY_SIZE = int(os.getenv("SNAPSHOT_MEMORY_SIZE", "20000"))
+    SNAPSHOT_MEMORY_TTL = int(os.getenv("SNAPSHOT_MEMORY_TTL", "86400"))
+    SNAPSHOT_MAX_PENDING = int(os.getenv("SNAPSHOT_MAX_PENDING", "10000"))
+
+    # Cliente HTTP da API do Albion
+    ALBION_HTTP_LIMIT = int(os.getenv("ALBION_HTTP_LIMIT", "50"))
+    ALBION_HTTP_LIMIT_PER_HOST = int(os.getenv("ALBION_HTTP_LIMIT_PER_HOST", "20"))
+    ALBION_KEEPALIVE = float(os.getenv("ALBION_KEEPALIVE", "30"))
+    ALBION_DNS_TTL = int(os.getenv("ALBION_DNS_TTL", "300"))
+    ALBION_TIMEOUT = float(os.getenv("ALBION_TIMEOUT", "8"))
+    ALBION_CONNECT_TIMEOUT = float(os.getenv("ALBION_CONNECT_TIMEOUT", "3"))
+    ALBION_MAX_RETRIES = int(os.getenv("ALBION_MAX_RETRIES", "3"))
+    ALBION_BREAKER_THRESHOLD = int(os.getenv("ALBION_BREAKER_THRESHOLD", "5"))
+    ALBION_BREAKER_COOLDOWN = float(os.getenv("ALBION_BREAKER_COOLDOWN", "30"))
+
+    # Metadados de guildas do Albion (nome, tag, aliança): idade máxima (s), intervalo da
+    # atualização em segundo plano, requisições simultâneas e guildas por rodada
+    GUILD_METADATA_TTL = int(os.getenv("GUILD_METADATA_TTL", "21600"))
+    GUILD_METADATA_REFRESH_SECONDS = float(os.getenv("GUILD_METADATA_REFRESH_SECONDS", "600"))
+    GUILD_METADATA_CONCURRENCY = int(os.getenv("GUILD_METADATA_CONCURRENCY", "3"))
+    GUILD_METADATA_BATCH = int(os.getenv("GUILD_METADATA_BATCH", "100"))
+
+    # Limite de taxa (requisições/s sustentadas e rajada máxima) para a API do Albion
+    ALBION_RATE_LIMIT = float(os.getenv("ALBION_RATE_LIMIT", "4"))
+    ALBION_RATE_BURST = int(os.getenv("ALBION_RATE_BURST", "8"))
+
+    # Verificação automática do roster (SyncCog)
+    SYNC_ENABLED = os.getenv("SYNC_ENABLED", "true").lower() == "true"
+    SYNC_INTERVAL_MINUTES = float(os.getenv("SYNC_INTERVAL_MINUTES", "30"))
+    SYNC_STALE_HOURS = float(os.getenv("SYNC_STALE_HOURS", "12"))
+    SYNC_CHUNK_SIZE = int(os.getenv("SYNC_CHUNK_SIZE", "200"))
+    SYNC_CONCURRENCY = int(os.getenv("SYNC_CONCURRENCY", "5"))
+    SYNC_MAX_PER_RUN = int(os.getenv("SYNC_MAX_PER_RUN", "5000"))
+
+    # Cache de membros: "relevant" (registrados e pendentes; demais buscados sob demanda),
+    # "lazy" (sem chunk na conexão) ou "full" (chunk de todos os servidores, como antes)
+    MEMBER_CACHE_MODE = os.getenv("MEMBER_CACHE_MODE", "relevant").lower()
+
+    # Fila de alterações de membros (cargos + nick num único PATCH), pausa entre chamadas por servidor
+    MEMBER_EDIT_DELAY = float(os.getenv("MEMBER_EDIT_DELAY", os.getenv("SYNC_ROLE_DELAY", "0.5")))
+
+    # Resumo de pedidos: em vez de um card por pedido, junta os que chegam na janela (s) numa
+    # mensagem paginada com aprovação/rejeição em lote; envia antes se o lote chegar ao máximo
+    APPROVAL_DIGEST = os.getenv("APPROVAL_DIGEST", "false").lower() == "true"
+    APPROVAL_DIGEST_WINDOW = float(os.getenv("APPROVAL_DIGEST_WINDOW", "60"))
+    APPROVAL_DIGEST_MAX = int(os.getenv("APPROVAL_DIGEST_MAX", "25"))
+    APPROVAL_DIGEST_PAGE_SIZE = int(os.getenv("APPROVAL_DIGEST_PAGE_SIZE", "5"))
+
+    # Fila de suporte: espera (s) antes de editar o painel fixado, juntando várias mudanças numa edição
+    SUPPORT_PANEL_DEBOUNCE = float(os.getenv("SUPPORT_PANEL_DEBOUNCE", "5"))
+    SUPPORT_PANEL_ITEMS = int(os.getenv("SUPPORT_PANEL_ITEMS", "10"))
+
+    # Sincronização de comandos por servidor
+    COMMAND_SYNC_CONCURRENCY = int(os.getenv("COMMAND_SYNC_CONCURRENCY", "4"))
+    COMMAND_SYNC_DELAY = float(os.getenv("COMMAND_SYNC_DELAY", "1"))
+
+    # Gravação em lote do recruitment_log
+    LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "100"))
+    LOG_FLUSH_SECONDS = float(os.getenv("LOG_FLUSH_SECONDS", "5"))
+    LOG_MAX_QUEUE = int(os.getenv("LOG_MAX_QUEUE", "10000"))
+
+    # Tempo máximo (s) que a inicialização espera pelo banco antes de subir degradada
+    STARTUP_DB_TIMEOUT = float(os.getenv("STARTUP_DB_TIMEOUT", "5"))
+
+    # Tempo máximo (s) que um comando espera pela API antes de responder ao usuário
+    INTERACTION_BUDGET = float(os.getenv("INTERACTION_BUDGET", "10"))
+
+    # Endpoint local de métricas (formato Prometheus); só escuta em localhost por padrão
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+
+    # Rastreamento de interações: grava uma linha JSON (log e, se definido, TRACE_FILE) acima do limite
+    TRACE_ENABLED = os.getenv("TRACE_ENABLED", "true").lower() == "true"
+    TRACE_SLOW_SECONDS = float(os.getenv("TRACE_SLOW_SECONDS", "3"))
+    TRACE_FILE = os.getenv("TRACE_FILE", "")
+
+    # Profiler sob demanda (/perfil): pasta dos .prof e duração máxima
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+    PROFILE_MAX_SECONDS = int(os.getenv("PROFILE_MAX_SECONDS", "300"))
+
     @classmethod
     def validate(cls):
         """Valida se as configurações críticas estão presentes."""
@@ -39,6 +172,18 @@ class Config:
         if not cls.DATABASE_URL:
             logger.critical("DATABASE_URL não encontrada nas variáveis de ambiente!")
             return False
+        if cls.SHARD_IDS and not cls.SHARD_COUNT:
+            logger.critical("SHARD_IDS exige SHARD_COUNT (total de shards de todos os processos).")
+            return False
+        if cls.SHARD_IDS and max(cls.SHARD_IDS) >= cls.SHARD_COUNT:
+            logger.critical(f"SHARD_IDS {cls.SHARD_IDS} fora do intervalo de SHARD_COUNT={cls.SHARD_COUNT}.")
+            return False
+        if cls.LEADER_ELECTION and not cls.DB_DIRECT_PORT:
+            logger.critical(
+                "LEADER_ELECTION exige DB_DIRECT_PORT (o advisory lock de sessão não se mantém no "
+                "Transaction Pooler). Sem pooler, use a própria porta do banco."
+            )
+            return False
         
         # Parse da URL do Banco
         return cls._parse_database_url()
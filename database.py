@@ -1,80 +1,280 @@
 import asyncpg
 import logging
 import asyncio
+import time
+from contextlib import asynccontextmanager
 from config import Config
+from utils.metrics import DB_POOL_WAIT_SECONDS, DB_POOL_TIMEOUTS, DB_QUERY_SECONDS, statement_name
+from utils.resilience import LatencyTracker
+from utils.tracing import span
 
 logger = logging.getLogger("Database")
 
+
+class DatabaseBusy(Exception):
+    """Sem banco no momento: pool ainda não conectado ou nenhuma conexão livre em DB_ACQUIRE_TIMEOUT."""
+
+
 class DatabaseManager:
     """Gerencia a conexão e operações com o banco de dados PostgreSQL."""
-    
+
+    # Intervalo mínimo entre avisos de pool saturado
+    SATURATION_WARN_SECONDS = 60
+
     def __init__(self):
         self.pool = None
+        self.listen_conn = None
+        self._connect_lock = asyncio.Lock()
+        self._health_task = None
+        self._waiting = 0
+        self._peak_in_use = 0
+        self._last_saturation_warning = 0.0
+        self.acquire_times = LatencyTracker()
+        self.acquired = 0
+        self.timeouts = 0
+        self.health_failures = 0
+        self.recycled = 0
+        self.last_health_check = None
 
     async def connect(self):
-        """Cria o pool de conexões."""
+        """Cria o pool de conexões (uma vez só, mesmo com chamadas concorrentes)."""
         if not Config.DB_HOST:
             logger.critical("Tentativa de conexão sem configuração de DB válida.")
             raise ValueError("Configuração de DB inválida")
 
-        try:
-            logger.info(f"Conectando ao banco de dados em {Config.DB_HOST}...")
-            self.pool = await asyncpg.create_pool(
-                user=Config.DB_USER,
-                password=Config.DB_PASSWORD,
-                host=Config.DB_HOST,
-                port=Config.DB_PORT,
-                database=Config.DB_NAME,
-                # CRÍTICO: statement_cache_size=0 para Supabase Transaction Mode
-                statement_cache_size=0,
-                min_size=1,
-                max_size=10,
-                timeout=30,
-                command_timeout=30
-            )
-            logger.info("Conexão com PostgreSQL estabelecida com sucesso.")
-        except Exception as e:
-            logger.critical(f"Falha fatal na conexão com DB: {e}")
-            raise e
+        async with self._connect_lock:
+            if self.pool:
+                return
+            try:
+                logger.info(f"Conectando ao banco de dados em {Config.DB_HOST}...")
+                self.pool = await asyncpg.create_pool(
+                    user=Config.DB_USER,
+                    password=Config.DB_PASSWORD,
+                    host=Config.DB_HOST,
+                    port=Config.DB_PORT,
+                    database=Config.DB_NAME,
+                    # CRÍTICO: statement_cache_size=0 para Supabase Transaction Mode
+                    statement_cache_size=0,
+                    min_size=Config.DB_POOL_MIN_SIZE,
+                    max_size=Config.DB_POOL_MAX_SIZE,
+                    max_queries=Config.DB_MAX_QUERIES,
+                    max_inactive_connection_lifetime=Config.DB_MAX_IDLE_SECONDS,
+                    timeout=Config.DB_CONNECT_TIMEOUT,
+                    command_timeout=Config.DB_COMMAND_TIMEOUT
+                )
+                logger.info(
+                    f"Conexão com PostgreSQL estabelecida com sucesso "
+                    f"(pool {Config.DB_POOL_MIN_SIZE}-{Config.DB_POOL_MAX_SIZE})."
+                )
+            except Exception as e:
+                logger.critical(f"Falha fatal na conexão com DB: {e}")
+                raise e
+
+            if Config.DB_HEALTH_CHECK_SECONDS > 0:
+                self._health_task = asyncio.create_task(self._health_loop())
+
+    async def listen(self, channel, callback):
+        """Escuta um canal NOTIFY numa conexão dedicada.
+
+        O Transaction Pooler não mantém LISTEN entre transações, por isso é
+        aberta uma conexão direta (DB_DIRECT_PORT, ou a porta padrão).
+        """
+        if not self.listen_conn or self.listen_conn.is_closed():
+            self.listen_conn = await self.connect_direct()
+        await self.listen_conn.add_listener(channel, callback)
+        logger.info(f"Escutando notificações no canal '{channel}'.")
+
+    async def connect_direct(self):
+        """Abre uma conexão avulsa, fora do pool, na porta direta/de sessão.
+
+        Usada para o que depende de estado de sessão (LISTEN, advisory locks de sessão),
+        que o Transaction Pooler não preserva. Quem abre é responsável por fechar.
+        """
+        return await asyncpg.connect(
+            user=Config.DB_USER,
+            password=Config.DB_PASSWORD,
+            host=Config.DB_HOST,
+            port=Config.DB_DIRECT_PORT or Config.DB_PORT,
+            database=Config.DB_NAME,
+            statement_cache_size=0,
+            timeout=30
+        )
 
     async def close(self):
         """Fecha o pool de conexões."""
+        if self._health_task:
+            self._health_task.cancel()
+            self._health_task = None
+        if self.listen_conn and not self.listen_conn.is_closed():
+            await self.listen_conn.close()
+            self.listen_conn = None
         if self.pool:
             await self.pool.close()
+            self.pool = None
             logger.info("Conexão com DB fechada.")
 
-    async def execute_query(self, query, *args):
-        """Executa queries de escrita (INSERT, UPDATE, DELETE)."""
+    async def _health_loop(self):
+        """Testa uma conexão periodicamente; após falhas seguidas, recicla o pool inteiro.
+
+        Conexões derrubadas pelo pooler (reinício, failover) ficariam no pool até
+        o próximo uso falhar; `expire_connections` faz o asyncpg reabri-las.
+        """
+        failures = 0
+        while True:
+            await asyncio.sleep(Config.DB_HEALTH_CHECK_SECONDS)
+            if self.pool.get_idle_size() == 0:
+                # Todas as conexões em uso (e funcionando): não disputa o pool
+                continue
+            try:
+                async with self._acquire() as conn:
+                    await conn.fetchval("SELECT 1", timeout=Config.DB_ACQUIRE_TIMEOUT)
+                failures = 0
+                self.last_health_check = time.time()
+            except DatabaseBusy:
+                # Pool ocupado não é pool doente
+                continue
+            except Exception as e:
+                failures += 1
+                self.health_failures += 1
+                logger.warning(f"Health check do banco falhou ({failures}x): {e}")
+                if failures >= 2:
+                    await self.pool.expire_connections()
+                    self.recycled += 1
+                    failures = 0
+                    logger.warning("Conexões do pool recicladas após falhas no health check.")
+
+    def _warn_if_saturated(self):
+        now = time.monotonic()
+        if now - self._last_saturation_warning < self.SATURATION_WARN_SECONDS:
+            return
+        self._last_saturation_warning = now
+        stats = self.stats()
+        logger.warning(
+            f"Pool do banco saturado: {stats['in_use']}/{stats['max']} em uso, "
+            f"{stats['waiting']} aguardando. Considere aumentar DB_POOL_MAX_SIZE."
+        )
+
+    @asynccontextmanager
+    async def _acquire(self):
+        """Pega uma conexão do pool medindo o tempo de espera.
+
+        Levanta DatabaseBusy se nenhuma conexão ficar livre em DB_ACQUIRE_TIMEOUT,
+        para o comando responder ao usuário em vez de esperar o timeout do Discord.
+        Sem pool (banco fora no início), falha na hora: quem reconecta é o bot, em
+        segundo plano, e cada comando não deve esperar DB_CONNECT_TIMEOUT na fila do lock.
+        """
         if not self.pool:
-            await self.connect()
+            raise DatabaseBusy("Banco de dados indisponível; tente novamente em instantes.")
 
+        started = time.perf_counter()
+        self._waiting += 1
+        if self.pool.get_idle_size() == 0 and self.pool.get_size() >= self.pool.get_max_size():
+            self._warn_if_saturated()
         try:
-            async with self.pool.acquire() as conn:
-                return await conn.execute(query, *args)
+            with span("db.acquire"):
+                conn = await self.pool.acquire(timeout=Config.DB_ACQUIRE_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            DB_POOL_TIMEOUTS.inc()
+            logger.error(f"Nenhuma conexão livre no pool em {Config.DB_ACQUIRE_TIMEOUT:g}s ({self._waiting} aguardando).")
+            raise DatabaseBusy("Banco de dados ocupado; tente novamente em instantes.") from None
+        finally:
+            self._waiting -= 1
+        waited = time.perf_counter() - started
+        DB_POOL_WAIT_SECONDS.observe(waited)
+        self.acquire_times.record("acquire", waited)
+        self.acquired += 1
+        self._peak_in_use = max(self._peak_in_use, self.pool.get_size() - self.pool.get_idle_size())
+        try:
+            yield conn
+        finally:
+            await self.pool.release(conn)
+
+    def stats(self):
+        """Uso do pool: conexões abertas/livres/em uso, fila de espera e timeouts."""
+        if self.pool:
+            size, idle, maximum = self.pool.get_size(), self.pool.get_idle_size(), self.pool.get_max_size()
+        else:
+            size, idle, maximum = 0, 0, Config.DB_POOL_MAX_SIZE
+        return {
+            "connected": self.pool is not None,
+            "size": size,
+            "idle": idle,
+            "in_use": size - idle,
+            "max": maximum,
+            "waiting": self._waiting,
+            "peak_in_use": self._peak_in_use,
+            "utilization": (size - idle) / maximum,
+            "acquired": self.acquired,
+            "timeouts": self.timeouts,
+            "health_failures": self.health_failures,
+            "recycled": self.recycled,
+            "wait": self.acquire_times.percentiles("acquire"),
+        }
+
+    async def execute_query(self, query, *args):
+        """Executa queries de escrita (INSERT, UPDATE, DELETE)."""
+        try:
+            async with self._acquire() as conn:
+                statement = statement_name(query)
+                with span(f"db {statement}"), DB_QUERY_SECONDS.time(statement=statement):
+                    return await conn.execute(query, *args)
         except Exception as e:
             logger.error(f"Erro em execute_query: {e} | Query: {query}")
             raise e
 
     async def fetchrow_query(self, query, *args):
         """Busca uma única linha (SELECT)."""
-        if not self.pool:
-            await self.connect()
-
         try:
-            async with self.pool.acquire() as conn:
-                return await conn.fetchrow(query, *args)
+            async with self._acquire() as conn:
+                statement = statement_name(query)
+                with span(f"db {statement}"), DB_QUERY_SECONDS.time(statement=statement):
+                    return await conn.fetchrow(query, *args)
         except Exception as e:
             logger.error(f"Erro em fetchrow_query: {e} | Query: {query}")
             raise e
 
     async def fetch_query(self, query, *args):
         """Busca múltiplas linhas (SELECT)."""
-        if not self.pool:
-            await self.connect()
-
         try:
-            async with self.pool.acquire() as conn:
-                return await conn.fetch(query, *args)
+            async with self._acquire() as conn:
+                statement = statement_name(query)
+                with span(f"db {statement}"), DB_QUERY_SECONDS.time(statement=statement):
+                    return await conn.fetch(query, *args)
         except Exception as e:
             logger.error(f"Erro em fetch_query: {e} | Query: {query}")
-            raise e
\ No newline at end of file
+            raise e
+
+    async def executemany(self, query, args):
+        """Executa a mesma query para várias linhas numa única conexão (INSERT/UPDATE em lote)."""
+        try:
+            async with self._acquire() as conn:
+                statement = statement_name(query)
+                with span(f"db {statement}"), DB_QUERY_SECONDS.time(statement=statement):
+                    return await conn.executemany(query, args)
+        except Exception as e:
+            logger.error(f"Erro em executemany: {e} | Query: {query}")
+            raise e
+
+    async def copy_records_to_table(self, table, records, columns=None):
+        """Insere muitas linhas via COPY (o caminho mais rápido para inserções em massa)."""
+        try:
+            async with self._acquire() as conn:
+                with span(f"db copy {table}", rows=len(records)), DB_QUERY_SECONDS.time(statement=f"copy {table}"):
+                    return await conn.copy_records_to_table(table, records=records, columns=columns)
+        except Exception as e:
+            logger.error(f"Erro em copy_records_to_table: {e} | Tabela: {table}")
+            raise e
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Executa vários comandos numa única conexão e transação.
+
+        Uso:
+            async with db.transaction() as conn:
+                await conn.execute(...)
+                await conn.executemany(...)
+        """
+        async with self._acquire() as conn:
+            async with conn.transaction():
+                yield conn
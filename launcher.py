@@ -0,0 +1,136 @@
+"""Sobe N processos do bot no mesmo host, dividindo os shards entre eles.
+
+Cada processo recebe SHARD_COUNT (total) e um intervalo contíguo de SHARD_IDS, além
+de uma porta de métricas própria. Processos que morrem são reiniciados com backoff;
+enquanto isso, a eleição de líder (utils.leader) passa as tarefas únicas a outro.
+
+Uso (a partir da raiz do projeto):
+    python launcher.py --processes 4                # total de shards recomendado pelo Discord
+    python launcher.py --processes 4 --shards 16
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import sys
+import time
+import aiohttp
+from config import Config
+
+logger = logging.getLogger("Launcher")
+
+GATEWAY_URL = "https://discord.com/api/v10/gateway/bot"
+
+# Um processo que ficou de pé por esse tempo volta ao backoff mínimo
+STABLE_SECONDS = 300
+MAX_RESTART_DELAY = 60
+
+
+async def recommended_shards():
+    """Total de shards recomendado pelo Discord para o bot (None se não der para consultar)."""
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(GATEWAY_URL, headers={"Authorization": f"Bot {Config.DISCORD_TOKEN}"}) as resp:
+                if resp.status != 200:
+                    logger.warning(f"Discord respondeu {resp.status} ao consultar /gateway/bot.")
+                    return None
+                return (await resp.json())["shards"]
+    except aiohttp.ClientError as e:
+        logger.warning(f"Não foi possível consultar /gateway/bot: {e}")
+        return None
+
+
+def shard_ranges(total, processes):
+    """Divide 0..total-1 em `processes` intervalos contíguos (os primeiros levam a sobra)."""
+    ranges, start = [], 0
+    for i in range(processes):
+        size = total // processes + (1 if i < total % processes else 0)
+        ranges.append((start, start + size - 1))
+        start += size
+    return ranges
+
+
+class Worker:
+    def __init__(self, index, shard_count, shard_range, metrics_port):
+        self.index = index
+        self.env = {
+            **os.environ,
+            "SHARD_COUNT": str(shard_count),
+            "SHARD_IDS": f"{shard_range[0]}-{shard_range[1]}",
+            "METRICS_PORT": str(metrics_port),
+        }
+        self.label = f"processo {index} (shards {shard_range[0]}-{shard_range[1]})"
+        self.process = None
+        self.restarts = 0
+
+    async def run(self, stopping):
+        delay = 1
+        while not stopping.is_set():
+            started = time.monotonic()
+            self.process = await asyncio.create_subprocess_exec(sys.executable, "bot.py", env=self.env)
+            logger.info(f"{self.label} iniciado (pid {self.process.pid}).")
+            code = await self.process.wait()
+            if stopping.is_set():
+                break
+
+            if time.monotonic() - started >= STABLE_SECONDS:
+                delay = 1
+            self.restarts += 1
+            logger.error(f"{self.label} saiu com código {code}; reiniciando em {delay}s.")
+            try:
+                await asyncio.wait_for(stopping.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 2, MAX_RESTART_DELAY)
+
+    def terminate(self):
+        if self.process and self.process.returncode is None:
+            self.process.terminate()
+
+
+async def main(args):
+    if not Config.validate():
+        raise SystemExit("Configure DISCORD_TOKEN e DATABASE_URL antes de iniciar.")
+
+    total = args.shards or await recommended_shards() or args.processes
+    processes = min(args.processes, total)
+    # Os processos filhos ligam a eleição de líder por padrão (SHARD_IDS definido)
+    if processes > 1 and os.getenv("LEADER_ELECTION", "true").lower() == "true" and not Config.DB_DIRECT_PORT:
+        raise SystemExit("Vários processos exigem DB_DIRECT_PORT para a eleição de líder.")
+    ranges = shard_ranges(total, processes)
+    logger.info(f"Iniciando {processes} processos para {total} shards: {ranges}")
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    workers = [Worker(i, total, r, args.metrics_port + i) for i, r in enumerate(ranges)]
+    tasks = []
+    for worker in workers:
+        tasks.append(asyncio.create_task(worker.run(stopping)))
+        # Espaça os IDENTIFY entre processos (o limite de conexões simultâneas vale por bot)
+        try:
+            await asyncio.wait_for(stopping.wait(), args.stagger)
+        except asyncio.TimeoutError:
+            pass
+
+    await stopping.wait()
+    logger.info("Encerrando processos...")
+    for worker in workers:
+        worker.terminate()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    for worker in workers:
+        if worker.process:
+            await worker.process.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Executa o bot em vários processos (shards).")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="processos a iniciar")
+    parser.add_argument("--shards", type=int, help="total de shards (padrão: recomendado pelo Discord)")
+    parser.add_argument("--metrics-port", type=int, default=Config.METRICS_PORT,
+                        help="porta de métricas do primeiro processo; os demais usam as seguintes")
+    parser.add_argument("--stagger", type=float, default=5.0, help="intervalo entre inícios de processos (s)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,388 @@
+"""Migrações versionadas do esquema do banco.
+
+Cada migração tem um número, um nome e uma lista de comandos idempotentes
+(IF NOT EXISTS), aplicados numa transação e registrados em schema_migrations.
+Para mudar o esquema, acrescente uma nova migração ao final de MIGRATIONS;
+nunca edite uma que já foi aplicada.
+
+Uso (a partir da raiz do projeto):
+    python migrations.py            # aplica as migrações pendentes
+    python migrations.py --check    # confere via EXPLAIN se as queries quentes usam índices
+"""
+import argparse
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger("Migrations")
+
+# Chave do pg_advisory_xact_lock: impede que dois processos migrem ao mesmo tempo
+LOCK_KEY = 0x0F161A
+
+MIGRATIONS = [
+    (1, "esquema_inicial", [
+        """
+        CREATE TABLE IF NOT EXISTS server_config (
+            guild_id BIGINT PRIMARY KEY,
+            recruitment_channel_id BIGINT,
+            approval_channel_id BIGINT,
+            member_role_id BIGINT,
+            recruit_role_id BIGINT,
+            ally_role_id BIGINT,
+            alliance_tag TEXT,
+            guild_tag TEXT,
+            min_fame_pve BIGINT DEFAULT 0,
+            min_fame_pvp BIGINT DEFAULT 0,
+            server_type TEXT DEFAULT 'GUILD',
+            created_at TIMESTAMPTZ DEFAULT NOW()
+        );
+        """,
+        # Bancos antigos criados antes da coluna existir
+        "ALTER TABLE server_config ADD COLUMN IF NOT EXISTS server_type TEXT DEFAULT 'GUILD';",
+        """
+        CREATE TABLE IF NOT EXISTS guild_members (
+            guild_id BIGINT NOT NULL,
+            user_id BIGINT NOT NULL,
+            albion_player_id TEXT,
+            albion_nick TEXT,
+            albion_guild_id TEXT,
+            albion_guild_name TEXT,
+            albion_alliance_tag TEXT,
+            membership TEXT DEFAULT 'MEMBER',
+            status TEXT DEFAULT 'ACTIVE',
+            registered_at TIMESTAMPTZ DEFAULT NOW(),
+            last_checked_at TIMESTAMPTZ,
+            PRIMARY KEY (guild_id, user_id)
+        );
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_guild_members_last_checked
+            ON guild_members (last_checked_at NULLS FIRST) WHERE status = 'ACTIVE';
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS albion_players (
+            player_id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            name_lower TEXT NOT NULL,
+            guild_id TEXT,
+            updated_at TIMESTAMPTZ DEFAULT NOW()
+        );
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_albion_players_name_lower
+            ON albion_players (name_lower text_pattern_ops);
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS player_snapshots (
+            id BIGSERIAL PRIMARY KEY,
+            player_id TEXT NOT NULL,
+            captured_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            guild_id TEXT,
+            alliance_id TEXT,
+            pve_fame BIGINT,
+            kill_fame BIGINT,
+            death_fame BIGINT,
+            gathering_fame BIGINT,
+            crafting_fame BIGINT
+        );
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_player_snapshots_player
+            ON player_snapshots (player_id, captured_at DESC);
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS command_sync_state (
+            guild_id BIGINT PRIMARY KEY,
+            tree_hash TEXT NOT NULL,
+            synced_at TIMESTAMPTZ DEFAULT NOW()
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS recruitment_log (
+            id SERIAL PRIMARY KEY,
+            user_id BIGINT,
+            guild_id BIGINT,
+            albion_nick TEXT,
+            status TEXT,
+            reviewed_by BIGINT,
+            created_at TIMESTAMPTZ DEFAULT NOW()
+        );
+        """,
+        # Controle de versão anterior (uma única linha), substituído por schema_migrations
+        "DROP TABLE IF EXISTS schema_version;",
+    ]),
+    (2, "indices_recruitment_log", [
+        # Histórico recente por servidor
+        """
+        CREATE INDEX IF NOT EXISTS idx_recruitment_log_guild_created
+            ON recruitment_log (guild_id, created_at DESC);
+        """,
+        # Histórico de um usuário dentro do servidor
+        """
+        CREATE INDEX IF NOT EXISTS idx_recruitment_log_user
+            ON recruitment_log (user_id, guild_id, created_at DESC);
+        """,
+        # Pedidos pendentes: índice parcial, só cobre a fração ainda em aberto
+        """
+        CREATE INDEX IF NOT EXISTS idx_recruitment_log_pending
+            ON recruitment_log (guild_id, created_at) WHERE status = 'PENDING';
+        """,
+    ]),
+    (3, "applications", [
+        """
+        CREATE TABLE IF NOT EXISTS applications (
+            id BIGSERIAL PRIMARY KEY,
+            guild_id BIGINT NOT NULL,
+            user_id BIGINT NOT NULL,
+            albion_player_id TEXT,
+            albion_nick TEXT NOT NULL,
+            albion_guild_id TEXT,
+            albion_guild_name TEXT,
+            albion_alliance_tag TEXT,
+            status TEXT NOT NULL DEFAULT 'PENDING',
+            channel_id BIGINT,
+            message_id BIGINT,
+            reviewed_by BIGINT,
+            created_at TIMESTAMPTZ DEFAULT NOW(),
+            decided_at TIMESTAMPTZ
+        );
+        """,
+        # No máximo um pedido pendente por usuário; também serve à listagem de pendentes
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_applications_pending
+            ON applications (guild_id, user_id) WHERE status = 'PENDING';
+        """,
+    ]),
+    (4, "fila_de_suporte", [
+        """
+        CREATE TABLE IF NOT EXISTS support_tickets (
+            id BIGSERIAL PRIMARY KEY,
+            guild_id BIGINT NOT NULL,
+            user_id BIGINT NOT NULL,
+            kind TEXT NOT NULL DEFAULT 'TICKET',
+            priority SMALLINT NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'OPEN',
+            subject TEXT NOT NULL,
+            application_id BIGINT,
+            claimed_by BIGINT,
+            closed_by BIGINT,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            claimed_at TIMESTAMPTZ,
+            closed_at TIMESTAMPTZ
+        );
+        """,
+        # Itens abertos na ordem de atendimento (carga inicial e listagem por servidor)
+        """
+        CREATE INDEX IF NOT EXISTS idx_support_tickets_queue
+            ON support_tickets (guild_id, priority DESC, created_at, id) WHERE status = 'OPEN';
+        """,
+        # Um item ativo por usuário e tipo
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_support_tickets_user
+            ON support_tickets (guild_id, user_id, kind) WHERE status <> 'CLOSED';
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_support_tickets_application
+            ON support_tickets (application_id) WHERE application_id IS NOT NULL AND status <> 'CLOSED';
+        """,
+        # Mensagem fixada com o estado da fila, uma por servidor
+        """
+        CREATE TABLE IF NOT EXISTS support_panels (
+            guild_id BIGINT PRIMARY KEY,
+            channel_id BIGINT NOT NULL,
+            message_id BIGINT NOT NULL,
+            updated_at TIMESTAMPTZ DEFAULT NOW()
+        );
+        """,
+    ]),
+    (5, "resumo_de_pedidos", [
+        # Fama no momento do pedido: o resumo é redesenhado a cada página sem chamar a API
+        """
+        ALTER TABLE applications
+            ADD COLUMN IF NOT EXISTS pve_fame BIGINT,
+            ADD COLUMN IF NOT EXISTS kill_fame BIGINT;
+        """,
+        # Vários pedidos na mesma mensagem (resumo): cliques buscam o lote pela mensagem
+        """
+        CREATE INDEX IF NOT EXISTS idx_applications_message
+            ON applications (message_id, id) WHERE message_id IS NOT NULL;
+        """,
+    ]),
+    (6, "metadados_de_guildas", [
+        # Guildas do Albion: nome, tag derivada e aliança, atualizadas em segundo plano
+        """
+        CREATE TABLE IF NOT EXISTS albion_guilds (
+            guild_id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            tag TEXT NOT NULL,
+            alliance_id TEXT,
+            alliance_tag TEXT,
+            alliance_name TEXT,
+            member_count INT,
+            refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        );
+        """,
+        # Atualização periódica (mais antigas primeiro) e recarga do que mudou em outro processo
+        """
+        CREATE INDEX IF NOT EXISTS idx_albion_guilds_refreshed
+            ON albion_guilds (refreshed_at);
+        """,
+    ]),
+    (7, "guilda_do_servidor", [
+        # Guilda do Albion do servidor: o SyncCog compara os membros com ela
+        "ALTER TABLE server_config ADD COLUMN IF NOT EXISTS albion_guild_id TEXT;",
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+# Queries quentes e o índice que cada uma deve usar (conferido por check_indexes)
+HOT_QUERIES = [
+    ("logs recentes do servidor",
+     "SELECT * FROM recruitment_log WHERE guild_id = $1 ORDER BY created_at DESC LIMIT 20",
+     (1,), "idx_recruitment_log_guild_created"),
+    ("logs de um usuário",
+     "SELECT * FROM recruitment_log WHERE user_id = $1 AND guild_id = $2 ORDER BY created_at DESC LIMIT 20",
+     (1, 1), "idx_recruitment_log_user"),
+    ("pedidos pendentes",
+     "SELECT * FROM recruitment_log WHERE guild_id = $1 AND status = 'PENDING' ORDER BY created_at",
+     (1,), "idx_recruitment_log_pending"),
+    ("pedidos pendentes do servidor",
+     "SELECT * FROM applications WHERE guild_id = $1 AND status = 'PENDING'",
+     (1,), "idx_applications_pending"),
+    ("pedidos de um resumo",
+     "SELECT * FROM applications WHERE message_id = $1 ORDER BY id",
+     (1,), "idx_applications_message"),
+    ("fila de suporte do servidor",
+     "SELECT * FROM support_tickets WHERE guild_id = $1 AND status = 'OPEN' ORDER BY priority DESC, created_at, id",
+     (1,), "idx_support_tickets_queue"),
+    ("item de um pedido de registro",
+     "SELECT id FROM support_tickets WHERE application_id = $1 AND status <> 'CLOSED'",
+     (1,), "idx_support_tickets_application"),
+    ("membros a verificar (sync)",
+     "SELECT * FROM guild_members WHERE status = 'ACTIVE' ORDER BY last_checked_at NULLS FIRST LIMIT 100",
+     (), "idx_guild_members_last_checked"),
+    ("histórico de fama",
+     "SELECT * FROM player_snapshots WHERE player_id = $1 ORDER BY captured_at DESC LIMIT 10",
+     ("x",), "idx_player_snapshots_player"),
+    ("guildas do Albion a atualizar",
+     "SELECT guild_id FROM albion_guilds WHERE refreshed_at < NOW() - INTERVAL '6 hours' ORDER BY refreshed_at LIMIT 100",
+     (), "idx_albion_guilds_refreshed"),
+    ("autocomplete de nick",
+     "SELECT name FROM albion_players WHERE name_lower LIKE 'abc%' ORDER BY name_lower LIMIT 25",
+     (), "idx_albion_players_name_lower"),
+]
+
+
+class MigrationRunner:
+    """Aplica as migrações pendentes e registra cada versão em schema_migrations."""
+
+    def __init__(self, db):
+        self.db = db
+
+    async def current_version(self):
+        """Maior versão aplicada (0 se a tabela de controle ainda não existir)."""
+        row = await self.db.fetchrow_query("SELECT to_regclass('schema_migrations') IS NOT NULL AS present")
+        if not row['present']:
+            return 0
+        row = await self.db.fetchrow_query("SELECT MAX(version) AS version FROM schema_migrations")
+        return row['version'] or 0
+
+    async def upgrade(self):
+        """Aplica, em ordem, as migrações que ainda não constam em schema_migrations.
+
+        Cada migração roda em sua própria transação: ou entra inteira, ou não entra.
+        Retorna a lista de versões aplicadas nesta chamada.
+        """
+        if await self.current_version() >= LATEST_VERSION:
+            logger.info(f"Esquema do banco já na versão {LATEST_VERSION}.")
+            return []
+
+        # Sob o mesmo lock das migrações: processos subindo juntos disputariam o
+        # CREATE TABLE no catálogo e um deles falharia com unique violation
+        async with self.db.transaction() as conn:
+            await conn.execute("SELECT pg_advisory_xact_lock($1)", LOCK_KEY)
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at TIMESTAMPTZ DEFAULT NOW()
+                );
+            """)
+
+        applied = []
+        for version, name, statements in MIGRATIONS:
+            async with self.db.transaction() as conn:
+                await conn.execute("SELECT pg_advisory_xact_lock($1)", LOCK_KEY)
+                # Rechecado sob o lock: outro processo pode ter aplicado antes
+                if await conn.fetchval("SELECT 1 FROM schema_migrations WHERE version = $1", version):
+                    continue
+                for statement in statements:
+                    await conn.execute(statement)
+                await conn.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES ($1, $2)", version, name
+                )
+            applied.append(version)
+            logger.info(f"Migração {version} ({name}) aplicada.")
+
+        logger.info(f"Esquema do banco atualizado para a versão {LATEST_VERSION}.")
+        return applied
+
+
+def _index_names(plan):
+    """Nomes de todos os índices usados numa árvore de plano do EXPLAIN (FORMAT JSON)."""
+    names = set()
+    if 'Index Name' in plan:
+        names.add(plan['Index Name'])
+    for child in plan.get('Plans', []):
+        names |= _index_names(child)
+    return names
+
+
+async def check_indexes(db):
+    """Roda EXPLAIN nas queries quentes e confere se cada uma usa o índice esperado.
+
+    Com poucas linhas o planejador prefere seq scan, então enable_seqscan é
+    desligado (só dentro da transação) para ver se o índice *pode* ser usado.
+    Retorna uma lista de (nome, índice esperado, índices usados, ok).
+    """
+    results = []
+    async with db.transaction() as conn:
+        await conn.execute("SET LOCAL enable_seqscan = off")
+        for name, query, params, expected in HOT_QUERIES:
+            raw = await conn.fetchval(f"EXPLAIN (FORMAT JSON) {query}", *params)
+            plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]['Plan']
+            used = _index_names(plan)
+            results.append((name, expected, sorted(used), expected in used))
+    return results
+
+
+async def main(check):
+    from config import Config
+    from database import DatabaseManager
+
+    if not Config.validate():
+        raise SystemExit("Configure DATABASE_URL (e DISCORD_TOKEN) para rodar as migrações.")
+
+    db = DatabaseManager()
+    await db.connect()
+    try:
+        applied = await MigrationRunner(db).upgrade()
+        print(f"Migrações aplicadas: {applied or 'nenhuma'} (versão atual {LATEST_VERSION})")
+        if check:
+            failures = 0
+            for name, expected, used, ok in await check_indexes(db):
+                failures += not ok
+                print(f"{'OK ' if ok else 'FALHA'} {name:<30} esperado={expected} usados={used}")
+            if failures:
+                raise SystemExit(1)
+    finally:
+        await db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Migrações do esquema do banco.")
+    parser.add_argument("--check", action="store_true", help="confere o uso de índices via EXPLAIN")
+    args = parser.parse_args()
+    asyncio.run(main(args.check))
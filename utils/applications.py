@@ -0,0 +1,117 @@
+import logging
+
+logger = logging.getLogger("Applications")
+
+PENDING = "PENDING"
+APPROVED = "APPROVED"
+REJECTED = "REJECTED"
+
+# Um pedido pendente por usuário e servidor: registrar de novo atualiza o existente
+CREATE_QUERY = """
+INSERT INTO applications (
+    guild_id, user_id, albion_player_id, albion_nick,
+    albion_guild_id, albion_guild_name, albion_alliance_tag, pve_fame, kill_fame
+) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+ON CONFLICT (guild_id, user_id) WHERE status = 'PENDING' DO UPDATE SET
+    albion_player_id = EXCLUDED.albion_player_id,
+    albion_nick = EXCLUDED.albion_nick,
+    albion_guild_id = EXCLUDED.albion_guild_id,
+    albion_guild_name = EXCLUDED.albion_guild_name,
+    albion_alliance_tag = EXCLUDED.albion_alliance_tag,
+    pve_fame = EXCLUDED.pve_fame,
+    kill_fame = EXCLUDED.kill_fame,
+    created_at = NOW()
+RETURNING id;
+"""
+
+# A condição status = 'PENDING' resolve cliques simultâneos: só um oficial recebe a linha
+DECIDE_QUERY = """
+UPDATE applications SET status = $2, reviewed_by = $3, decided_at = NOW()
+WHERE id = $1 AND status = 'PENDING'
+RETURNING *;
+"""
+
+
+async def create_application(db, guild_id, user_id, player):
+    """Cria (ou renova) o pedido pendente do usuário e devolve o id."""
+    return (await db.fetchrow_query(
+        CREATE_QUERY,
+        guild_id, user_id, player.get('Id'), player['Name'],
+        player.get('GuildId') or None, player.get('GuildName') or None,
+        player.get('AllianceTag') or None,
+        player.get('LifetimeStatistics', {}).get('PvE', {}).get('Total'), player.get('KillFame')
+    ))['id']
+
+
+async def attach_message(db, application_id, channel_id, message_id):
+    """Guarda onde está o card do pedido (para editar depois sem procurar)."""
+    try:
+        await db.execute_query(
+            "UPDATE applications SET channel_id = $2, message_id = $3 WHERE id = $1",
+            application_id, channel_id, message_id
+        )
+    except Exception as e:
+        logger.error(f"Erro ao vincular mensagem ao pedido {application_id}: {e}")
+
+
+async def attach_digest(db, application_ids, channel_id, message_id):
+    """Vincula um lote de pedidos à mensagem de resumo que os lista."""
+    await db.execute_query(
+        "UPDATE applications SET channel_id = $2, message_id = $3 WHERE id = ANY($1::bigint[])",
+        application_ids, channel_id, message_id
+    )
+
+
+async def get_digest(db, message_id):
+    """Pedidos listados numa mensagem de resumo, em ordem de chegada."""
+    return await db.fetch_query("SELECT * FROM applications WHERE message_id = $1 ORDER BY id", message_id)
+
+
+async def decide(db, application_id, status, reviewed_by):
+    """Marca um pedido pendente como APPROVED/REJECTED.
+
+    Retorna a linha decidida, ou None se o pedido não existe ou já foi decidido.
+    """
+    return await db.fetchrow_query(DECIDE_QUERY, application_id, status, reviewed_by)
+
+
+async def reopen(db, application_id, status):
+    """Desfaz uma decisão que não pôde ser aplicada no Discord (volta a PENDING)."""
+    try:
+        await db.execute_query(
+            "UPDATE applications SET status = 'PENDING', reviewed_by = NULL, decided_at = NULL "
+            "WHERE id = $1 AND status = $2",
+            application_id, status
+        )
+    except Exception as e:
+        logger.error(f"Erro ao reabrir pedido {application_id}: {e}")
+
+
+async def withdraw(db, application_id):
+    """Apaga um pedido cujo card não chegou ao canal de aprovação.
+
+    Um pedido renovado que já tem card (message_id) é mantido: o card antigo continua valendo.
+    """
+    try:
+        await db.execute_query(
+            "DELETE FROM applications WHERE id = $1 AND status = 'PENDING' AND message_id IS NULL",
+            application_id
+        )
+    except Exception as e:
+        logger.error(f"Erro ao retirar pedido {application_id}: {e}")
+
+
+async def get_application(db, application_id):
+    return await db.fetchrow_query("SELECT * FROM applications WHERE id = $1", application_id)
+
+
+def as_player(row):
+    """Converte a linha do pedido no formato de jogador aceito por register_member.
+
+    Só a identidade do jogador: a guilda gravada no pedido é a de onde o recruta está
+    saindo, e o SyncCog marcaria o membro como LEFT assim que ele entrasse na guilda.
+    """
+    return {
+        'Id': row['albion_player_id'],
+        'Name': row['albion_nick'],
+    }
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+from config import Config
+
+logger = logging.getLogger("ApprovalDigest")
+
+# Pedidos que ainda não chegaram ao canal de aprovação (bot reiniciou com o buffer cheio)
+UNSENT_QUERY = "SELECT id, guild_id FROM applications WHERE status = 'PENDING' AND message_id IS NULL ORDER BY id"
+
+# Novo envio de um lote que falhou: 5s, 10s, 20s... até 10 minutos
+RETRY_BASE = 5
+MAX_RETRY_DELAY = 600
+
+
+class ApprovalDigest:
+    """Buffer por servidor que junta pedidos de registro num único resumo.
+
+    Cada `add()` entra no buffer do servidor; o buffer é enviado quando chega a
+    APPROVAL_DIGEST_MAX pedidos ou quando o primeiro completa APPROVAL_DIGEST_WINDOW
+    segundos de espera, o que vier antes. O envio em si fica com o `sender`
+    registrado pelo RecrutamentoCog (uma mensagem paginada por lote).
+
+    Os pedidos já estão gravados em applications antes de entrar no buffer. Um lote
+    que não pôde ser enviado volta ao buffer e é tentado de novo com espera crescente;
+    os que ficaram sem envio ao desligar (message_id nulo) são recuperados em `start()`.
+    """
+
+    def __init__(self, window=None, max_size=None):
+        self.window = Config.APPROVAL_DIGEST_WINDOW if window is None else window
+        self.max_size = max_size or Config.APPROVAL_DIGEST_MAX
+        self.sender = None  # async (guild_id, [application_id]) -> bool
+        self._buffers = {}  # guild_id -> [application_id]
+        self._timers = {}  # guild_id -> Task do envio por tempo
+        self._flushing = set()
+        self._retries = {}  # guild_id -> envios seguidos que falharam
+        self._closing = False
+        self.batches = 0
+        self.failed = 0
+        self.sent = 0
+
+    async def start(self, db, owns_guild=None):
+        """Coloca de volta no buffer os pedidos pendentes que nunca foram enviados."""
+        try:
+            rows = await db.fetch_query(UNSENT_QUERY)
+        except Exception as e:
+            logger.error(f"Erro ao recuperar pedidos não enviados: {e}")
+            return
+        rows = [row for row in rows if owns_guild is None or owns_guild(row['guild_id'])]
+        for row in rows:
+            self.add(row['guild_id'], row['id'])
+        if rows:
+            logger.info(f"{len(rows)} pedidos pendentes sem mensagem voltaram ao resumo.")
+
+    def add(self, guild_id, application_id):
+        buffer = self._buffers.setdefault(guild_id, [])
+        if application_id in buffer:
+            return
+        buffer.append(application_id)
+        # Em espera após uma falha, o lote cheio também aguarda o novo envio
+        if len(buffer) >= self.max_size and guild_id not in self._retries:
+            # Tira o lote do buffer já: quem chegar durante o envio começa um lote novo
+            self._cancel_timer(guild_id)
+            task = asyncio.create_task(self._send(guild_id, self._buffers.pop(guild_id)))
+            self._flushing.add(task)
+            task.add_done_callback(self._flushing.discard)
+        elif guild_id not in self._timers:
+            self._timers[guild_id] = asyncio.create_task(self._flush_later(guild_id))
+
+    async def _flush_later(self, guild_id, delay=None):
+        try:
+            await asyncio.sleep(self.window if delay is None else delay)
+        finally:
+            # Um timer cancelado não pode tirar do dict o que o substituiu
+            if self._timers.get(guild_id) is asyncio.current_task():
+                del self._timers[guild_id]
+        await self.flush(guild_id)
+
+    def _cancel_timer(self, guild_id):
+        timer = self._timers.pop(guild_id, None)
+        if timer:
+            timer.cancel()
+
+    async def flush(self, guild_id):
+        """Envia o buffer do servidor agora."""
+        self._cancel_timer(guild_id)
+        ids = self._buffers.pop(guild_id, [])
+        if ids:
+            await self._send(guild_id, ids)
+
+    async def _send(self, guild_id, ids):
+        try:
+            sent = self.sender and await self.sender(guild_id, ids)
+        except Exception as e:
+            logger.error(f"Erro ao enviar resumo de pedidos ({guild_id}): {e}")
+            sent = False
+        if sent:
+            self._retries.pop(guild_id, None)
+            self.batches += 1
+            self.sent += len(ids)
+            return
+
+        self.failed += 1
+        if self._closing:
+            # Continuam pendentes sem mensagem no banco: voltam no próximo start()
+            logger.warning(f"Resumo de {len(ids)} pedidos não enviado no servidor {guild_id}.")
+            return
+        attempt = self._retries.get(guild_id, 0) + 1
+        self._retries[guild_id] = attempt
+        delay = min(RETRY_BASE * 2 ** (attempt - 1), MAX_RETRY_DELAY)
+        logger.warning(f"Resumo de {len(ids)} pedidos não enviado no servidor {guild_id}; nova tentativa em {delay}s.")
+        self._requeue(guild_id, ids, delay)
+
+    def _requeue(self, guild_id, ids, delay):
+        """Devolve o lote à frente do buffer e agenda o próximo envio para daqui a `delay` s."""
+        buffer = self._buffers.setdefault(guild_id, [])
+        buffer[:0] = [application_id for application_id in ids if application_id not in buffer]
+        self._cancel_timer(guild_id)
+        self._timers[guild_id] = asyncio.create_task(self._flush_later(guild_id, delay))
+
+    async def close(self):
+        """Envia o que estiver no buffer (chamado antes de fechar o banco)."""
+        self._closing = True
+        for guild_id in list(self._timers):
+            self._cancel_timer(guild_id)
+        if self._flushing:
+            await asyncio.gather(*self._flushing, return_exceptions=True)
+        await asyncio.gather(*(self.flush(guild_id) for guild_id in list(self._buffers)), return_exceptions=True)
+
+    def stats(self):
+        return {
+            "buffered": sum(len(ids) for ids in self._buffers.values()),
+            "guilds": len(self._buffers),
+            "batches": self.batches,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retrying": len(self._retries),
+        }
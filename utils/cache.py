@@ -0,0 +1,107 @@
+import time
+import asyncio
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class TTLCache:
+    """Cache LRU limitado com expiração por entrada."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()  # chave -> (expira_em, valor)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=MISSING):
+        """Retorna o valor em cache ou `default` (MISSING) se ausente/expirado."""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        if entry[0] <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value, ttl):
+        if ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": (self.hits / total) if total else 0.0,
+        }
+
+
+class _LeaderCancelled(Exception):
+    """A chamada que estava em voo foi cancelada junto com quem a iniciou."""
+
+
+class SingleFlight:
+    """Garante uma única chamada em voo por chave; chamadas concorrentes aguardam o mesmo resultado.
+
+    Se quem iniciou a chamada for cancelado (ex.: o prazo da própria interação), os
+    demais não são cancelados junto: o primeiro a voltar refaz a chamada como novo líder.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self.coalesced = 0
+
+    async def do(self, key, factory):
+        while True:
+            future = self._inflight.get(key)
+            if future is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except _LeaderCancelled:
+                continue
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            if not future.done():
+                future.set_exception(_LeaderCancelled())
+                future.exception()
+            raise
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+                # Evita "Future exception was never retrieved" quando ninguém aguardava
+                future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
@@ -0,0 +1,95 @@
+import asyncio
+import hashlib
+import json
+import logging
+import discord
+from config import Config
+
+logger = logging.getLogger("CommandSync")
+
+
+class CommandSyncManager:
+    """Sincroniza a árvore de comandos por servidor apenas quando ela muda.
+
+    O hash da árvore é guardado em command_sync_state; servidores com o hash atual
+    são ignorados e os demais são sincronizados em paralelo (limitado por semáforo).
+    Roda uma única vez por processo, mesmo com vários on_ready (reconexões).
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._started = False
+        self._semaphore = asyncio.Semaphore(Config.COMMAND_SYNC_CONCURRENCY)
+
+    def tree_hash(self, guild):
+        """Hash estável dos comandos que seriam enviados para o servidor."""
+        tree = self.bot.tree
+        payload = sorted(
+            (cmd.to_dict(tree) for cmd in tree.get_commands(guild=guild)),
+            key=lambda c: (c.get('type', 1), c['name'])
+        )
+        raw = json.dumps([self.bot.application_id, payload], sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    async def run_once(self):
+        """Sincroniza todos os servidores desatualizados (só na primeira chamada)."""
+        if self._started:
+            return
+        self._started = True
+
+        try:
+            rows = await self.bot.db.fetch_query("SELECT guild_id, tree_hash FROM command_sync_state")
+            stored = {row['guild_id']: row['tree_hash'] for row in rows}
+        except Exception as e:
+            logger.error(f"Erro ao carregar estado de sincronização: {e}")
+            stored = {}
+
+        pending = []
+        for guild in self.bot.guilds:
+            self.bot.tree.copy_global_to(guild=guild)
+            digest = self.tree_hash(guild)
+            if stored.get(guild.id) != digest:
+                pending.append((guild, digest))
+
+        logger.info(
+            f"Sincronização de comandos: {len(pending)} servidores desatualizados, "
+            f"{len(self.bot.guilds) - len(pending)} já em dia."
+        )
+        results = await asyncio.gather(*(self.sync_guild(guild, digest) for guild, digest in pending))
+        logger.info(f"Sincronização de comandos concluída: {sum(results)}/{len(pending)} servidores.")
+
+    async def sync_guild(self, guild, digest=None):
+        """Sincroniza um servidor e grava o hash. Retorna True em caso de sucesso."""
+        if digest is None:
+            self.bot.tree.copy_global_to(guild=guild)
+            digest = self.tree_hash(guild)
+
+        async with self._semaphore:
+            for attempt in range(2):
+                try:
+                    synced = await self.bot.tree.sync(guild=guild)
+                    break
+                except discord.HTTPException as e:
+                    if e.status == 429 and attempt == 0:
+                        # O discord.py já respeita os buckets; aqui só recuamos em limites globais
+                        retry_after = getattr(e, 'retry_after', None) or Config.COMMAND_SYNC_DELAY * 10
+                        await asyncio.sleep(retry_after)
+                        continue
+                    logger.error(f"❌ Falha ao sincronizar para {guild.name}: {e}")
+                    return False
+            # Espaça as chamadas para não esgotar o limite de criação de comandos
+            await asyncio.sleep(Config.COMMAND_SYNC_DELAY)
+
+        logger.info(f"✅ Sincronizado {len(synced)} comandos para {guild.name}")
+        try:
+            await self.bot.db.execute_query(
+                """
+                INSERT INTO command_sync_state (guild_id, tree_hash, synced_at)
+                VALUES ($1, $2, NOW())
+                ON CONFLICT (guild_id) DO UPDATE SET tree_hash = $2, synced_at = NOW();
+                """,
+                guild.id, digest
+            )
+        except Exception as e:
+            logger.error(f"Erro ao gravar estado de sincronização de {guild.name}: {e}")
+        return True
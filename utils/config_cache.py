@@ -0,0 +1,130 @@
+import os
+import time
+import logging
+from dataclasses import dataclass, fields
+from typing import Optional
+from config import Config
+
+logger = logging.getLogger("ConfigCache")
+
+NOTIFY_CHANNEL = "server_config_changed"
+
+
+@dataclass(frozen=True)
+class ServerConfig:
+    """Configuração de um servidor (linha da tabela server_config)."""
+    guild_id: int
+    recruitment_channel_id: Optional[int] = None
+    approval_channel_id: Optional[int] = None
+    member_role_id: Optional[int] = None
+    recruit_role_id: Optional[int] = None
+    ally_role_id: Optional[int] = None
+    alliance_tag: Optional[str] = None
+    guild_tag: Optional[str] = None
+    min_fame_pve: int = 0
+    min_fame_pvp: int = 0
+    server_type: str = "GUILD"
+    albion_guild_id: Optional[str] = None
+
+    @classmethod
+    def from_record(cls, record):
+        """Cria a config a partir de um asyncpg.Record, ignorando colunas extras."""
+        names = {f.name for f in fields(cls)}
+        data = {k: v for k, v in dict(record).items() if k in names}
+        data['min_fame_pve'] = data.get('min_fame_pve') or 0
+        data['min_fame_pvp'] = data.get('min_fame_pvp') or 0
+        data['server_type'] = data.get('server_type') or "GUILD"
+        return cls(**data)
+
+
+class ConfigCache:
+    """Cache em memória da server_config por guilda, com TTL e invalidação via NOTIFY."""
+
+    def __init__(self, db, ttl=None):
+        self.db = db
+        self.ttl = ttl if ttl is not None else Config.CONFIG_CACHE_TTL
+        self._entries = {}  # guild_id -> (expira_em, ServerConfig | None)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.listening = False
+        # Identifica este processo para ignorar as próprias notificações
+        self._origin = f"{os.getpid()}-{id(self)}"
+
+    async def get(self, guild_id):
+        """Retorna a ServerConfig do servidor (ou None se não configurado)."""
+        entry = self._entries.get(guild_id)
+        if entry and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        row = await self.db.fetchrow_query(
+            "SELECT * FROM server_config WHERE guild_id = $1", guild_id
+        )
+        config = ServerConfig.from_record(row) if row else None
+        self._store(guild_id, config)
+        return config
+
+    def put(self, config):
+        """Write-through: atualiza o cache com a config recém gravada."""
+        self._store(config.guild_id, config)
+
+    def invalidate(self, guild_id=None):
+        """Remove uma guilda do cache (ou todas, se guild_id for None)."""
+        self.invalidations += 1
+        if guild_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(guild_id, None)
+
+    def _store(self, guild_id, config):
+        self._entries[guild_id] = (time.monotonic() + self.ttl, config)
+
+    async def save(self, query, *args):
+        """Executa um UPSERT com RETURNING * e grava o resultado no cache."""
+        row = await self.db.fetchrow_query(query, *args)
+        config = ServerConfig.from_record(row)
+        self.put(config)
+        await self.notify_changed(config.guild_id)
+        return config
+
+    async def notify_changed(self, guild_id):
+        """Avisa outros processos que a config de uma guilda mudou."""
+        if not self.listening:
+            return
+        try:
+            await self.db.execute_query(
+                "SELECT pg_notify($1, $2)", NOTIFY_CHANNEL, f"{guild_id}:{self._origin}"
+            )
+        except Exception as e:
+            logger.warning(f"Falha ao notificar alteração de config: {e}")
+
+    async def start_listener(self):
+        """Ativa a invalidação por LISTEN/NOTIFY (requer conexão direta ao Postgres)."""
+        try:
+            await self.db.listen(NOTIFY_CHANNEL, self._on_notify)
+            self.listening = True
+        except Exception as e:
+            logger.warning(f"LISTEN indisponível, usando apenas TTL: {e}")
+
+    def _on_notify(self, connection, pid, channel, payload):
+        guild_id, _, origin = payload.partition(":")
+        if origin == self._origin:
+            return
+        try:
+            self.invalidate(int(guild_id))
+        except ValueError:
+            self.invalidate()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_ratio": (self.hits / total) if total else 0.0,
+            "ttl": self.ttl,
+            "listening": self.listening,
+        }
@@ -0,0 +1,42 @@
+import logging
+
+logger = logging.getLogger("GuildMembers")
+
+MEMBER = "MEMBER"
+ALLY = "ALLY"
+
+UPSERT_QUERY = """
+INSERT INTO guild_members (
+    guild_id, user_id, albion_player_id, albion_nick,
+    albion_guild_id, albion_guild_name, albion_alliance_tag,
+    membership, status, last_checked_at
+) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, 'ACTIVE', CASE WHEN $9 THEN NOW() END)
+ON CONFLICT (guild_id, user_id) DO UPDATE SET
+    albion_player_id = COALESCE($3, guild_members.albion_player_id),
+    albion_nick = $4,
+    albion_guild_id = COALESCE($5, guild_members.albion_guild_id),
+    albion_guild_name = COALESCE($6, guild_members.albion_guild_name),
+    albion_alliance_tag = COALESCE($7, guild_members.albion_alliance_tag),
+    membership = $8,
+    status = 'ACTIVE',
+    last_checked_at = CASE WHEN $9 THEN NOW() ELSE guild_members.last_checked_at END;
+"""
+
+
+async def register_member(db, guild_id, user_id, albion_nick, membership, player=None):
+    """Registra (ou reativa) um membro verificado no roster do servidor.
+
+    `player` é o JSON da API do Albion, quando disponível; os dados da guilda
+    servem de estado base para as próximas verificações do SyncCog.
+    """
+    player = player or {}
+    try:
+        await db.execute_query(
+            UPSERT_QUERY,
+            guild_id, user_id, player.get('Id'), albion_nick,
+            player.get('GuildId') or None, player.get('GuildName') or None,
+            player.get('AllianceTag') or None, membership, bool(player)
+        )
+    except Exception as e:
+        # O registro no roster não deve impedir a aprovação
+        logger.error(f"Erro ao registrar membro {user_id} no roster: {e}")
@@ -0,0 +1,228 @@
+import asyncio
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from config import Config
+from utils.rate_limit import Priority
+
+logger = logging.getLogger("GuildMetadata")
+
+UPSERT_QUERY = """
+INSERT INTO albion_guilds (guild_id, name, tag, alliance_id, alliance_tag, alliance_name, member_count, refreshed_at)
+SELECT v.*, NOW()
+FROM unnest($1::text[], $2::text[], $3::text[], $4::text[], $5::text[], $6::text[], $7::int[])
+    AS v(guild_id, name, tag, alliance_id, alliance_tag, alliance_name, member_count)
+ON CONFLICT (guild_id) DO UPDATE SET
+    name = EXCLUDED.name,
+    tag = EXCLUDED.tag,
+    alliance_id = EXCLUDED.alliance_id,
+    alliance_tag = EXCLUDED.alliance_tag,
+    alliance_name = EXCLUDED.alliance_name,
+    member_count = EXCLUDED.member_count,
+    refreshed_at = NOW()
+RETURNING *;
+"""
+
+# Guildas dos membros registrados ainda sem metadados (carga inicial da atualização)
+UNKNOWN_QUERY = """
+SELECT DISTINCT m.albion_guild_id FROM guild_members m
+WHERE m.status = 'ACTIVE' AND m.albion_guild_id IS NOT NULL
+  AND NOT EXISTS (SELECT 1 FROM albion_guilds g WHERE g.guild_id = m.albion_guild_id)
+"""
+
+
+def derive_tag(name, max_length=5):
+    """Tag curta para o nick: iniciais das palavras ou, numa palavra só, o começo dela.
+
+    A API do Albion não expõe tag de guilda; "Os Vigias de Ferro" vira "OVDF".
+    """
+    words = re.findall(r"[^\W_]+", name or "")
+    if not words:
+        return "GUILD"
+    tag = words[0][:max_length] if len(words) == 1 else "".join(word[0] for word in words)[:max_length]
+    return tag.upper()
+
+
+@dataclass
+class GuildMeta:
+    """Metadados de uma guilda do Albion (linha de albion_guilds)."""
+    guild_id: str
+    name: str
+    tag: str
+    alliance_id: Optional[str]
+    alliance_tag: Optional[str]
+    alliance_name: Optional[str]
+    member_count: Optional[int]
+    refreshed_at: datetime
+
+    @classmethod
+    def from_record(cls, record):
+        return cls(
+            record['guild_id'], record['name'], record['tag'], record['alliance_id'], record['alliance_tag'],
+            record['alliance_name'], record['member_count'], record['refreshed_at']
+        )
+
+    @property
+    def fresh(self):
+        return datetime.now(timezone.utc) - self.refreshed_at < timedelta(seconds=Config.GUILD_METADATA_TTL)
+
+
+class GuildMetadataCache:
+    """Cache guild_id -> nome, tag, aliança das guildas do Albion.
+
+    Espelho em memória da tabela albion_guilds. Guildas desconhecidas ou vencidas
+    (GUILD_METADATA_TTL) são buscadas em /guilds/{id} na hora; em segundo plano, o
+    líder atualiza as mais antigas com concorrência limitada e todos os processos
+    recarregam do banco o que mudou. Respostas da API em que um jogador aparece com
+    outra aliança marcam a guilda para atualização antes do prazo.
+    """
+
+    def __init__(self, db, albion, leader=None):
+        self.db = db
+        self.albion = albion
+        self.leader = leader
+        self._guilds = {}  # guild_id -> GuildMeta
+        self._stale = set()  # guild_ids a atualizar na próxima rodada
+        self._synced_at = None  # maior refreshed_at já carregado
+        self._task = None
+        self.hits = 0
+        self.misses = 0
+        self.fetched = 0
+        self.refreshed = 0
+
+    async def start(self):
+        """Carrega a tabela e inicia a atualização em segundo plano."""
+        try:
+            for row in await self.db.fetch_query("SELECT * FROM albion_guilds"):
+                self._set(GuildMeta.from_record(row))
+            self._stale.update(row['albion_guild_id'] for row in await self.db.fetch_query(UNKNOWN_QUERY))
+            logger.info(f"Metadados de guildas carregados: {len(self._guilds)} guildas, {len(self._stale)} a buscar.")
+        except Exception as e:
+            logger.error(f"Erro ao carregar metadados de guildas: {e}")
+
+        if not self._task:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def observe(self, players):
+        """Marca para atualização as guildas cujos jogadores aparecem com outra aliança."""
+        for p in players:
+            meta = self._guilds.get(p.get('GuildId'))
+            if meta and 'AllianceId' in p and (p['AllianceId'] or None) != meta.alliance_id:
+                self._stale.add(meta.guild_id)
+
+    def _set(self, meta):
+        self._guilds[meta.guild_id] = meta
+        if not self._synced_at or meta.refreshed_at > self._synced_at:
+            self._synced_at = meta.refreshed_at
+
+    def cached(self, guild_id):
+        return self._guilds.get(guild_id)
+
+    async def get(self, guild_id, deadline=None, alliance_id=None):
+        """Metadados da guilda (None se ela não existe mais).
+
+        Usa a memória enquanto os dados estão dentro do prazo e, se `alliance_id` for
+        informado (vindo de uma resposta recente da API), coerentes com ele; senão,
+        busca na API. Pode levantar AlbionAPIUnavailable.
+        """
+        meta = self._guilds.get(guild_id)
+        if meta and meta.fresh and guild_id not in self._stale and (alliance_id is None or meta.alliance_id == alliance_id):
+            self.hits += 1
+            return meta
+
+        self.misses += 1
+        data = await self.albion.get_guild_info(guild_id, deadline)
+        if not data:
+            return None
+        self.fetched += 1
+        try:
+            return (await self._store([data]))[0]
+        except Exception as e:
+            # Responde com o dado da API mesmo sem gravar; a próxima rodada tenta de novo
+            logger.warning(f"Erro ao gravar metadados da guilda {guild_id}: {e}")
+            self._stale.add(guild_id)
+            return GuildMeta(
+                data['Id'], data['Name'], derive_tag(data['Name']), data.get('AllianceId') or None,
+                data.get('AllianceTag') or None, data.get('AllianceName') or None, data.get('MemberCount'),
+                datetime.now(timezone.utc)
+            )
+
+    async def _store(self, guilds):
+        """Grava respostas de /guilds/{id} num único UPSERT e atualiza a memória."""
+        columns = list(zip(*(
+            (
+                g['Id'], g['Name'], derive_tag(g['Name']), g.get('AllianceId') or None,
+                g.get('AllianceTag') or None, g.get('AllianceName') or None, g.get('MemberCount'),
+            )
+            for g in guilds
+        )))
+        rows = await self.db.fetch_query(UPSERT_QUERY, *[list(column) for column in columns])
+        metas = [GuildMeta.from_record(row) for row in rows]
+        for meta in metas:
+            self._set(meta)
+            self._stale.discard(meta.guild_id)
+        return metas
+
+    async def refresh(self):
+        """Atualiza na API as guildas marcadas e as mais antigas (até GUILD_METADATA_BATCH)."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=Config.GUILD_METADATA_TTL)
+        rows = await self.db.fetch_query(
+            "SELECT guild_id FROM albion_guilds WHERE refreshed_at < $1 ORDER BY refreshed_at LIMIT $2",
+            cutoff, Config.GUILD_METADATA_BATCH
+        )
+        ids = list(dict.fromkeys([*self._stale, *(row['guild_id'] for row in rows)]))[:Config.GUILD_METADATA_BATCH]
+        if not ids:
+            return
+
+        semaphore = asyncio.Semaphore(Config.GUILD_METADATA_CONCURRENCY)
+
+        async def fetch(guild_id):
+            async with semaphore:
+                return await self.albion.get_guild_info(guild_id, priority=Priority.BACKGROUND)
+
+        results = await asyncio.gather(*(fetch(guild_id) for guild_id in ids), return_exceptions=True)
+        found = [data for data in results if data and not isinstance(data, Exception)]
+        if found:
+            await self._store(found)
+        self.refreshed += len(found)
+        failed = sum(1 for data in results if isinstance(data, Exception))
+        logger.info(f"Metadados de guildas: {len(found)}/{len(ids)} atualizadas ({failed} falhas).")
+
+    async def reload(self):
+        """Carrega do banco o que outro processo atualizou desde a última carga."""
+        if not self._synced_at:
+            rows = await self.db.fetch_query("SELECT * FROM albion_guilds")
+        else:
+            rows = await self.db.fetch_query("SELECT * FROM albion_guilds WHERE refreshed_at > $1", self._synced_at)
+        for row in rows:
+            self._set(GuildMeta.from_record(row))
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(Config.GUILD_METADATA_REFRESH_SECONDS)
+            try:
+                # Só o líder chama a API; os demais leem o resultado do banco
+                if self.leader is None or self.leader.is_leader:
+                    await self.refresh()
+                await self.reload()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erro ao atualizar metadados de guildas: {e}")
+
+    def stats(self):
+        return {
+            "guilds": len(self._guilds),
+            "stale": len(self._stale),
+            "hits": self.hits,
+            "misses": self.misses,
+            "fetched": self.fetched,
+            "refreshed": self.refreshed,
+        }
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+from config import Config
+
+logger = logging.getLogger("Leader")
+
+# Chave do pg_try_advisory_lock de liderança (diferente da usada pelas migrações)
+LEADER_LOCK_KEY = 0x0F161B
+
+
+class LeaderElection:
+    """Elege um processo líder entre os shards via advisory lock de sessão.
+
+    Cada processo mantém uma conexão direta (fora do pool) e tenta
+    `pg_try_advisory_lock` a cada LEADER_CHECK_SECONDS; quem consegue é o líder e
+    passa a só testar a conexão. Se o líder morrer ou perder a conexão, o Postgres
+    solta o lock e outro processo assume na tentativa seguinte (failover).
+
+    Com LEADER_ELECTION desligado (processo único) este processo é sempre o líder;
+    ligado sem DB_DIRECT_PORT, nunca é.
+    """
+
+    def __init__(self, db, enabled=None, interval=None):
+        self.db = db
+        self.enabled = Config.LEADER_ELECTION if enabled is None else enabled
+        self.interval = interval or Config.LEADER_CHECK_SECONDS
+        self.is_leader = not self.enabled
+        self.changes = 0
+        self._conn = None
+        self._task = None
+
+    async def start(self):
+        if not self.enabled or self._task:
+            return
+        if not Config.DB_DIRECT_PORT:
+            # Pelo Transaction Pooler o lock de sessão não se mantém e dois processos
+            # poderiam se achar líderes: sem a porta direta, este processo não concorre
+            logger.error(
+                "Eleição de líder sem DB_DIRECT_PORT: este processo fica fora da liderança. "
+                "Defina a porta direta/de sessão do banco."
+            )
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        # Fechar a conexão solta o lock imediatamente, sem esperar o próximo ciclo dos outros
+        await self._drop_connection()
+        if self.enabled:
+            self._set(False)
+
+    async def _run(self):
+        while True:
+            try:
+                if self.is_leader:
+                    await self._conn.fetchval("SELECT 1", timeout=self.interval)
+                else:
+                    await self._try_acquire()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Conexão de liderança falhou: {e}")
+                self._set(False)
+                await self._drop_connection()
+            await asyncio.sleep(self.interval)
+
+    async def _try_acquire(self):
+        if not self._conn or self._conn.is_closed():
+            self._conn = await self.db.connect_direct()
+        if await self._conn.fetchval("SELECT pg_try_advisory_lock($1)", LEADER_LOCK_KEY):
+            self._set(True)
+
+    async def _drop_connection(self):
+        if self._conn and not self._conn.is_closed():
+            try:
+                await self._conn.close(timeout=5)
+            except Exception:
+                self._conn.terminate()
+        self._conn = None
+
+    def _set(self, leader):
+        if leader == self.is_leader:
+            return
+        self.is_leader = leader
+        self.changes += 1
+        if leader:
+            logger.info("Este processo assumiu a liderança (tarefas únicas ativas).")
+        else:
+            logger.warning("Este processo deixou de ser o líder.")
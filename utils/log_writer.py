@@ -0,0 +1,99 @@
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from config import Config
+
+logger = logging.getLogger("LogWriter")
+
+COLUMNS = ["user_id", "guild_id", "albion_nick", "status", "reviewed_by", "created_at"]
+
+
+class RecruitmentLogWriter:
+    """Fila write-behind para a tabela recruitment_log.
+
+    `log()` só enfileira (não aguarda nada no caminho da interação); uma tarefa em
+    segundo plano grava em lote via COPY quando o lote enche ou o intervalo expira.
+    Se a fila atingir o limite, novos eventos são descartados e contados.
+    """
+
+    def __init__(self, db, batch_size=None, flush_interval=None, max_queue=None):
+        self.db = db
+        self.batch_size = batch_size or Config.LOG_BATCH_SIZE
+        self.flush_interval = flush_interval or Config.LOG_FLUSH_SECONDS
+        self.max_queue = max_queue or Config.LOG_MAX_QUEUE
+        self._queue = deque()
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self.written = 0
+        self.dropped = 0
+
+    def log(self, guild_id, user_id, albion_nick, status, reviewed_by=None):
+        """Enfileira um evento de recrutamento."""
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            if self.dropped % 100 == 1:
+                logger.warning(f"Fila de logs cheia ({self.max_queue}); {self.dropped} eventos descartados.")
+            return
+        self._queue.append((user_id, guild_id, albion_nick, status, reviewed_by, datetime.now(timezone.utc)))
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+
+    async def start(self):
+        if not self._task:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Para a tarefa e grava tudo o que ainda estiver na fila."""
+        if self._task:
+            self._task.cancel()
+            # Espera a tarefa parar: um flush interrompido devolve o lote à fila antes do dreno
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._queue:
+            if not await self.flush():
+                logger.error(f"{len(self._queue)} eventos de log perdidos ao desligar.")
+                break
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while self._queue:
+                if not await self.flush():
+                    break
+                if len(self._queue) < self.batch_size:
+                    break
+
+    async def flush(self):
+        """Grava até um lote. Retorna False se a gravação falhar (o lote volta para a fila)."""
+        if not self._queue:
+            return True
+        batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+        try:
+            await self.db.copy_records_to_table("recruitment_log", batch, columns=COLUMNS)
+            self.written += len(batch)
+            return True
+        except asyncio.CancelledError:
+            # Cancelado no meio da gravação (close()): o lote volta e é gravado no dreno
+            self._requeue(batch)
+            raise
+        except Exception as e:
+            logger.error(f"Erro ao gravar {len(batch)} eventos de log: {e}")
+            self._requeue(batch)
+            return False
+
+    def _requeue(self, batch):
+        """Devolve o lote para a frente da fila, respeitando o limite."""
+        room = self.max_queue - len(self._queue)
+        self._queue.extendleft(reversed(batch[:room]))
+        self.dropped += len(batch) - min(room, len(batch))
+
+    def stats(self):
+        return {"queued": len(self._queue), "written": self.written, "dropped": self.dropped}
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import discord
+from config import Config
+
+logger = logging.getLogger("MemberCache")
+
+# Modos de MEMBER_CACHE_MODE
+FULL = "full"          # chunk de todos os servidores na conexão (comportamento antigo)
+LAZY = "lazy"          # sem chunk; o cache cresce com eventos de entrada/atualização
+RELEVANT = "relevant"  # só registrados e pendentes; o resto é buscado sob demanda
+MODES = (FULL, LAZY, RELEVANT)
+
+# Máximo de ids por REQUEST_GUILD_MEMBERS no gateway
+QUERY_BATCH = 100
+
+# Quem o bot precisa ter em cache: membros/aliados registrados e pedidos pendentes
+RELEVANT_QUERY = """
+SELECT user_id FROM guild_members WHERE guild_id = $1 AND status = 'ACTIVE'
+UNION
+SELECT user_id FROM applications WHERE guild_id = $1 AND status = 'PENDING'
+"""
+
+
+def client_options(mode):
+    """Argumentos de cache do construtor do bot para o modo escolhido."""
+    if mode == FULL:
+        return {"chunk_guilds_at_startup": True}
+    if mode == LAZY:
+        return {"chunk_guilds_at_startup": False}
+    return {"chunk_guilds_at_startup": False, "member_cache_flags": discord.MemberCacheFlags.none()}
+
+
+class MemberCache:
+    """Política de cache de membros e busca sob demanda.
+
+    No modo `relevant` o discord.py não guarda membros por conta própria: os
+    registrados e os pedidos pendentes de cada servidor são carregados em segundo
+    plano quando o servidor fica disponível (REQUEST_GUILD_MEMBERS com até 100 ids
+    por vez) e continuam atualizados pelos eventos de membro. Quem não está no cache
+    é buscado por `resolve()`/`fetch()` na hora, pelo gateway (ou REST, se o gateway falhar).
+    """
+
+    def __init__(self, bot, mode=None):
+        self.bot = bot
+        self.mode = mode or Config.MEMBER_CACHE_MODE
+        if self.mode not in MODES:
+            logger.warning(f"MEMBER_CACHE_MODE inválido ({self.mode!r}); usando '{RELEVANT}'.")
+            self.mode = RELEVANT
+        self._warmed = {}  # guild_id -> id() do objeto Guild carregado
+        self._to_warm = {}  # guild_id -> None (ordem de chegada)
+        self._task = None
+        self.hits = 0
+        self.misses = 0
+        self.queried = 0
+        self.fetched = 0
+
+    def schedule_warm(self, guild):
+        """Agenda o carregamento dos membros relevantes do servidor (só no modo relevant)."""
+        # Depois de um novo READY o discord.py recria o Guild (e esvazia o cache): carrega de novo
+        if self.mode != RELEVANT or self._warmed.get(guild.id) == id(guild):
+            return
+        self._to_warm[guild.id] = None
+        if not self._task or self._task.done():
+            self._task = asyncio.create_task(self._warm_all())
+
+    async def _warm_all(self):
+        # Um servidor por vez: os pedidos de membros dividem o limite de envio do shard
+        while self._to_warm:
+            guild_id = next(iter(self._to_warm))
+            del self._to_warm[guild_id]
+            guild = self.bot.get_guild(guild_id)
+            if guild:
+                await self.warm(guild)
+
+    async def warm(self, guild, user_ids=None):
+        """Coloca no cache os membros relevantes do servidor (ou os `user_ids` dados)."""
+        if user_ids is None:
+            try:
+                rows = await self.bot.db.fetch_query(RELEVANT_QUERY, guild.id)
+            except Exception as e:
+                logger.error(f"Erro ao listar membros relevantes de {guild.id}: {e}")
+                return
+            user_ids = [row['user_id'] for row in rows]
+        found = await self.fetch(guild, user_ids)
+        self._warmed[guild.id] = id(guild)
+        logger.info(f"Cache de membros de {guild.name}: {len(found)}/{len(user_ids)} relevantes carregados.")
+
+    async def fetch(self, guild, user_ids):
+        """Membros dos `user_ids` (dict id -> Member), buscando no gateway os que faltam no cache.
+
+        Ids que não voltam saíram do servidor e ficam de fora do resultado.
+        """
+        found = {}
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            member = guild.get_member(user_id)
+            if member:
+                found[user_id] = member
+            else:
+                missing.append(user_id)
+        self.hits += len(found)
+        self.misses += len(missing)
+
+        for start in range(0, len(missing), QUERY_BATCH):
+            batch = missing[start:start + QUERY_BATCH]
+            try:
+                members = await guild.query_members(user_ids=batch, limit=len(batch), cache=True)
+            except (asyncio.TimeoutError, discord.ClientException, RuntimeError) as e:
+                logger.warning(f"Falha ao buscar {len(batch)} membros de {guild.id} pelo gateway: {e}")
+                continue
+            self.queried += len(batch)
+            found.update((member.id, member) for member in members)
+        return found
+
+    async def resolve(self, guild, user_id):
+        """Um membro pelo id: cache, gateway e, se o gateway falhar, REST. None se saiu."""
+        member = guild.get_member(user_id)
+        if member:
+            self.hits += 1
+            return member
+        self.misses += 1
+        try:
+            members = await guild.query_members(user_ids=[user_id], limit=1, cache=True)
+            self.queried += 1
+            return members[0] if members else None
+        except (asyncio.TimeoutError, discord.ClientException, RuntimeError) as e:
+            logger.warning(f"Falha ao buscar membro {user_id} de {guild.id} pelo gateway: {e}")
+
+        # Shard reconectando ou sem resposta do gateway: a API REST ainda responde
+        try:
+            member = await guild.fetch_member(user_id)
+            self.fetched += 1
+            return member
+        except discord.NotFound:
+            return None
+        except discord.HTTPException as e:
+            logger.warning(f"Falha ao buscar membro {user_id} de {guild.id}: {e}")
+            return None
+
+    def cached(self):
+        """Total de membros guardados no cache do discord.py (todos os servidores)."""
+        return sum(len(guild.members) for guild in self.bot.guilds)
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "cached": self.cached(),
+            "warmed": len(self._warmed),
+            "hits": self.hits,
+            "misses": self.misses,
+            "queried": self.queried,
+            "fetched": self.fetched,
+        }
@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+import discord
+from config import Config
+from utils.resilience import LatencyTracker
+
+logger = logging.getLogger("MemberMutations")
+
+MISSING = discord.utils.MISSING
+
+
+class _Mutation:
+    """Intenção acumulada para um membro: cargos a adicionar/remover e nick final."""
+
+    __slots__ = ("add", "remove", "nick", "reason", "futures", "enqueued_at")
+
+    def __init__(self):
+        self.add = set()
+        self.remove = set()
+        self.nick = MISSING
+        self.reason = None
+        self.futures = []
+        self.enqueued_at = time.monotonic()
+
+    def merge(self, add, remove, nick, reason):
+        # A intenção mais recente vence: adicionar um cargo cancela a remoção pendente e vice-versa
+        self.add = (self.add - remove) | add
+        self.remove = (self.remove - add) | remove
+        if nick is not MISSING:
+            self.nick = nick
+        self.reason = reason or self.reason
+
+
+class MemberMutationQueue:
+    """Fila por servidor que aplica cargos e nick num único `Member.edit`.
+
+    Cada `submit()` é mesclado com o que já estiver pendente para o mesmo membro,
+    então várias intenções viram uma chamada REST. Cada servidor é drenado por uma
+    tarefa própria, em série e com pausa entre chamadas (MEMBER_EDIT_DELAY); os
+    buckets de rota do Discord ficam a cargo do discord.py.
+    """
+
+    def __init__(self, bot, delay=None):
+        self.bot = bot
+        self.delay = Config.MEMBER_EDIT_DELAY if delay is None else delay
+        self._pending = {}  # guild_id -> OrderedDict[user_id, _Mutation]
+        self._workers = {}  # guild_id -> Task
+        self.latency = LatencyTracker()
+        self.applied = 0
+        self.merged = 0
+        self.skipped = 0
+        self.failed = 0
+
+    def submit(self, guild, member, add=(), remove=(), nick=MISSING, reason=None, urgent=False):
+        """Enfileira alterações para um membro e devolve um Future com o resultado.
+
+        `member` pode ser um discord.Member ou o id do usuário; em ambos os casos o
+        membro é lido de novo na hora de aplicar (cache do servidor ou busca sob demanda). `add`/`remove` aceitam cargos (None é ignorado). O Future resolve com True se
+        houve chamada ao Discord, False se não havia nada a mudar, ou com a exceção
+        (ex.: discord.Forbidden). `urgent=True` coloca o membro no início da fila
+        (comandos interativos não esperam atrás de uma sincronização em massa).
+        """
+        user_id = getattr(member, 'id', member)
+        queue = self._pending.setdefault(guild.id, OrderedDict())
+        mutation = queue.get(user_id)
+        if mutation is None:
+            mutation = queue[user_id] = _Mutation()
+        else:
+            self.merged += 1
+        mutation.merge(
+            {role.id for role in add if role}, {role.id for role in remove if role}, nick, reason
+        )
+        if urgent:
+            queue.move_to_end(user_id, last=False)
+
+        future = asyncio.get_running_loop().create_future()
+        mutation.futures.append(future)
+
+        if guild.id not in self._workers:
+            self._workers[guild.id] = asyncio.create_task(self._drain(guild.id))
+        return future
+
+    async def _drain(self, guild_id):
+        queue = self._pending[guild_id]
+        try:
+            while queue:
+                user_id, mutation = queue.popitem(last=False)
+                called = await self._apply(guild_id, user_id, mutation)
+                if called and queue:
+                    await asyncio.sleep(self.delay)
+        finally:
+            del self._workers[guild_id]
+            if not queue:
+                self._pending.pop(guild_id, None)
+
+    async def _apply(self, guild_id, user_id, mutation):
+        """Aplica uma intenção e resolve os Futures. Retorna True se houve chamada REST."""
+        result, error = False, None
+        try:
+            guild = self.bot.get_guild(guild_id)
+            # Nunca o Member de quem enfileirou: fora do cache ele pode estar velho, e a lista
+            # completa de cargos enviada abaixo desfaria mudanças feitas por outro caminho
+            member = guild.get_member(user_id) if guild else None
+            if not member and guild:
+                member = await self.bot.member_cache.resolve(guild, user_id)
+            if not member:
+                raise LookupError(f"Membro {user_id} não encontrado no servidor {guild_id}.")
+
+            current = {role.id for role in member.roles if not role.is_default()}
+            roles = (current - mutation.remove) | mutation.add
+            changes = {}
+            if roles != current:
+                changes['roles'] = [discord.Object(id=role_id) for role_id in roles]
+            if mutation.nick is not MISSING and mutation.nick != member.nick:
+                changes['nick'] = mutation.nick
+
+            if changes:
+                await member.edit(**changes, reason=mutation.reason)
+                result = True
+                self.applied += 1
+            else:
+                self.skipped += 1
+        except Exception as e:
+            error = e
+            self.failed += 1
+            if not isinstance(e, (discord.Forbidden, LookupError)):
+                logger.warning(f"Falha ao alterar membro {user_id} em {guild_id}: {e}")
+        finally:
+            self.latency.record("drain", time.monotonic() - mutation.enqueued_at)
+
+        for future in mutation.futures:
+            if future.done():
+                continue
+            if error:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        return result
+
+    async def close(self):
+        """Cancela os drenos em andamento; intenções ainda na fila são descartadas."""
+        for task in list(self._workers.values()):
+            task.cancel()
+        for queue in self._pending.values():
+            for mutation in queue.values():
+                for future in mutation.futures:
+                    if not future.done():
+                        future.cancel()
+        self._pending.clear()
+
+    def stats(self):
+        depth = {guild_id: len(queue) for guild_id, queue in self._pending.items() if queue}
+        return {
+            "queued": sum(depth.values()),
+            "guilds": len(depth),
+            "applied": self.applied,
+            "merged": self.merged,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "drain": self.latency.summary().get("drain", {}),
+        }
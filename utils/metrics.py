@@ -0,0 +1,308 @@
+"""Métricas internas no formato de texto do Prometheus.
+
+Um registro único por processo (`registry`) guarda contadores, gauges e histogramas
+com rótulos. Os módulos instrumentados importam as métricas daqui; o texto é
+servido num endpoint HTTP local (`MetricsServer`) e pelo comando /metricas.
+`timed_command` também abre o rastro da interação (ver utils.tracing).
+"""
+import asyncio
+import functools
+import logging
+import re
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from aiohttp import web
+from utils.tracing import trace
+
+logger = logging.getLogger("Metrics")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def items(self):
+        return dict(self._values)
+
+    def reset(self):
+        self._values.clear()
+
+    def _samples(self):
+        return [f"{self.name}{_labels(self.labelnames, key)} {value}" for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values = {}
+
+    def set(self, value, **labels):
+        self._values[self._key(labels)] = value
+
+    def get(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def reset(self):
+        self._values.clear()
+
+    def _samples(self):
+        return [f"{self.name}{_labels(self.labelnames, key)} {value}" for key, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # rótulos -> [contagens por bucket, soma, total]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+    def reset(self):
+        self._series.clear()
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def summary(self):
+        """Por série: total, média e p50/p99 aproximados (limite superior do bucket)."""
+        result = {}
+        for key, (counts, total, count) in self._series.items():
+            if not count:
+                continue
+            entry = {"count": count, "avg": total / count}
+            for point in (50, 99):
+                target, seen = count * point / 100, 0
+                entry[f"p{point}"] = float("inf")
+                for bound, bucket in zip(self.buckets, counts):
+                    seen += bucket
+                    if seen >= target:
+                        entry[f"p{point}"] = bound
+                        break
+            result[key] = entry
+        return result
+
+    def _samples(self):
+        lines = []
+        for key, (counts, total, count) in self._series.items():
+            names = self.labelnames + ("le",)
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                lines.append(f"{self.name}_bucket{_labels(names, key + (repr(bound),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_labels(names, key + ('+Inf',))} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+
+    def _register(self, cls, name, *args, **kwargs):
+        if name not in self._metrics:
+            self._metrics[name] = cls(name, *args, **kwargs)
+        return self._metrics[name]
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, documentation, labelnames, buckets)
+
+    def add_collector(self, collector):
+        """Registra uma função chamada antes de cada coleta (para atualizar gauges)."""
+        self._collectors.append(collector)
+
+    def reset(self):
+        """Zera todas as séries (usado por benchmarks para medir só uma janela)."""
+        for metric in self._metrics.values():
+            metric.reset()
+
+    def render(self):
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.warning(f"Coletor de métricas falhou: {e}")
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+COMMAND_SECONDS = registry.histogram(
+    "ovigia_command_seconds", "Duração dos comandos e botões.", ("command", "outcome")
+)
+DB_POOL_WAIT_SECONDS = registry.histogram(
+    "ovigia_db_pool_wait_seconds", "Espera por uma conexão do pool."
+)
+DB_POOL_TIMEOUTS = registry.counter(
+    "ovigia_db_pool_timeouts_total", "Pedidos de conexão que estouraram DB_ACQUIRE_TIMEOUT."
+)
+DB_QUERY_SECONDS = registry.histogram(
+    "ovigia_db_query_seconds", "Duração das queries por comando SQL.", ("statement",)
+)
+ALBION_REQUEST_SECONDS = registry.histogram(
+    "ovigia_albion_request_seconds", "Latência das requisições à API do Albion.", ("endpoint",)
+)
+ALBION_RESPONSES = registry.counter(
+    "ovigia_albion_responses_total", "Respostas da API do Albion por status.", ("endpoint", "status")
+)
+LOOP_LAG_SECONDS = registry.histogram(
+    "ovigia_event_loop_lag_seconds", "Atraso do event loop em relação ao agendado.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+)
+LOOP_LAG_MAX = registry.gauge(
+    "ovigia_event_loop_lag_max_seconds", "Maior atraso do event loop no último intervalo."
+)
+DB_POOL_CONNECTIONS = registry.gauge(
+    "ovigia_db_pool_connections", "Conexões do pool por estado.", ("state",)
+)
+QUEUE_DEPTH = registry.gauge(
+    "ovigia_queue_depth", "Itens aguardando nas filas internas.", ("queue",)
+)
+MEMBER_CACHE_SIZE = registry.gauge(
+    "ovigia_member_cache_members", "Membros guardados no cache do discord.py."
+)
+
+_VERB = re.compile(r"^\s*([a-z]+)", re.IGNORECASE)
+_TABLE = re.compile(r"\b(?:from|into|update|table)\s+(?:if\s+(?:not\s+)?exists\s+)?([a-z_][a-z0-9_]*)", re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=512)
+def statement_name(query):
+    """Nome estável e de baixa cardinalidade para uma query: `<comando> <tabela>`."""
+    verb = _VERB.match(query)
+    if not verb:
+        return "other"
+    table = _TABLE.search(query)
+    return f"{verb.group(1).lower()} {table.group(1).lower()}" if table else verb.group(1).lower()
+
+
+def timed_command(name):
+    """Mede a duração de um comando/callback de interação em COMMAND_SECONDS.
+
+    Também abre o rastro da interação (utils.tracing), ao qual as queries e chamadas
+    à API feitas dentro do handler são anexadas como spans.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            interaction = next((arg for arg in args if hasattr(arg, "guild_id") and hasattr(arg, "response")), None)
+            attrs = {"guild_id": interaction.guild_id, "user_id": interaction.user.id} if interaction else {}
+            started = time.perf_counter()
+            outcome = "ok"
+            try:
+                with trace(name, **attrs):
+                    return await func(*args, **kwargs)
+            except Exception:
+                outcome = "error"
+                raise
+            finally:
+                COMMAND_SECONDS.observe(time.perf_counter() - started, command=name, outcome=outcome)
+        return wrapper
+    return decorator
+
+
+async def monitor_loop_lag(interval=1.0, samples=10):
+    """Mede quanto o event loop atrasa para acordar um sleep (lag = bloqueio do loop)."""
+    step = interval / samples
+    while True:
+        worst = 0.0
+        for _ in range(samples):
+            started = time.perf_counter()
+            await asyncio.sleep(step)
+            lag = max(0.0, time.perf_counter() - started - step)
+            LOOP_LAG_SECONDS.observe(lag)
+            worst = max(worst, lag)
+        LOOP_LAG_MAX.set(worst)
+
+
+class MetricsServer:
+    """Servidor HTTP local que expõe /metrics no formato do Prometheus."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Métricas disponíveis em http://{self.host}:{self.port}/metrics")
+
+    async def _handle(self, request):
+        return web.Response(
+            body=registry.render().encode(),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+        )
+
+    async def close(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,141 @@
+import asyncio
+import bisect
+import logging
+from collections import OrderedDict
+from discord import app_commands
+from config import Config
+
+logger = logging.getLogger("PlayerIndex")
+
+UPSERT_QUERY = """
+INSERT INTO albion_players (player_id, name, name_lower, guild_id, updated_at)
+SELECT v.player_id, v.name, lower(v.name), v.guild_id, NOW()
+FROM unnest($1::text[], $2::text[], $3::text[]) AS v(player_id, name, guild_id)
+ON CONFLICT (player_id) DO UPDATE SET
+    name = EXCLUDED.name,
+    name_lower = EXCLUDED.name_lower,
+    guild_id = EXCLUDED.guild_id,
+    updated_at = NOW();
+"""
+
+
+class PlayerIndex:
+    """Índice local nome -> ID de jogadores do Albion.
+
+    Alimentado por todas as respostas da API (busca, jogador, roster), persistido na
+    tabela albion_players e mantido em memória num array ordenado para buscas exatas
+    e por prefixo em O(log n). A memória guarda só os PLAYER_INDEX_MAX_SIZE nomes
+    vistos mais recentemente; os mais antigos saem do índice (não do banco), e um
+    nick fora dele é resolvido pela API como antes.
+    """
+
+    def __init__(self, db, max_size=None):
+        self.db = db
+        self.max_size = max_size or Config.PLAYER_INDEX_MAX_SIZE
+        self._names = []  # nomes em minúsculas, ordenados
+        self._entries = OrderedDict()  # nome minúsculo -> (player_id, nome, guild_id), do mais antigo ao mais novo
+        self._pending = {}  # player_id -> (nome, guild_id) ainda não gravados
+        self._task = None
+        self.evicted = 0
+
+    async def start(self):
+        """Carrega os nomes vistos mais recentemente e inicia a gravação periódica."""
+        try:
+            rows = await self.db.fetch_query(
+                "SELECT player_id, name, guild_id FROM albion_players ORDER BY updated_at DESC LIMIT $1",
+                self.max_size
+            )
+            for row in reversed(rows):
+                key = row['name'].lower()
+                self._entries[key] = (row['player_id'], row['name'], row['guild_id'])
+                self._entries.move_to_end(key)
+            # Ordena uma vez só (inserir um a um custaria O(n) por nome)
+            self._names = sorted(self._entries)
+            logger.info(f"Índice de jogadores carregado: {len(self._entries)} nomes.")
+        except Exception as e:
+            logger.error(f"Erro ao carregar índice de jogadores: {e}")
+
+        if not self._task:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    def observe(self, players):
+        """Registra jogadores vistos numa resposta da API (não bloqueia)."""
+        for p in players:
+            player_id, name = p.get('Id'), p.get('Name')
+            if not player_id or not name:
+                continue
+            guild_id = p.get('GuildId') or None
+            current = self._entries.get(name.lower())
+            if current == (player_id, name, guild_id):
+                continue
+            self._set(player_id, name, guild_id)
+            self._pending[player_id] = (name, guild_id)
+
+    def _set(self, player_id, name, guild_id):
+        key = name.lower()
+        if key not in self._entries:
+            bisect.insort(self._names, key)
+        self._entries[key] = (player_id, name, guild_id)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._evict()
+
+    def _evict(self):
+        """Tira do índice o nome visto há mais tempo."""
+        key, _ = self._entries.popitem(last=False)
+        i = bisect.bisect_left(self._names, key)
+        if i < len(self._names) and self._names[i] == key:
+            del self._names[i]
+        self.evicted += 1
+
+    def resolve(self, name):
+        """Retorna (player_id, nome, guild_id) para o nome exato (case-insensitive) ou None."""
+        return self._entries.get(name.lower())
+
+    def prefix(self, text, limit=25):
+        """Lista até `limit` entradas cujo nome começa com `text`."""
+        key = text.lower()
+        start = bisect.bisect_left(self._names, key)
+        results = []
+        for name in self._names[start:start + limit]:
+            if not name.startswith(key):
+                break
+            results.append(self._entries[name])
+        return results
+
+    async def flush(self):
+        """Grava as entradas pendentes num único UPSERT."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        ids = list(pending)
+        try:
+            await self.db.execute_query(
+                UPSERT_QUERY, ids, [pending[i][0] for i in ids], [pending[i][1] for i in ids]
+            )
+        except Exception as e:
+            logger.error(f"Erro ao gravar índice de jogadores: {e}")
+            # Devolve para a próxima tentativa sem sobrescrever dados mais novos
+            for player_id, value in pending.items():
+                self._pending.setdefault(player_id, value)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(Config.PLAYER_INDEX_FLUSH_SECONDS)
+            await self.flush()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def nickname_choices(bot, current):
+    """Sugestões de autocomplete para nicks a partir do índice local (sem chamadas à API)."""
+    if not current or not getattr(bot, "player_index", None):
+        return []
+    return [app_commands.Choice(name=name, value=name) for _, name, _ in bot.player_index.prefix(current)]
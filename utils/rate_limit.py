@@ -0,0 +1,83 @@
+import time
+import heapq
+import asyncio
+import itertools
+from enum import IntEnum
+from utils.resilience import LatencyTracker
+
+
+class Priority(IntEnum):
+    """Prioridade de uma chamada: valores menores são atendidos primeiro."""
+    INTERACTIVE = 0
+    BACKGROUND = 10
+
+
+class PriorityRateLimiter:
+    """Token bucket com fila de prioridade.
+
+    Mantém a taxa sustentada em `rate` requisições/s (com rajadas de até `burst`).
+    Quando não há tokens, os pedidos esperam num heap ordenado por (prioridade, chegada),
+    de modo que comandos interativos passam à frente de trabalho em lote.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._waiters = []  # heap de (prioridade, seq, future)
+        self._seq = itertools.count()
+        self._timer = None
+        self.wait_times = LatencyTracker()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, priority=Priority.INTERACTIVE, deadline=None):
+        """Aguarda um token. Levanta asyncio.TimeoutError se o deadline (monotonic) passar."""
+        started = time.monotonic()
+        self._refill()
+        if not self._waiters and self._tokens >= 1:
+            self._tokens -= 1
+            self.wait_times.record(priority.name, 0.0)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._schedule()
+
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            await asyncio.wait_for(future, timeout)
+        finally:
+            self.wait_times.record(priority.name, time.monotonic() - started)
+
+    def _schedule(self):
+        if self._timer is not None or not self._waiters:
+            return
+        delay = max(0.0, (1 - self._tokens) / self.rate)
+        self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def _dispatch(self):
+        self._timer = None
+        self._refill()
+        while self._waiters and self._tokens >= 1:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                # Pedido cancelado ou expirado: não consome token
+                continue
+            self._tokens -= 1
+            future.set_result(None)
+        self._schedule()
+
+    def stats(self):
+        self._refill()
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "tokens": round(self._tokens, 2),
+            "queued": sum(1 for _, _, f in self._waiters if not f.done()),
+            "wait": self.wait_times.summary(),
+        }
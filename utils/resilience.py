@@ -0,0 +1,77 @@
+import time
+import random
+from collections import deque, defaultdict
+from datetime import datetime, timezone
+
+
+class CircuitBreaker:
+    """Disjuntor simples: abre após N falhas seguidas e libera um teste após o cooldown."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+        self.state = self.CLOSED
+
+    def allow(self):
+        """Indica se uma requisição pode ser feita agora."""
+        if self.state == self.CLOSED:
+            return True
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            # Deixa passar uma única requisição de teste (renovada se a anterior se perder)
+            self.state = self.HALF_OPEN
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.state = self.CLOSED
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Guarda as últimas amostras de latência por endpoint e calcula percentis."""
+
+    def __init__(self, window=500):
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+
+    def record(self, endpoint, seconds):
+        self._samples[endpoint].append(seconds)
+
+    def percentiles(self, endpoint, points=(50, 90, 99)):
+        samples = sorted(self._samples.get(endpoint, ()))
+        if not samples:
+            return {}
+        result = {}
+        for p in points:
+            idx = min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))
+            result[f"p{p}"] = samples[idx]
+        return result
+
+    def summary(self):
+        return {
+            endpoint: {"count": len(samples), **self.percentiles(endpoint)}
+            for endpoint, samples in self._samples.items()
+        }
+
+
+def backoff_delay(attempt, base=0.25, cap=4.0):
+    """Backoff exponencial com jitter completo (attempt começa em 0)."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def interaction_deadline(interaction, budget):
+    """Converte o orçamento restante de uma interação num deadline em time.monotonic()."""
+    elapsed = (datetime.now(timezone.utc) - interaction.created_at).total_seconds()
+    return time.monotonic() + max(0.0, budget - max(0.0, elapsed))
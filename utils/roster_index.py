@@ -0,0 +1,89 @@
+import time
+
+
+class Roster:
+    """Lista de membros de uma guilda do Albion indexada por ID e nome."""
+
+    def __init__(self, guild_id, members):
+        self.guild_id = guild_id
+        self.fetched_at = time.monotonic()
+        self.by_id = {m['Id']: m for m in members if m.get('Id')}
+        self.by_name = {m['Name'].lower(): m for m in members if m.get('Name')}
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __contains__(self, player_id):
+        return player_id in self.by_id
+
+
+class RosterIndex:
+    """Índice em memória dos rosters baixados, com intervalo de atualização por guilda.
+
+    Rosters vencidos não servem mais a nenhuma busca: saem do índice (com os
+    jogadores deles) ao serem consultados ou na próxima atualização de qualquer guilda.
+    """
+
+    def __init__(self, refresh_interval):
+        self.refresh_interval = refresh_interval
+        self._rosters = {}  # guild_id -> Roster
+        self._player_guild = {}  # player_id -> guild_id
+        self._name_guild = {}  # nome minúsculo -> guild_id
+
+    def get(self, guild_id):
+        """Retorna o roster se ainda estiver dentro do intervalo de atualização."""
+        roster = self._rosters.get(guild_id)
+        if roster and time.monotonic() - roster.fetched_at < self.refresh_interval:
+            return roster
+        if roster:
+            self._remove(guild_id)
+        return None
+
+    def _remove(self, guild_id):
+        old = self._rosters.pop(guild_id, None)
+        if not old:
+            return
+        for player_id in old.by_id:
+            if self._player_guild.get(player_id) == guild_id:
+                del self._player_guild[player_id]
+        for name in old.by_name:
+            if self._name_guild.get(name) == guild_id:
+                del self._name_guild[name]
+
+    def prune(self):
+        """Remove os rosters vencidos. Retorna quantos saíram."""
+        cutoff = time.monotonic() - self.refresh_interval
+        expired = [guild_id for guild_id, roster in self._rosters.items() if roster.fetched_at <= cutoff]
+        for guild_id in expired:
+            self._remove(guild_id)
+        return len(expired)
+
+    def update(self, guild_id, members):
+        self._remove(guild_id)
+        self.prune()
+
+        roster = Roster(guild_id, members)
+        self._rosters[guild_id] = roster
+        for player_id in roster.by_id:
+            self._player_guild[player_id] = guild_id
+        for name in roster.by_name:
+            self._name_guild[name] = guild_id
+        return roster
+
+    def find_by_id(self, player_id):
+        guild_id = self._player_guild.get(player_id)
+        roster = self.get(guild_id) if guild_id else None
+        return roster.by_id.get(player_id) if roster else None
+
+    def find_by_name(self, name):
+        guild_id = self._name_guild.get(name.lower())
+        roster = self.get(guild_id) if guild_id else None
+        return roster.by_name.get(name.lower()) if roster else None
+
+    def stats(self):
+        fresh = [r for r in self._rosters.values() if time.monotonic() - r.fetched_at < self.refresh_interval]
+        return {
+            "guilds": len(self._rosters),
+            "fresh": len(fresh),
+            "players": len(self._player_guild),
+        }
@@ -0,0 +1,144 @@
+import asyncio
+import logging
+from config import Config
+from utils.cache import TTLCache
+
+logger = logging.getLogger("Snapshots")
+
+# Insere apenas quando os valores diferem do último snapshot salvo (dedupe entre reinícios)
+INSERT_QUERY = """
+INSERT INTO player_snapshots (
+    player_id, guild_id, alliance_id, pve_fame, kill_fame, death_fame, gathering_fame, crafting_fame
+)
+SELECT v.player_id, v.guild_id, v.alliance_id, v.pve_fame, v.kill_fame, v.death_fame,
+       v.gathering_fame, v.crafting_fame
+FROM unnest($1::text[], $2::text[], $3::text[], $4::bigint[], $5::bigint[], $6::bigint[], $7::bigint[], $8::bigint[])
+    AS v(player_id, guild_id, alliance_id, pve_fame, kill_fame, death_fame, gathering_fame, crafting_fame)
+WHERE NOT EXISTS (
+    SELECT 1 FROM (
+        SELECT * FROM player_snapshots s
+        WHERE s.player_id = v.player_id
+        ORDER BY s.captured_at DESC
+        LIMIT 1
+    ) last
+    WHERE (last.guild_id, last.alliance_id, last.pve_fame, last.kill_fame, last.death_fame,
+           last.gathering_fame, last.crafting_fame)
+      IS NOT DISTINCT FROM
+          (v.guild_id, v.alliance_id, v.pve_fame, v.kill_fame, v.death_fame,
+           v.gathering_fame, v.crafting_fame)
+);
+"""
+
+
+def snapshot_values(player):
+    """Extrai os valores rastreados de um JSON completo de jogador (ou None se incompleto)."""
+    stats = player.get('LifetimeStatistics')
+    if not player.get('Id') or not stats:
+        return None
+    return (
+        player.get('GuildId') or None,
+        player.get('AllianceId') or None,
+        stats.get('PvE', {}).get('Total', 0),
+        player.get('KillFame', 0),
+        player.get('DeathFame', 0),
+        stats.get('Gathering', {}).get('All', {}).get('Total', 0),
+        stats.get('Crafting', {}).get('Total', 0),
+    )
+
+
+class SnapshotStore:
+    """Histórico de fama dos jogadores, gravado só quando os valores mudam."""
+
+    def __init__(self, db):
+        self.db = db
+        # Últimos valores conhecidos por jogador, para descartar duplicatas sem ir ao banco
+        self._last = TTLCache(maxsize=Config.SNAPSHOT_MEMORY_SIZE)
+        self._pending = {}  # player_id -> valores
+        self._task = None
+        self.written = 0
+        self.skipped = 0
+        self.dropped = 0
+
+    async def start(self):
+        if not self._task:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            # Um flush interrompido devolve o lote antes da gravação final
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def observe(self, players):
+        """Enfileira snapshots dos jogadores de uma resposta da API (não bloqueia)."""
+        for player in players:
+            values = snapshot_values(player)
+            if values is None:
+                continue
+            if self._last.get(player['Id']) == values:
+                self.skipped += 1
+                continue
+            if player['Id'] not in self._pending and len(self._pending) >= Config.SNAPSHOT_MAX_PENDING:
+                # Banco fora há tempo: descarta em vez de crescer sem limite (volta na próxima observação)
+                self.dropped += 1
+                self._last.pop(player['Id'])
+                continue
+            self._last.set(player['Id'], values, Config.SNAPSHOT_MEMORY_TTL)
+            self._pending[player['Id']] = values
+
+    async def flush(self, player_id=None):
+        """Grava os snapshots pendentes (ou só o de `player_id`) num único INSERT em lote."""
+        if player_id is not None:
+            if player_id not in self._pending:
+                return
+            pending = {player_id: self._pending.pop(player_id)}
+        elif not self._pending:
+            return
+        else:
+            pending, self._pending = self._pending, {}
+        ids = list(pending)
+        columns = [ids] + [[pending[i][n] for i in ids] for n in range(7)]
+        try:
+            result = await self.db.execute_query(INSERT_QUERY, *columns)
+            self.written += int(result.split()[-1]) if result else 0
+        except asyncio.CancelledError:
+            self._requeue(pending)
+            raise
+        except Exception as e:
+            logger.error(f"Erro ao gravar snapshots de jogadores: {e}")
+            self._requeue(pending)
+
+    def _requeue(self, pending):
+        """Devolve um lote não gravado aos pendentes, respeitando SNAPSHOT_MAX_PENDING.
+
+        Valores observados depois do lote têm precedência; os descartados saem também
+        da memória de últimos valores, para voltarem na próxima observação.
+        """
+        for player_id, values in pending.items():
+            if player_id in self._pending:
+                continue
+            if len(self._pending) >= Config.SNAPSHOT_MAX_PENDING:
+                self.dropped += 1
+                self._last.pop(player_id)
+                continue
+            self._pending[player_id] = values
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(Config.SNAPSHOT_FLUSH_SECONDS)
+            await self.flush()
+
+    async def history(self, player_id, limit=10):
+        """Snapshots mais recentes do jogador, do mais novo para o mais antigo."""
+        return await self.db.fetch_query(
+            "SELECT * FROM player_snapshots WHERE player_id = $1 ORDER BY captured_at DESC LIMIT $2",
+            player_id, limit
+        )
+
+    def stats(self):
+        return {"pending": len(self._pending), "written": self.written, "skipped": self.skipped, "dropped": self.dropped}
@@ -0,0 +1,49 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger("Startup")
+
+
+class StartupPipeline:
+    """Executa etapas de inicialização em paralelo, com tempo limite e medição por etapa.
+
+    Uma etapa que falha ou estoura o tempo é registrada e não derruba as demais:
+    o bot sobe degradado em vez de ficar bloqueado.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings = {}  # etapa -> segundos
+        self.failed = {}  # etapa -> erro
+
+    async def _step(self, name, coro, timeout):
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(coro, timeout) if timeout else await coro
+            return result
+        except asyncio.TimeoutError:
+            self.failed[name] = f"timeout ({timeout:g}s)"
+            logger.error(f"Etapa '{name}' excedeu {timeout:g}s; seguindo sem ela.")
+        except Exception as e:
+            self.failed[name] = repr(e)
+            logger.error(f"Etapa '{name}' falhou: {e}")
+        finally:
+            self.timings[name] = time.perf_counter() - started
+        return None
+
+    async def run(self, *steps):
+        """Roda as etapas (nome, corrotina[, timeout]) em paralelo e devolve os resultados."""
+        return await asyncio.gather(*(self._step(step[0], step[1], step[2] if len(step) > 2 else None)
+                                      for step in steps))
+
+    def ok(self, name):
+        return name in self.timings and name not in self.failed
+
+    def log_summary(self):
+        total = time.perf_counter() - self.started
+        parts = ", ".join(
+            f"{name}={seconds * 1000:.0f}ms{' (falhou)' if name in self.failed else ''}"
+            for name, seconds in self.timings.items()
+        )
+        logger.info(f"Inicialização em {total * 1000:.0f}ms: {parts}")
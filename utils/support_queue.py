@@ -0,0 +1,213 @@
+import bisect
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+logger = logging.getLogger("SupportQueue")
+
+# Tipos de item e estados
+TICKET = "TICKET"
+APPLICATION = "APPLICATION"
+OPEN = "OPEN"
+CLAIMED = "CLAIMED"
+CLOSED = "CLOSED"
+
+# Prioridades: maior é atendido antes
+NORMAL = 0
+HIGH = 1
+URGENT = 2
+PRIORITY_NAMES = {NORMAL: "Normal", HIGH: "Alta", URGENT: "Urgente"}
+
+# Um item aberto por usuário e tipo; abrir de novo só atualiza o assunto
+ADD_QUERY = """
+INSERT INTO support_tickets (guild_id, user_id, kind, priority, subject, application_id)
+VALUES ($1, $2, $3, $4, $5, $6)
+ON CONFLICT (guild_id, user_id, kind) WHERE status <> 'CLOSED' DO UPDATE SET
+    subject = EXCLUDED.subject,
+    application_id = COALESCE(EXCLUDED.application_id, support_tickets.application_id)
+RETURNING *;
+"""
+
+# Como em applications: a condição de status garante que só um atendente assume o item
+CLAIM_QUERY = """
+UPDATE support_tickets SET status = 'CLAIMED', claimed_by = $2, claimed_at = NOW()
+WHERE id = $1 AND guild_id = $3 AND status = 'OPEN'
+RETURNING *;
+"""
+
+CLOSE_QUERY = """
+UPDATE support_tickets SET status = 'CLOSED', closed_by = $2, closed_at = NOW()
+WHERE id = $1 AND guild_id = $3 AND status <> 'CLOSED'
+RETURNING *;
+"""
+
+
+@dataclass
+class Ticket:
+    """Item da fila (linha aberta de support_tickets)."""
+    id: int
+    guild_id: int
+    user_id: int
+    kind: str
+    priority: int
+    subject: str
+    created_at: datetime
+    application_id: Optional[int] = None
+
+    @classmethod
+    def from_record(cls, record):
+        return cls(
+            record['id'], record['guild_id'], record['user_id'], record['kind'], record['priority'],
+            record['subject'], record['created_at'], record['application_id']
+        )
+
+    @property
+    def key(self):
+        # Ordem de atendimento: prioridade (desc), chegada, id
+        return (-self.priority, self.created_at, self.id)
+
+
+class SupportQueue:
+    """Fila de tickets e pedidos por servidor.
+
+    A tabela support_tickets é a fonte da verdade; os itens abertos ficam espelhados
+    em memória numa lista ordenada por servidor (bisect), então próximo item, posição
+    de um usuário e remoção custam O(log n) na busca, sem consultar o banco.
+    Observadores são chamados com o guild_id a cada mudança (painel de status).
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._queues = {}  # guild_id -> lista ordenada de Ticket.key
+        self._items = {}  # id -> Ticket
+        self._by_user = {}  # (guild_id, user_id, kind) -> id
+        self.observers = []
+
+    async def start(self, owns_guild=None):
+        """Carrega os itens abertos do banco (só dos servidores aceitos por `owns_guild`)."""
+        try:
+            rows = await self.db.fetch_query(
+                "SELECT * FROM support_tickets WHERE status = 'OPEN' ORDER BY guild_id, priority DESC, created_at, id"
+            )
+            for row in rows:
+                if owns_guild is None or owns_guild(row['guild_id']):
+                    self._insert(Ticket.from_record(row))
+            logger.info(f"Fila de suporte carregada: {len(self._items)} itens abertos.")
+        except Exception as e:
+            logger.error(f"Erro ao carregar fila de suporte: {e}")
+
+    def add_observer(self, callback):
+        """Registra um callback chamado com o guild_id a cada mudança na fila."""
+        self.observers.append(callback)
+
+    def _notify(self, guild_id):
+        for callback in self.observers:
+            try:
+                callback(guild_id)
+            except Exception as e:
+                logger.error(f"Erro em observador da fila: {e}")
+
+    def _insert(self, ticket):
+        bisect.insort(self._queues.setdefault(ticket.guild_id, []), ticket.key)
+        self._items[ticket.id] = ticket
+        self._by_user[(ticket.guild_id, ticket.user_id, ticket.kind)] = ticket.id
+
+    def _remove(self, ticket_id, guild_id=None):
+        ticket = self._items.get(ticket_id)
+        if not ticket or (guild_id is not None and ticket.guild_id != guild_id):
+            return None
+        del self._items[ticket_id]
+        queue = self._queues[ticket.guild_id]
+        index = bisect.bisect_left(queue, ticket.key)
+        if index < len(queue) and queue[index] == ticket.key:
+            del queue[index]
+        self._by_user.pop((ticket.guild_id, ticket.user_id, ticket.kind), None)
+        return ticket
+
+    async def add(self, guild_id, user_id, subject, kind=TICKET, priority=NORMAL, application_id=None):
+        """Abre (ou atualiza) o item do usuário e devolve a linha gravada."""
+        row = await self.db.fetchrow_query(ADD_QUERY, guild_id, user_id, kind, priority, subject, application_id)
+        self._remove(row['id'])
+        if row['status'] == OPEN:
+            self._insert(Ticket.from_record(row))
+        self._notify(guild_id)
+        return row
+
+    def get(self, ticket_id):
+        return self._items.get(ticket_id)
+
+    def peek(self, guild_id, limit=1):
+        """Os próximos `limit` itens do servidor, em ordem de atendimento."""
+        return [self._items[key[2]] for key in self._queues.get(guild_id, [])[:limit]]
+
+    def size(self, guild_id):
+        return len(self._queues.get(guild_id, ()))
+
+    def position(self, guild_id, user_id, kind=TICKET):
+        """Posição (1 = próximo) do item aberto do usuário, ou None."""
+        ticket_id = self._by_user.get((guild_id, user_id, kind))
+        if ticket_id is None:
+            return None
+        return bisect.bisect_left(self._queues[guild_id], self._items[ticket_id].key) + 1
+
+    async def claim(self, guild_id, staff_id, ticket_id=None):
+        """Assume o item indicado (ou o próximo da fila). Devolve a linha ou None.
+
+        Itens já assumidos por outro processo são descartados da memória e, sem
+        `ticket_id`, o próximo da fila é tentado.
+        """
+        while True:
+            if ticket_id is None:
+                head = self.peek(guild_id)
+                if not head:
+                    return None
+                candidate = head[0].id
+            else:
+                candidate = ticket_id
+
+            row = await self.db.fetchrow_query(CLAIM_QUERY, candidate, staff_id, guild_id)
+            self._remove(candidate, guild_id)
+            if row or ticket_id is not None:
+                self._notify(guild_id)
+                return row
+
+    async def close(self, guild_id, ticket_id, closed_by):
+        """Fecha um item aberto ou assumido. Devolve a linha ou None se já estava fechado."""
+        row = await self.db.fetchrow_query(CLOSE_QUERY, ticket_id, closed_by, guild_id)
+        if self._remove(ticket_id, guild_id) or row:
+            self._notify(guild_id)
+        return row
+
+    async def close_application(self, application_id, closed_by):
+        """Fecha o item vinculado a um pedido de registro já decidido."""
+        try:
+            rows = await self.db.fetch_query(
+                "UPDATE support_tickets SET status = 'CLOSED', closed_by = $2, closed_at = NOW() "
+                "WHERE application_id = $1 AND status <> 'CLOSED' RETURNING id, guild_id",
+                application_id, closed_by
+            )
+        except Exception as e:
+            logger.error(f"Erro ao fechar item do pedido {application_id}: {e}")
+            return
+        for row in rows:
+            self._remove(row['id'])
+            self._notify(row['guild_id'])
+
+    async def set_priority(self, guild_id, ticket_id, priority):
+        """Muda a prioridade de um item aberto e o reposiciona. Devolve a linha ou None."""
+        row = await self.db.fetchrow_query(
+            "UPDATE support_tickets SET priority = $2 WHERE id = $1 AND guild_id = $3 AND status = 'OPEN' RETURNING *",
+            ticket_id, priority, guild_id
+        )
+        self._remove(ticket_id, guild_id)
+        if row:
+            self._insert(Ticket.from_record(row))
+            self._notify(row['guild_id'])
+        return row
+
+    def stats(self):
+        return {
+            "open": len(self._items),
+            "guilds": sum(1 for queue in self._queues.values() if queue),
+        }
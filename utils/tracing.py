@@ -0,0 +1,127 @@
+"""Rastreamento de interações lentas e profiler sob demanda.
+
+`trace()` abre um rastro para o handler da interação (guardado num contextvar, então
+tarefas criadas dentro dele herdam o rastro); `span()` registra trechos filhos como
+queries e chamadas à API. Rastros acima de TRACE_SLOW_SECONDS viram uma linha JSON.
+Fora de um rastro, `span()` não faz nada.
+"""
+import asyncio
+import contextvars
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from config import Config
+
+logger = logging.getLogger("Trace")
+
+_current = contextvars.ContextVar("ovigia_trace", default=None)
+_profile_lock = asyncio.Lock()
+
+
+class Trace:
+    __slots__ = ("name", "attrs", "started", "spans", "finished")
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.started = time.perf_counter()
+        self.spans = []
+        self.finished = False
+
+    def to_dict(self, duration, error=None):
+        return {
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "trace": self.name,
+            "duration_ms": round(duration * 1000, 1),
+            "error": error,
+            **self.attrs,
+            "spans": [
+                {"name": name, "start_ms": round(start * 1000, 1), "duration_ms": round(elapsed * 1000, 1), **attrs}
+                for name, start, elapsed, attrs in self.spans
+            ],
+        }
+
+
+@contextmanager
+def trace(name, **attrs):
+    """Abre um rastro (se TRACE_ENABLED) e grava a linha JSON se ele passar do limite."""
+    if not Config.TRACE_ENABLED or _current.get() is not None:
+        yield None
+        return
+
+    current = Trace(name, attrs)
+    token = _current.set(current)
+    error = None
+    try:
+        yield current
+    except Exception as e:
+        error = repr(e)
+        raise
+    finally:
+        _current.reset(token)
+        current.finished = True
+        duration = time.perf_counter() - current.started
+        if duration >= Config.TRACE_SLOW_SECONDS:
+            _write(current.to_dict(duration, error))
+
+
+@contextmanager
+def span(name, **attrs):
+    """Registra um trecho filho no rastro ativo. Atributos podem ser completados dentro do bloco."""
+    current = _current.get()
+    if current is None or current.finished:
+        yield attrs
+        return
+
+    started = time.perf_counter()
+    try:
+        yield attrs
+    except Exception as e:
+        attrs["error"] = type(e).__name__
+        raise
+    finally:
+        current.spans.append((name, started - current.started, time.perf_counter() - started, attrs))
+
+
+def _write(record):
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    logger.warning(f"Interação lenta: {line}")
+    if Config.TRACE_FILE:
+        try:
+            with open(Config.TRACE_FILE, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            logger.error(f"Não foi possível gravar o rastro em {Config.TRACE_FILE}: {e}")
+
+
+async def profile_for(seconds, directory=None, top=30):
+    """Roda o cProfile por `seconds` segundos sobre o event loop inteiro.
+
+    Grava o .prof em `directory` (PROFILE_DIR) e devolve (caminho, resumo textual
+    das funções com maior tempo acumulado). Só um perfil por vez.
+    """
+    if _profile_lock.locked():
+        raise RuntimeError("Já existe um perfil em andamento.")
+
+    async with _profile_lock:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+
+    directory = directory or Config.PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"perfil-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.prof")
+    profiler.dump_stats(path)
+
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(top)
+    return path, out.getvalue()